@@ -15,12 +15,6 @@ import maya.OpenMayaMPx as OpenMayaMPx
 import seanim as SEAnim
 import semodel as SEModel
 
-try:
-    if xrange is None:
-        xrange = range
-except NameError:
-    xrange = range
-
 def __first__(first_iter, second_iter):
     """Compare two iterable objects"""
     for elem in first_iter:
@@ -594,7 +588,7 @@ def __scene_bindmesh__(mesh_skin, weight_data):
     _tmp_array_len = _tmp_array.length()
 
     # Iterate and assign indicies for names
-    for idx in xrange(_tmp_array_len):
+    for idx in range(_tmp_array_len):
         joint_indicies[str(_tmp_array[idx].fullPathName())
                        ] = mesh_skin.indexForInfluenceObject(_tmp_array[idx])
 
@@ -708,7 +702,7 @@ def __scene_getmaterials__(mesh, path):
     shaderindices = OpenMaya.MIntArray()
     mesh.getConnectedShaders(path.instanceNumber(), shaders, shaderindices)
 
-    for index in xrange(shaders.length()):
+    for index in range(shaders.length()):
         shadernode = OpenMaya.MFnDependencyNode(shaders[index])
         shaderplug = shadernode.findPlug("surfaceShader")
         matplug = OpenMaya.MPlugArray()
@@ -720,14 +714,6 @@ def __scene_getmaterials__(mesh, path):
     return result
 
 
-def __bonelist_indexof__(bonelist, name):
-    """Returns the first bone that matches."""
-    for index in xrange(len(bonelist)):
-        if (bonelist[index].name == name):
-            return index
-    return -1
-
-
 def __import_seanim__(scene_time=False, blend_anim=False):
     """Asks for a file to import"""
     import_file = __importfile_dialog__(
@@ -790,7 +776,7 @@ def __save_semodel__(file_path):
     unique_bones = set()
 
     # Build bones first
-    for index in xrange(select_list.length()):
+    for index in range(select_list.length()):
         depend_node = OpenMaya.MObject()
         select_list.getDependNode(index, depend_node)
         if not depend_node.hasFn(OpenMaya.MFn.kJoint):
@@ -846,16 +832,16 @@ def __save_semodel__(file_path):
         model.bones.append(new_bone)
 
     # We must generate the proper bone parent indices
-    for index in xrange(len(parent_stack)):
-        model.bones[index].boneParent = __bonelist_indexof__(
-            model.bones, parent_stack[index])
+    for index in range(len(parent_stack)):
+        model.bones[index].boneParent = model.bone_index(
+            parent_stack[index])
 
     material_index = 0
     used_materials = {}
     unique_meshes = set()
 
     # We can now process meshes
-    for index in xrange(select_list.length()):
+    for index in range(select_list.length()):
         depend_node = OpenMaya.MObject()
         select_list.getDependNode(index, depend_node)
         path = __scene_getobjectdag__(depend_node)
@@ -903,7 +889,7 @@ def __save_semodel__(file_path):
         max_influence = 0
 
         # Set material indices
-        for mat_index in xrange(uv_set_max):
+        for mat_index in range(uv_set_max):
             if (mat_index < len(mats)):
                 new_mesh.materialReferences.append(
                     used_materials[mats[mat_index]])
@@ -919,7 +905,7 @@ def __save_semodel__(file_path):
 
                 influence = 0
 
-                for vindex in xrange(weight_values.length()):
+                for vindex in range(weight_values.length()):
                     if weight_values[vindex] > 0.000001:
                         influence += 1
 
@@ -957,7 +943,7 @@ def __save_semodel__(file_path):
                 uvv = 0
                 # Vertex uv is average of all face uvs
                 count = uvus.length()
-                for id in xrange(count):
+                for id in range(count):
                     uvu += (uvus[id] / count)
                     uvv += (uvvs[id] / count)
                 new_vertex.uvLayers[uv_layer] = (uvu, 1 - uvv)
@@ -971,7 +957,7 @@ def __save_semodel__(file_path):
 
                 weight_index = 0
 
-                for vindex in xrange(weight_values.length()):
+                for vindex in range(weight_values.length()):
                     if weight_values[vindex] > 0.000001:
                         new_vertex.weights[weight_index] = (model_joints.index(
                             skin_joints[vindex].partialPathName()), weight_values[vindex])
@@ -1050,7 +1036,7 @@ def __save_seanim__(file_path, save_positions=True, save_rotations=True, save_sc
                      status='Exporting SEAnim...', maxValue=max(1, len(bone_list)))
 
     # Data for the current scene
-    frame_range = xrange(int(start_frame), int(end_frame))
+    frame_range = range(int(start_frame), int(end_frame))
 
     # Loop through and export bone keyframes
     if bone_list:
@@ -1083,13 +1069,7 @@ def __save_seanim__(file_path, save_positions=True, save_rotations=True, save_sc
 
     # Fetch notetracks, if any
     if note_list:
-        for note in note_list:
-            for frame in note_list[note]:
-                # Make and add a new notetrack
-                new_note = SEAnim.Note()
-                new_note.name = note
-                new_note.frame = frame
-                anim.notes.append(new_note)
+        anim.notes = SEAnim.NoteIndex.from_dict(note_list)
 
     # Reconfigure the scene to our liking
     cmds.currentUnit(linear=currentunit_state, angle=currentangle_state)
@@ -1210,7 +1190,7 @@ def __load_semodel__(file_path=""):
 
         # Perform face validation, maya doesn't like faces with the same verts
         purge_map = []
-        for face_idx in xrange(mesh.faceCount):
+        for face_idx in range(mesh.faceCount):
             face = mesh.faces[face_idx]
             # Compare indicies
             if face.indices[0] == face.indices[1]:
@@ -1243,7 +1223,7 @@ def __load_semodel__(file_path=""):
         mesh_uvv_layers = []
 
         # We must generate them this way to python doesn't clone an object
-        for uv_layer in xrange(mesh.matReferenceCount):
+        for uv_layer in range(mesh.matReferenceCount):
             mesh_uvu_layers.append(OpenMaya.MFloatArray(mesh.faceCount * 3))
             mesh_uvv_layers.append(OpenMaya.MFloatArray(mesh.faceCount * 3))
 
@@ -1281,7 +1261,7 @@ def __load_semodel__(file_path=""):
             mesh_uvid_layers.set((face_idx * 3) + 2, (face_idx * 3) + 2)
 
             # Do this per layer
-            for uv_layer in xrange(mesh.matReferenceCount):
+            for uv_layer in range(mesh.matReferenceCount):
                 mesh_uvu_layers[uv_layer].set(
                     mesh.vertices[face.indices[1]].uvLayers[uv_layer][0], (face_idx * 3))
                 mesh_uvu_layers[uv_layer].set(
@@ -1303,7 +1283,7 @@ def __load_semodel__(file_path=""):
         new_mesh.setVertexColors(mesh_color_buffer, mesh_vertex_index)
 
         # Apply UVLayers
-        for uv_layer in xrange(mesh.matReferenceCount):
+        for uv_layer in range(mesh.matReferenceCount):
             # Use default layer, or, make a new one if need be, following maya names
             if uv_layer > 0:
                 new_uv = new_mesh.createUVSetWithName(
@@ -1539,8 +1519,8 @@ def __load_seanim__(file_path="", scene_time=False, blend_anim=False):
     cmds.progressBar(main_progressbar, edit=True, endProgress=True)
 
     # Import notetracks
-    for note in anim.notes:
-        __add_notetrack__(note.name, note.frame)
+    for frame, name in zip(anim.notes.frames, anim.notes.names):
+        __add_notetrack__(name, frame)
 
     # Reconfigure the scene to our liking
     cmds.autoKeyframe(state=autokeyframe_state)
@@ -0,0 +1,105 @@
+"""
+Times Anim.reduce over a clip keyed on every frame, with smooth motion on
+every bone, for numpy backed channels and the default KeyFrame lists.
+Exits non zero when either reduce takes longer than its budget
+
+    python benchmarks/bench_seanim_reduce.py --bones 200 --frames 10000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import seanim  # noqa: E402
+
+numpy = seanim.numpy
+
+
+def build_anim(bone_count, frame_count, arrays, seed=0):
+    """Builds an animation with a loc, rot and scale key on every frame"""
+    rng = numpy.random.default_rng(seed)
+    anim = seanim.Anim()
+    anim.header.framerate = 30
+
+    frames = numpy.arange(frame_count, dtype=numpy.uint32)
+    t = frames.astype(numpy.float64)
+    for index in range(bone_count):
+        phase = rng.random(4) * 6.0
+        pos = numpy.stack((numpy.sin(t * 0.010 + phase[0]) * 10.0,
+                           numpy.cos(t * 0.013 + phase[1]) * 5.0,
+                           numpy.sin(t * 0.007 + phase[2])), axis=1)
+
+        # A swinging rotation about a slowly drifting axis
+        axis = numpy.stack((numpy.sin(t * 0.002 + phase[3]),
+                            numpy.cos(t * 0.002 + phase[3]),
+                            numpy.full(frame_count, 0.5)), axis=1)
+        axis /= numpy.sqrt((axis * axis).sum(axis=1))[:, None]
+        angle = numpy.sin(t * 0.005 + phase[0]) * 1.5
+        rot = numpy.concatenate((axis * numpy.sin(angle / 2.0)[:, None],
+                                 numpy.cos(angle / 2.0)[:, None]), axis=1)
+        scale = numpy.ones((frame_count, 3))
+
+        bone = seanim.Bone()
+        bone.name = "bone_%d" % index
+        for attribute, data in (('posKeys', pos), ('rotKeys', rot),
+                                ('scaleKeys', scale)):
+            keys = seanim.KeyArray(frames, data.astype('f'))
+            setattr(bone, attribute, keys if arrays else keys.to_keyframes())
+        anim.bones.append(bone)
+
+    return anim
+
+
+def time_best(build, repeat):
+    """Best reduce time over fresh clips, with the keys removed"""
+    best = None
+    for _ in range(repeat):
+        anim = build()
+        start = time.perf_counter()
+        removed = anim.reduce()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bones", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds allowed for the KeyArray reduce")
+    parser.add_argument("--list-budget", type=float, default=4.0,
+                        help="seconds allowed for the KeyFrame list reduce")
+    args = parser.parse_args()
+
+    if numpy is None:
+        print("numpy is required to reduce animations")
+        return 1
+
+    key_count = args.bones * args.frames * 3
+    print("%d bones x %d frames, %d keys" %
+          (args.bones, args.frames, key_count))
+
+    results = {}
+    for name, arrays in (("KeyArray", True), ("KeyFrame", False)):
+        elapsed, removed = time_best(
+            lambda: build_anim(args.bones, args.frames, arrays), args.repeat)
+        results[name] = elapsed
+        print("%-10s %8.3fs %12.0f keys/s %6.1f%% removed" %
+              (name, elapsed, key_count / elapsed,
+               100.0 * removed / key_count))
+
+    status = 0
+    for name, budget in (("KeyArray", args.budget),
+                         ("KeyFrame", args.list_budget)):
+        if results[name] > budget:
+            print("%s reduce is over the %.2fs budget" % (name, budget))
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
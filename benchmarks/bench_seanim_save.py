@@ -0,0 +1,123 @@
+"""
+Measures seanim save throughput in keys per second, comparing the
+previous one struct.pack and file.write per keyframe save path against
+the bulk packed Anim.save, for KeyFrame lists and numpy backed channels
+
+    python benchmarks/bench_seanim_save.py --bones 200 --frames 2000
+"""
+import os
+import sys
+import time
+import random
+import struct
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import seanim  # noqa: E402
+
+
+def build_anim(bone_count, frame_count, seed=0):
+    """Builds an animation with a loc, rot and scale key on every frame"""
+    rng = random.Random(seed)
+    anim = seanim.Anim()
+    anim.header.framerate = 30
+
+    for index in range(bone_count):
+        bone = seanim.Bone()
+        bone.name = "bone_%d" % index
+        for frame in range(frame_count):
+            bone.posKeys.append(seanim.KeyFrame(
+                frame, (rng.random(), rng.random(), rng.random())))
+            bone.rotKeys.append(seanim.KeyFrame(
+                frame, (rng.random(), rng.random(),
+                        rng.random(), rng.random())))
+            bone.scaleKeys.append(seanim.KeyFrame(frame, (1.0, 1.0, 1.0)))
+        anim.bones.append(bone)
+
+    return anim
+
+
+def legacy_save_bone(bone, file, frame_t, precision_t):
+    """The previous Bone.save, one pack and one write per keyframe"""
+    file.write(struct.pack("B", bone.flags))
+
+    file.write(struct.pack('%c' % frame_t.char, len(bone.posKeys)))
+    for key in bone.posKeys:
+        file.write(struct.pack('=%c3%c' % (frame_t.char, precision_t.char),
+                               key.frame,
+                               key.data[0], key.data[1], key.data[2]))
+
+    file.write(struct.pack('%c' % frame_t.char, len(bone.rotKeys)))
+    for key in bone.rotKeys:
+        file.write(struct.pack('=%c4%c' % (frame_t.char, precision_t.char),
+                               key.frame,
+                               key.data[0], key.data[1],
+                               key.data[2], key.data[3]))
+
+    file.write(struct.pack('%c' % frame_t.char, len(bone.scaleKeys)))
+    for key in bone.scaleKeys:
+        file.write(struct.pack('=%c3%c' % (frame_t.char, precision_t.char),
+                               key.frame,
+                               key.data[0], key.data[1], key.data[2]))
+
+
+def legacy_save(anim, path):
+    anim.update_metadata()
+    frame_t = seanim.Frame_t(anim.header)
+    precision_t = seanim.Precision_t(anim.header)
+
+    with open(path, "wb") as file:
+        seanim.Info().save(file)
+        anim.header.save(file)
+        for bone in anim.bones:
+            file.write(struct.pack('%ds' % (len(bone.name) + 1),
+                                   bone.name.encode()))
+        for bone in anim.bones:
+            legacy_save_bone(bone, file, frame_t, precision_t)
+
+
+def time_best(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bones", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    anim = build_anim(args.bones, args.frames)
+    key_count = sum(len(bone.posKeys) + len(bone.rotKeys) +
+                    len(bone.scaleKeys) for bone in anim.bones)
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.seanim")
+
+    cases = [("legacy per-key", lambda: legacy_save(anim, path)),
+             ("bulk KeyFrame", lambda: anim.save(path))]
+
+    if seanim.numpy is not None:
+        anim.save(path)
+        array_anim = seanim.Anim(path, use_arrays=True)
+        cases.append(("bulk KeyArray", lambda: array_anim.save(path)))
+
+    print("%d bones x %d frames, %d keys" %
+          (args.bones, args.frames, key_count))
+    for name, func in cases:
+        elapsed = time_best(func, args.repeat)
+        print("%-16s %8.3fs %12.0f keys/s" %
+              (name, elapsed, key_count / elapsed))
+
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
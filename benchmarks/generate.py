@@ -0,0 +1,181 @@
+"""
+Writes deterministic synthetic .seanim and .semodel files across a grid of
+sizes, for the benchmark runner or for testing tools against
+
+    python benchmarks/generate.py out_dir
+    python benchmarks/generate.py out_dir --quick
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import seanim  # noqa: E402
+import semodel  # noqa: E402
+
+# Each case is (name, parameters), the name is also the file name
+ANIM_GRID = [
+    ("anim_b50_f300", dict(bones=50, frames=300)),
+    ("anim_b50_f300_hp", dict(bones=50, frames=300, high_precision=True)),
+    ("anim_b200_f1000", dict(bones=200, frames=1000)),
+    ("anim_b20_f70000", dict(bones=20, frames=70000)),
+]
+
+MODEL_GRID = [
+    ("model_b50_v10000_uv1_w4", dict(bones=50, vertices=10000, uv_sets=1,
+                                     influences=4)),
+    ("model_b200_v50000_uv2_w4", dict(bones=200, vertices=50000, uv_sets=2,
+                                      influences=4)),
+    ("model_b300_v50000_uv1_w8", dict(bones=300, vertices=50000, uv_sets=1,
+                                      influences=8)),
+]
+
+QUICK_ANIM_GRID = [
+    ("anim_b20_f100", dict(bones=20, frames=100)),
+    ("anim_b20_f100_hp", dict(bones=20, frames=100, high_precision=True)),
+]
+
+QUICK_MODEL_GRID = [
+    ("model_b20_v2000_uv1_w2", dict(bones=20, vertices=2000, uv_sets=1,
+                                    influences=2)),
+]
+
+
+def make_anim(bones, frames, notes=8, seed=0):
+    """
+    Builds an animation with a position and rotation key on every frame,
+    a scale key on every other frame of every fourth bone, a modifier on
+    every tenth bone and notes spread over the clip
+    """
+    rng = random.Random(seed)
+    anim = seanim.Anim()
+    anim.header.framerate = 30
+
+    for index in range(bones):
+        bone = seanim.Bone()
+        bone.name = "tag_bone_%d" % index
+        if index % 10 == 5:
+            bone.useModifier = True
+            bone.modifier = seanim.SEANIM_TYPE.SEANIM_TYPE_ABSOLUTE
+
+        pos = [seanim.KeyFrame(frame, (rng.uniform(-10, 10),
+                                       rng.uniform(-10, 10),
+                                       rng.uniform(-10, 10)))
+               for frame in range(frames)]
+        rot = []
+        for frame in range(frames):
+            x, y, z, w = [rng.gauss(0, 1) for _ in range(4)]
+            length = (x * x + y * y + z * z + w * w) ** 0.5 or 1.0
+            rot.append(seanim.KeyFrame(
+                frame, (x / length, y / length, z / length, w / length)))
+        bone.extend_pos_keys(pos)
+        bone.extend_rot_keys(rot)
+        if index % 4 == 0:
+            bone.extend_scale_keys([seanim.KeyFrame(frame, (1.0, 1.0, 1.0))
+                                    for frame in range(0, frames, 2)])
+        anim.bones.append(bone)
+
+    for index in range(notes):
+        note = seanim.Note()
+        note.name = "note_%d" % index
+        note.frame = rng.randrange(frames)
+        anim.notes.append(note)
+
+    return anim
+
+
+def make_model(bones, vertices, uv_sets=1, influences=4, meshes=2,
+               materials=2, seed=0):
+    """
+    Builds a skinned model, the vertices are split evenly across the meshes
+    and each mesh has one face per vertex
+    """
+    rng = random.Random(seed)
+    model = semodel.Model()
+
+    for index in range(bones):
+        bone = semodel.Bone()
+        bone.name = "tag_bone_%d" % index
+        bone.boneParent = index - 1
+        bone.globalPosition = (rng.uniform(-10, 10), rng.uniform(-10, 10),
+                               rng.uniform(-10, 10))
+        bone.localPosition = (rng.uniform(-1, 1), rng.uniform(-1, 1),
+                              rng.uniform(-1, 1))
+        model.bones.append(bone)
+
+    per_mesh = max(vertices // meshes, 3)
+    for index in range(meshes):
+        mesh = semodel.Mesh()
+        for _ in range(per_mesh):
+            vertex = semodel.Vertex(uv_sets, influences)
+            vertex.position = (rng.uniform(-10, 10), rng.uniform(-10, 10),
+                               rng.uniform(-10, 10))
+            vertex.normal = (0.0, 1.0, 0.0)
+            vertex.uvLayers = [(rng.random(), rng.random())
+                               for _ in range(uv_sets)]
+            vertex.weights = [(rng.randrange(bones), 1.0 / influences)
+                              for _ in range(influences)]
+            mesh.vertices.append(vertex)
+        for _ in range(per_mesh):
+            mesh.faces.append(semodel.Face((rng.randrange(per_mesh),
+                                            rng.randrange(per_mesh),
+                                            rng.randrange(per_mesh))))
+        mesh.materialReferences = [index % max(materials, 1)
+                                   for _ in range(uv_sets)]
+        model.meshes.append(mesh)
+
+    for index in range(materials):
+        material = semodel.Material()
+        material.name = "material_%d" % index
+        material.inputData.diffuseMap = "material_%d_c.png" % index
+        model.materials.append(material)
+
+    return model
+
+
+def generate(directory, anim_grid=ANIM_GRID, model_grid=MODEL_GRID):
+    """
+    Writes every case in the grids to directory, files already there are
+    kept, returns a list of (name, path)
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    cases = []
+    for seed, (name, parameters) in enumerate(anim_grid):
+        path = os.path.join(directory, name + ".seanim")
+        if not os.path.isfile(path):
+            parameters = dict(parameters)
+            high_precision = parameters.pop("high_precision", False)
+            make_anim(seed=seed, **parameters).save(path, high_precision)
+        cases.append((name, path))
+
+    for seed, (name, parameters) in enumerate(model_grid):
+        path = os.path.join(directory, name + ".semodel")
+        if not os.path.isfile(path):
+            make_model(seed=seed, **parameters).save(path)
+        cases.append((name, path))
+
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory")
+    parser.add_argument("--quick", action="store_true",
+                        help="Only write the small grid")
+    args = parser.parse_args()
+
+    if args.quick:
+        cases = generate(args.directory, QUICK_ANIM_GRID, QUICK_MODEL_GRID)
+    else:
+        cases = generate(args.directory)
+
+    for name, path in cases:
+        print("%-28s %10d bytes" % (name, os.path.getsize(path)))
+
+
+if __name__ == "__main__":
+    main()
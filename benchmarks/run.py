@@ -0,0 +1,178 @@
+"""
+Times the probe, load and save phases of seanim and semodel over the
+synthetic grid from generate.py and writes the results as JSON. Given a
+baseline, exits non zero when any phase's throughput drops more than the
+threshold below it
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --baseline baseline.json --threshold 0.2
+    python benchmarks/run.py --quick --output baseline.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import seanim  # noqa: E402
+import semodel  # noqa: E402
+import generate  # noqa: E402
+
+
+def anim_phases(path, scratch):
+    """The (phase, function) pairs timed for a .seanim file"""
+    anim = seanim.Anim(path)
+    high_precision = (anim.header.dataPropertyFlags &
+                      seanim.SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH)
+
+    phases = [("probe", lambda: seanim.probe(path)),
+              ("load", lambda: seanim.Anim(path)),
+              ("load_lazy", lambda: seanim.Anim(path, lazy=True)),
+              ("save", lambda: anim.save(scratch, high_precision))]
+
+    if seanim.numpy is not None:
+        arrays = seanim.Anim(path, use_arrays=True)
+        phases.append(("load_arrays",
+                       lambda: seanim.Anim(path, use_arrays=True)))
+        phases.append(("save_arrays",
+                       lambda: arrays.save(scratch, high_precision)))
+
+    return phases
+
+
+def model_phases(path, scratch):
+    """The (phase, function) pairs timed for a .semodel file"""
+    model = semodel.Model(path)
+    return [("probe", lambda: semodel.probe(path)),
+            ("load", lambda: semodel.Model(path)),
+            ("save", lambda: model.save(scratch))]
+
+
+def time_best(func, repeat, min_time=0.2):
+    """
+    Best of at least repeat runs, fast phases keep running until min_time
+    has passed so their best time isn't just noise
+    """
+    best = None
+    runs = 0
+    total = 0.0
+    while runs < repeat or total < min_time:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        runs += 1
+        total += elapsed
+    return best
+
+
+def run(cases, repeat, scratch):
+    """
+    Times every phase of every case, returns {case: {phase: result}} where
+    each result holds the best seconds and the MB/s it works out to
+    """
+    results = {}
+    for name, path in cases:
+        size = os.path.getsize(path)
+        if path.endswith(".seanim"):
+            phases = anim_phases(path, scratch)
+        else:
+            phases = model_phases(path, scratch)
+
+        results[name] = {}
+        for phase, func in phases:
+            seconds = time_best(func, repeat)
+            results[name][phase] = {
+                "seconds": seconds,
+                "mb_per_s": size / (1024.0 * 1024.0) / max(seconds, 1e-9),
+            }
+            print("%-28s %-12s %9.4fs %10.2f MB/s" % (
+                name, phase, seconds, results[name][phase]["mb_per_s"]))
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a line per phase whose throughput fell more than threshold
+    (a fraction) below the baseline, phases missing from either are skipped
+    """
+    regressions = []
+    for name, phases in sorted(results.items()):
+        for phase, result in sorted(phases.items()):
+            expected = baseline.get(name, {}).get(phase)
+            if expected is None:
+                continue
+            floor = expected["mb_per_s"] * (1.0 - threshold)
+            if result["mb_per_s"] < floor:
+                regressions.append(
+                    "%s %s: %.2f MB/s, baseline %.2f MB/s (-%.0f%%)" % (
+                        name, phase, result["mb_per_s"],
+                        expected["mb_per_s"],
+                        100.0 * (1.0 - result["mb_per_s"] /
+                                 expected["mb_per_s"])))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--data",
+                        help="Directory for the generated files, reused "
+                        "between runs (default: a temporary directory)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Only run the small grid")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed throughput drop as a fraction "
+                        "(default: 0.2)")
+    args = parser.parse_args()
+
+    directory = args.data or tempfile.mkdtemp()
+    try:
+        if args.quick:
+            cases = generate.generate(directory, generate.QUICK_ANIM_GRID,
+                                      generate.QUICK_MODEL_GRID)
+        else:
+            cases = generate.generate(directory)
+        results = run(cases, args.repeat,
+                      os.path.join(directory, "scratch.tmp"))
+    finally:
+        if args.data is None:
+            shutil.rmtree(directory, ignore_errors=True)
+        elif os.path.exists(os.path.join(directory, "scratch.tmp")):
+            os.remove(os.path.join(directory, "scratch.tmp"))
+
+    document = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": seanim.numpy is not None,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION %s" % line)
+        if regressions:
+            return 1
+        print("No regressions past %.0f%% against %s" % (
+            100.0 * args.threshold, args.baseline))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,19 @@
+import io
+import os
+import math
+import mmap
+import bisect
 import time
 import struct
+import operator
+import itertools
+import collections
+import concurrent.futures
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # <pep8 compliant>
 
@@ -64,6 +78,14 @@ class Info(object):
         assert magic == self.magic
         assert version == self.version
 
+    def loadFromBuffer(self, buffer, offset=0):
+        data = struct.unpack_from('=6sh', buffer, offset)
+
+        assert data[0] == self.magic
+        assert data[1] == self.version
+
+        return offset + 8
+
     def save(self, file):
         bytes = self.magic
         bytes += struct.pack('h', self.version)
@@ -121,6 +143,23 @@ class Header(object):
         # reserved = data[12]
         self.noteCount = data[13]
 
+    def loadFromBuffer(self, buffer, offset=0):
+        headerSize = struct.unpack_from('h', buffer, offset)[0]
+        # = prefix tell is to ignore C struct packing rules
+        data = struct.unpack_from('=6BfII4BI', buffer, offset + 2)
+
+        self.animType = data[0]
+        self.animFlags = data[1]
+        self.dataPresenceFlags = data[2]
+        self.dataPropertyFlags = data[3]
+        self.framerate = data[6]
+        self.frameCount = data[7]
+        self.boneCount = data[8]
+        self.boneAnimModifierCount = data[9]
+        self.noteCount = data[13]
+
+        return offset + headerSize
+
     def save(self, file):
         bytes = struct.pack('=6BfII4BI',
                             self.animType, self.animFlags,
@@ -136,12 +175,114 @@ class Header(object):
         file.write(bytes)
 
 
+class _Spans(object):
+    """
+    Reports timed spans of a load or save to an instrument callback, which
+    is called as instrument(phase, seconds, size) with size in bytes. Each
+    span runs from the previous one, mark reports it right away while add
+    sums it into its phase until flush, for phases split across many
+    bones or meshes. Only created when a callback is given
+    """
+    __slots__ = ('instrument', 'start', 'time', 'offset', 'totals')
+
+    def __init__(self, instrument):
+        self.instrument = instrument
+        self.offset = 0
+        self.totals = collections.OrderedDict()
+        self.start = self.time = time.perf_counter()
+
+    def _advance(self, offset, size):
+        now = time.perf_counter()
+        seconds = now - self.time
+        if size is None:
+            size = offset - self.offset
+        self.time = now
+        self.offset = offset
+        return seconds, size
+
+    def mark(self, phase, offset, size=None):
+        seconds, size = self._advance(offset, size)
+        self.instrument(phase, seconds, size)
+
+    def add(self, phase, offset, size=None):
+        seconds, size = self._advance(offset, size)
+        total = self.totals.get(phase, (0.0, 0))
+        self.totals[phase] = (total[0] + seconds, total[1] + size)
+
+    def flush(self):
+        for phase, (seconds, size) in self.totals.items():
+            self.instrument(phase, seconds, size)
+        self.totals.clear()
+
+    def total(self, size):
+        self.instrument('total', time.perf_counter() - self.start, size)
+
+
+def _print_span(phase, seconds, size):
+    """
+    The instrument used when LOG_READ_TIME or LOG_WRITE_TIME is set
+    """
+    if phase == 'total':
+        print("Done! - Completed in %ss" % seconds)
+    else:
+        print("  %s: %fs, %d bytes" % (phase, seconds, size))
+
+
+# Compiled struct.Struct records, built once per process and shared by
+# every Frame_t, Bone_t and Precision_t instance
+_STRUCT_CACHE = {}
+
+# Keyframe records keyed by (frame char, precision char)
+_KEY_RECORD_CACHE = {}
+
+
+def _struct(format):
+    """
+    Returns the cached struct.Struct for format, compiling it on first use
+    """
+    record = _STRUCT_CACHE.get(format)
+    if record is None:
+        record = _STRUCT_CACHE[format] = struct.Struct(format)
+    return record
+
+
+KeyRecords = collections.namedtuple('KeyRecords', (
+    'vec3', 'quat', 'vec3_dtype', 'quat_dtype'
+))
+
+
+def key_records(frame_t, precision_t):
+    """
+    Returns the KeyRecords for a frame index width and precision, holding
+    the struct.Struct for a vec3 and a quat keyframe, along with matching
+    numpy structured dtypes when numpy is available
+
+    Records are built once per (frame width, precision) pair per process
+    """
+    key = (frame_t.char, precision_t.char)
+    records = _KEY_RECORD_CACHE.get(key)
+    if records is None:
+        vec3_dtype = quat_dtype = None
+        if numpy is not None:
+            vec3_dtype = numpy.dtype([('frame', '=' + frame_t.char),
+                                      ('data', '=' + precision_t.char, (3,))])
+            quat_dtype = numpy.dtype([('frame', '=' + frame_t.char),
+                                      ('data', '=' + precision_t.char, (4,))])
+
+        records = _KEY_RECORD_CACHE[key] = KeyRecords(
+            _struct('=%c3%c' % key), _struct('=%c4%c' % key),
+            vec3_dtype, quat_dtype)
+    return records
+
+
 class Frame_t(object):
     """
     The Frame_t class is only ever used to get the size
-    and format character used by frame indices in a given seanim file
+    and format character used by frame indices in a given seanim file,
+    struct is the compiled record for a single frame index or key count.
+    Every width is unsigned, so frames up to 0xFFFFFFFF round trip
     """
-    __slots__ = ('size', 'char')
+    __slots__ = ('size', 'char', 'struct')
 
     def __init__(self, header):
         if header.frameCount <= 0xFF:
@@ -149,18 +290,29 @@ class Frame_t(object):
             self.char = 'B'
         elif header.frameCount <= 0xFFFF:
             self.size = 2
-            self.char = 'h'
+            self.char = 'H'
         else:  # if header.frameCount <= 0xFFFFFFFF:
             self.size = 4
             self.char = 'I'
 
+        self.struct = _struct('=' + self.char)
+
+    def records(self, precision_t):
+        """
+        Returns the cached KeyRecords for this frame width and precision_t
+        """
+        return key_records(self, precision_t)
+
 
 class Bone_t(object):
     """
     The Bone_t class is only ever used to get the size
-    and format character used by frame indices in a given seanim file
+    and format character used by bone indices in a given seanim file,
+    struct is the compiled record for a bone index and modifier the one
+    for a (bone index, modifier type) pair. Like Frame_t every width is
+    unsigned
     """
-    __slots__ = ('size', 'char')
+    __slots__ = ('size', 'char', 'struct', 'modifier')
 
     def __init__(self, header):
         if header.boneCount <= 0xFF:
@@ -168,18 +320,22 @@ class Bone_t(object):
             self.char = 'B'
         elif header.boneCount <= 0xFFFF:
             self.size = 2
-            self.char = 'h'
+            self.char = 'H'
         else:  # if header.boneCount <= 0xFFFFFFFF:
             self.size = 4
             self.char = 'I'
 
+        self.struct = _struct('=' + self.char)
+        self.modifier = _struct('=%cB' % self.char)
+
 
 class Precision_t(object):
     """
     The Precision_t class is only ever used to get the size
-    and format character used by vec3_t, quat_t, etc. in a given sanim file
+    and format character used by vec3_t, quat_t, etc. in a given sanim file,
+    vec3 and quat are the compiled records for those values
     """
-    __slots__ = ('size', 'char')
+    __slots__ = ('size', 'char', 'vec3', 'quat')
 
     def __init__(self, header):
         if (header.dataPropertyFlags &
@@ -190,6 +346,153 @@ class Precision_t(object):
             self.size = 4
             self.char = 'f'
 
+        self.vec3 = _struct('=3' + self.char)
+        self.quat = _struct('=4' + self.char)
+
+
+def _find_null(buffer, offset):
+    """
+    Returns the offset of the next null byte at or after offset, or -1,
+    memoryviews have no find so they are searched in small copied chunks
+    """
+    if not isinstance(buffer, memoryview):
+        return buffer.find(b'\x00', offset)
+
+    size = len(buffer)
+    while offset < size:
+        chunk = buffer[offset:offset + 256].tobytes()
+        index = chunk.find(b'\x00')
+        if index >= 0:
+            return offset + index
+        offset += len(chunk)
+    return -1
+
+
+def _read_string(buffer, offset):
+    """
+    Reads a null terminated utf-8 string from the buffer, returns the
+    string and the offset just past its terminator
+    """
+    end = _find_null(buffer, offset)
+    if end < 0:
+        raise ValueError("Unterminated string at offset %d" % offset)
+    return str(buffer[offset:end], "utf-8"), end + 1
+
+
+def _as_buffer(data):
+    """
+    Returns data as something the buffer loaders can read, bytes,
+    bytearray and mmap are used as is, any other object supporting the
+    buffer protocol is viewed as flat bytes without copying
+    """
+    if isinstance(data, (bytes, bytearray, mmap.mmap)):
+        return data
+    view = memoryview(data)
+    if view.ndim != 1 or view.format != 'B':
+        view = view.cast('B')
+    return view
+
+
+def _map_file(path):
+    """
+    Memory maps the file at path for reading, pages are only read from
+    disk once they are touched
+    """
+    with open(path, "rb") as file:
+        if not file.seek(0, 2):
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scan_bone_data(buffer, offset, frame_t, precision_t,
+                    useLoc=False, useRot=False, useScale=False):
+    """
+    Reads the flags and key counts of a bone's key block and computes the
+    block size from them, returns the flags, the loc, rot and scale counts
+    and the offset just past the block
+    """
+    count_t = frame_t.struct
+    vec3_size = frame_t.size + 3 * precision_t.size
+    quat_size = frame_t.size + 4 * precision_t.size
+
+    locKeyCount = rotKeyCount = scaleKeyCount = 0
+
+    flags = struct.unpack_from('B', buffer, offset)[0]
+    offset += 1
+
+    if useLoc:
+        locKeyCount = count_t.unpack_from(buffer, offset)[0]
+        offset += frame_t.size + locKeyCount * vec3_size
+    if useRot:
+        rotKeyCount = count_t.unpack_from(buffer, offset)[0]
+        offset += frame_t.size + rotKeyCount * quat_size
+    if useScale:
+        scaleKeyCount = count_t.unpack_from(buffer, offset)[0]
+        offset += frame_t.size + scaleKeyCount * vec3_size
+
+    return flags, locKeyCount, rotKeyCount, scaleKeyCount, offset
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("numpy is required for array backed keyframes")
+
+
+def _unpack_keys(view, offset, count, record):
+    """
+    Decodes a run of count keyframes stored with the given struct record,
+    in a single pass over the buffer, returns the keys and the end offset
+    """
+    end = offset + count * record.size
+    keys = [KeyFrame(data[0], data[1:])
+            for data in record.iter_unpack(view[offset:end])]
+    return keys, end
+
+
+def _unpack_key_array(buffer, offset, count, dtype):
+    """
+    Decodes a run of count keyframes into a KeyArray with a single
+    np.frombuffer over the key block, returns the keys and the end offset
+    """
+    records = numpy.frombuffer(buffer, dtype=dtype, count=count,
+                               offset=offset)
+    keys = KeyArray(records['frame'].astype(numpy.uint32),
+                    numpy.array(records['data']))
+    return keys, offset + count * dtype.itemsize
+
+
+def _pack_keys(keys, record, dtype, width):
+    """
+    Packs a channel of keyframes with the given struct record into one
+    buffer, array backed channels are packed with a single tobytes using
+    the matching structured dtype
+    """
+    if isinstance(keys, KeyArray):
+        records = numpy.empty(len(keys), dtype=dtype)
+        records['frame'] = keys.frames
+        records['data'] = keys.data
+        return records.tobytes()
+
+    pack = record.pack
+    if width == 3:
+        return b''.join([pack(key.frame,
+                              key.data[0], key.data[1], key.data[2])
+                         for key in keys])
+    return b''.join([pack(key.frame,
+                          key.data[0], key.data[1], key.data[2], key.data[3])
+                     for key in keys])
+
+
+def _max_key_frame(keys):
+    """
+    Returns the highest frame index in a channel, or -1 when it is empty
+    """
+    if not len(keys):
+        return -1
+    if isinstance(keys, KeyArray):
+        return int(keys.frames.max())
+    return max(key.frame for key in keys)
+
 
 class KeyFrame(object):
     """
@@ -202,12 +505,79 @@ class KeyFrame(object):
         self.data = data
 
 
+# Read the fields of every key in C when building arrays from KeyFrames
+_KEY_FRAME = operator.attrgetter('frame')
+_KEY_DATA = operator.attrgetter('data')
+
+
+class KeyArray(object):
+    """
+    A keyframe channel backed by numpy arrays, frames holds the frame
+    indices and data holds an (N, 3) or (N, 4) array of the key values
+
+    It behaves like a read only list of KeyFrame objects, so existing
+    code iterating over a channel keeps working
+    """
+    __slots__ = ('frames', 'data')
+
+    def __init__(self, frames, data):
+        self.frames = frames
+        self.data = data
+
+    @staticmethod
+    def empty(width, dtype='f'):
+        _require_numpy()
+        return KeyArray(numpy.zeros(0, dtype=numpy.uint32),
+                        numpy.zeros((0, width), dtype=dtype))
+
+    @staticmethod
+    def fromKeyFrames(keys, width, dtype='f'):
+        """
+        Builds a KeyArray from a list of KeyFrame objects
+        """
+        _require_numpy()
+        if isinstance(keys, KeyArray):
+            return keys
+        if not keys:
+            return KeyArray.empty(width, dtype)
+        frames = numpy.fromiter(map(_KEY_FRAME, keys), numpy.uint32,
+                                len(keys))
+        # Flattening the tuples skips numpy working out the nested shape,
+        # a short channel fails the count and a wide one leaves values over
+        values = itertools.chain.from_iterable(map(_KEY_DATA, keys))
+        data = numpy.fromiter(values, dtype, len(keys) * width)
+        if next(values, None) is not None:
+            raise ValueError("Keyframe data is wider than %d values" % width)
+        return KeyArray(frames, data.reshape(len(keys), width))
+
+    def to_keyframes(self):
+        """
+        Returns the channel as a list of KeyFrame objects
+        """
+        return [KeyFrame(frame, tuple(data))
+                for frame, data in zip(self.frames.tolist(),
+                                       self.data.tolist())]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.to_keyframes())
+
+    def __getitem__(self, index):
+        if isinstance(index, (slice, numpy.ndarray)):
+            return KeyArray(self.frames[index], self.data[index])
+        return KeyFrame(int(self.frames[index]),
+                        tuple(self.data[index].tolist()))
+
+
 class Bone(object):
     __slots__ = (
-        'name', 'flags',
+        '_name', 'flags',
         'locKeyCount', 'rotKeyCount', 'scaleKeyCount',
-        'posKeys', 'rotKeys', 'scaleKeys',
-        'useModifier', 'modifier'
+        '_posKeys', '_rotKeys', '_scaleKeys',
+        'useModifier', 'modifier',
+        '_source', '_maxFrame', '_trackedCounts', '_pending', '_edits'
     )
 
     def __init__(self, file=None):
@@ -219,6 +589,17 @@ class Bone(object):
         self.rotKeyCount = 0
         self.scaleKeyCount = 0
 
+        # Arguments for loadDataFromBuffer when the keys are still pending
+        self._source = None
+
+        # Keys appended to each array backed channel since it was last read,
+        # they are concatenated onto it in one go on the next read
+        self._pending = None
+
+        # Bumped whenever a channel is assigned or appended to, samplers
+        # kept by the Anim copy the bone's keys again once it changes
+        self._edits = 0
+
         self.posKeys = []
         self.rotKeys = []
         self.scaleKeys = []
@@ -226,6 +607,11 @@ class Bone(object):
         self.useModifier = False
         self.modifier = 0
 
+        # Running max frame index, only kept for array backed channels and
+        # valid while their lengths still match the counts it was tracked at
+        self._maxFrame = -1
+        self._trackedCounts = (0, 0, 0)
+
         if file is not None:
             self.load(file)
 
@@ -237,8 +623,309 @@ class Bone(object):
             b = file.read(1)
         self.name = bytes.decode("utf-8")
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        _RENAMES[0] += 1
+
+    @property
+    def posKeys(self):
+        if self._source is not None:
+            self._load_deferred()
+        if self._pending is not None and self._pending[0]:
+            self._flush_pending(0)
+        return self._posKeys
+
+    @posKeys.setter
+    def posKeys(self, keys):
+        if self._source is not None:
+            self._load_deferred()
+        if self._pending is not None:
+            self._pending[0] = []
+        self._posKeys = keys
+        self._maxFrame = None
+        self._edits += 1
+
+    @property
+    def rotKeys(self):
+        if self._source is not None:
+            self._load_deferred()
+        if self._pending is not None and self._pending[1]:
+            self._flush_pending(1)
+        return self._rotKeys
+
+    @rotKeys.setter
+    def rotKeys(self, keys):
+        if self._source is not None:
+            self._load_deferred()
+        if self._pending is not None:
+            self._pending[1] = []
+        self._rotKeys = keys
+        self._maxFrame = None
+        self._edits += 1
+
+    @property
+    def scaleKeys(self):
+        if self._source is not None:
+            self._load_deferred()
+        if self._pending is not None and self._pending[2]:
+            self._flush_pending(2)
+        return self._scaleKeys
+
+    @scaleKeys.setter
+    def scaleKeys(self, keys):
+        if self._source is not None:
+            self._load_deferred()
+        if self._pending is not None:
+            self._pending[2] = []
+        self._scaleKeys = keys
+        self._maxFrame = None
+        self._edits += 1
+
+    def _channels(self):
+        """
+        Returns the three channels as stored, without their pending keys
+        """
+        if self._source is not None:
+            self._load_deferred()
+        return (self._posKeys, self._rotKeys, self._scaleKeys)
+
+    def _key_counts(self):
+        counts = [len(keys) for keys in self._channels()]
+        if self._pending is not None:
+            for slot, pieces in enumerate(self._pending):
+                counts[slot] += sum([len(piece) for piece in pieces])
+        return tuple(counts)
+
+    def _is_tracked(self):
+        # KeyFrame lists and their keys can be edited in place without the
+        # bone knowing, so a bone with any list keys is never tracked
+        for keys in self._channels():
+            if len(keys) and not isinstance(keys, KeyArray):
+                return False
+        return (self._maxFrame is not None and
+                self._trackedCounts == self._key_counts())
+
+    def _extend_keys(self, slot, keys):
+        """
+        Appends keys to the channel in slot, 0 to 2 for pos, rot and scale.
+        An array backed channel only queues them, see _flush_pending
+        """
+        self._edits += 1
+        current = self._channels()[slot]
+        if isinstance(current, KeyArray):
+            if self._pending is None:
+                self._pending = [[], [], []]
+            pieces = self._pending[slot]
+            if isinstance(keys, KeyArray):
+                pieces.append(keys)
+            elif pieces and isinstance(pieces[-1], list):
+                pieces[-1].extend(keys)
+            else:
+                pieces.append(keys)
+            return
+
+        if isinstance(keys, KeyArray):
+            keys = keys.to_keyframes()
+        current.extend(keys)
+
+    def _flush_pending(self, slot):
+        """
+        Concatenates the keys queued on the array backed channel in slot
+        onto it, so appending one key at a time only copies the channel
+        once per read instead of once per key
+        """
+        pieces = self._pending[slot]
+        self._pending[slot] = []
+        current = (self._posKeys, self._rotKeys, self._scaleKeys)[slot]
+        width = current.data.shape[1]
+        arrays = [current] + [
+            KeyArray.fromKeyFrames(piece, width, current.data.dtype)
+            for piece in pieces]
+        keys = KeyArray(numpy.concatenate([keys.frames for keys in arrays]),
+                        numpy.concatenate([keys.data for keys in arrays]))
+        setattr(self, ('_posKeys', '_rotKeys', '_scaleKeys')[slot], keys)
+
+    def _track_keys(self, tracked, keys):
+        if tracked:
+            self._maxFrame = max(self._maxFrame, _max_key_frame(keys))
+            self._trackedCounts = self._key_counts()
+
+    def add_pos_key(self, frame, data):
+        self.extend_pos_keys([KeyFrame(frame, data)])
+
+    def add_rot_key(self, frame, data):
+        self.extend_rot_keys([KeyFrame(frame, data)])
+
+    def add_scale_key(self, frame, data):
+        self.extend_scale_keys([KeyFrame(frame, data)])
+
+    def extend_pos_keys(self, keys):
+        """
+        Appends keys to posKeys, an array backed channel queues them until
+        it is next read. Keeps the running max frame up to date, see
+        max_frame
+        """
+        if not isinstance(keys, KeyArray):
+            keys = list(keys)
+        tracked = self._is_tracked()
+        self._extend_keys(0, keys)
+        self._track_keys(tracked, keys)
+
+    def extend_rot_keys(self, keys):
+        """
+        Appends keys to rotKeys, an array backed channel queues them until
+        it is next read. Keeps the running max frame up to date, see
+        max_frame
+        """
+        if not isinstance(keys, KeyArray):
+            keys = list(keys)
+        tracked = self._is_tracked()
+        self._extend_keys(1, keys)
+        self._track_keys(tracked, keys)
+
+    def extend_scale_keys(self, keys):
+        """
+        Appends keys to scaleKeys, an array backed channel queues them until
+        it is next read. Keeps the running max frame up to date, see
+        max_frame
+        """
+        if not isinstance(keys, KeyArray):
+            keys = list(keys)
+        tracked = self._is_tracked()
+        self._extend_keys(2, keys)
+        self._track_keys(tracked, keys)
+
+    def max_frame(self):
+        """
+        Returns the highest frame index used by the bone's keys, or -1 when
+        it has none. When every channel is array backed the running value
+        kept by the add / extend helpers is used, unless a channel was
+        replaced or its length changed, KeyArrays are treated as read only
+
+        KeyFrame lists are never tracked, their keys can be edited in place
+        without the bone knowing, so a bone with any list channel, as
+        loaded by default, is scanned on every call. Load with use_arrays
+        for the running value
+        """
+        if not self._is_tracked():
+            self._maxFrame = max(_max_key_frame(self.posKeys),
+                                 _max_key_frame(self.rotKeys),
+                                 _max_key_frame(self.scaleKeys))
+            self._trackedCounts = self._key_counts()
+        return self._maxFrame
+
+    def is_loaded(self):
+        """
+        Whether or not the keyframes for this bone have been decoded
+        """
+        return self._source is None
+
+    def _load_deferred(self):
+        source = self._source
+        self._source = None
+        self.loadDataFromBuffer(*source)
+
+    def loadFromBuffer(self, buffer, offset):
+        self.name, offset = _read_string(buffer, offset)
+        return offset
+
+    def scanFromBuffer(self, buffer, offset, frame_t, precision_t,
+                       useLoc=False, useRot=False, useScale=False,
+                       use_arrays=False):
+        """
+        Reads only the flags and key counts for the bone, the keyframes
+        themselves are decoded from buffer the first time a channel is
+        accessed, returns the offset just past the bone's key block
+        """
+        self._source = (buffer, offset, frame_t, precision_t,
+                        useLoc, useRot, useScale, use_arrays)
+
+        (self.flags, self.locKeyCount, self.rotKeyCount,
+         self.scaleKeyCount, offset) = _scan_bone_data(
+            buffer, offset, frame_t, precision_t, useLoc, useRot, useScale)
+
+        return offset
+
+    def loadDataFromBuffer(self, buffer, offset, frame_t, precision_t,
+                           useLoc=False, useRot=False, useScale=False,
+                           use_arrays=False, spans=None):
+        """
+        Decodes the bone's flags and key channels from buffer, returns the
+        offset just past the bone's key block. When spans is given the time
+        and size of each channel is added to its phase
+        """
+        count_t = frame_t.struct
+        records = key_records(frame_t, precision_t)
+
+        if use_arrays:
+            # Decode each channel straight into numpy arrays
+            vec3_t = records.vec3_dtype
+            quat_t = records.quat_dtype
+            unpack = _unpack_key_array
+
+            self.posKeys = KeyArray.empty(3, precision_t.char)
+            self.rotKeys = KeyArray.empty(4, precision_t.char)
+            self.scaleKeys = KeyArray.empty(3, precision_t.char)
+        else:
+            buffer = memoryview(buffer)
+            vec3_t = records.vec3
+            quat_t = records.quat
+            unpack = _unpack_keys
+
+        self.flags = struct.unpack_from('B', buffer, offset)[0]
+        offset += 1
+
+        if useLoc:
+            self.locKeyCount = count_t.unpack_from(buffer, offset)[0]
+            self.posKeys, offset = unpack(
+                buffer, offset + frame_t.size, self.locKeyCount, vec3_t)
+            if spans is not None:
+                spans.add('loc_keys', offset)
+
+        if useRot:
+            self.rotKeyCount = count_t.unpack_from(buffer, offset)[0]
+            self.rotKeys, offset = unpack(
+                buffer, offset + frame_t.size, self.rotKeyCount, quat_t)
+            if spans is not None:
+                spans.add('rot_keys', offset)
+
+        if useScale:
+            self.scaleKeyCount = count_t.unpack_from(buffer, offset)[0]
+            self.scaleKeys, offset = unpack(
+                buffer, offset + frame_t.size, self.scaleKeyCount, vec3_t)
+            if spans is not None:
+                spans.add('scale_keys', offset)
+
+        return offset
+
+    def to_keyframes(self):
+        """
+        Converts any array backed channels to lists of KeyFrame objects
+        """
+        if isinstance(self.posKeys, KeyArray):
+            self.posKeys = self.posKeys.to_keyframes()
+        if isinstance(self.rotKeys, KeyArray):
+            self.rotKeys = self.rotKeys.to_keyframes()
+        if isinstance(self.scaleKeys, KeyArray):
+            self.scaleKeys = self.scaleKeys.to_keyframes()
+
+    def to_arrays(self, dtype='f'):
+        """
+        Converts any KeyFrame list channels to KeyArray channels
+        """
+        self.posKeys = KeyArray.fromKeyFrames(self.posKeys, 3, dtype)
+        self.rotKeys = KeyArray.fromKeyFrames(self.rotKeys, 4, dtype)
+        self.scaleKeys = KeyArray.fromKeyFrames(self.scaleKeys, 3, dtype)
+
     def loadData(self, file, frame_t, precision_t,
                  useLoc=False, useRot=False, useScale=False):
+        records = key_records(frame_t, precision_t)
+
         # Read the flags for the bone
         bytes = file.read(1)
         data = struct.unpack("B", bytes)
@@ -247,13 +934,12 @@ class Bone(object):
         # Load the position keyframes if they are present
         if useLoc:
             bytes = file.read(frame_t.size)
-            data = struct.unpack('%c' % frame_t.char, bytes)
+            data = frame_t.struct.unpack(bytes)
             self.locKeyCount = data[0]
 
             for i in range(self.locKeyCount):
                 bytes = file.read(frame_t.size + 3 * precision_t.size)
-                data = struct.unpack('=%c3%c' %
-                                     (frame_t.char, precision_t.char), bytes)
+                data = records.vec3.unpack(bytes)
 
                 frame = data[0]
                 pos = (data[1], data[2], data[3])
@@ -263,14 +949,13 @@ class Bone(object):
         # Load the rotation keyframes if they are present
         if useRot:
             bytes = file.read(frame_t.size)
-            data = struct.unpack('%c' % frame_t.char, bytes)
+            data = frame_t.struct.unpack(bytes)
             self.rotKeyCount = data[0]
 
             for i in range(self.rotKeyCount):
 
                 bytes = file.read(frame_t.size + 4 * precision_t.size)
-                data = struct.unpack('=%c4%c' %
-                                     (frame_t.char, precision_t.char), bytes)
+                data = records.quat.unpack(bytes)
 
                 frame = data[0]
                 # Load the quaternion as XYZW
@@ -281,12 +966,11 @@ class Bone(object):
         # Load the Scale Keyrames
         if useScale:
             bytes = file.read(frame_t.size)
-            data = struct.unpack('%c' % frame_t.char, bytes)
+            data = frame_t.struct.unpack(bytes)
             self.scaleKeyCount = data[0]
             for i in range(self.scaleKeyCount):
                 bytes = file.read(frame_t.size + 3 * precision_t.size)
-                data = struct.unpack('=%c3%c' %
-                                     (frame_t.char, precision_t.char), bytes)
+                data = records.vec3.unpack(bytes)
 
                 frame = data[0]
                 scale = (data[1], data[2], data[3])
@@ -294,43 +978,48 @@ class Bone(object):
                 self.scaleKeys.append(KeyFrame(frame, scale))
 
     def save(self, file, frame_t, bone_t, precision_t,
-             useLoc=False, useRot=False, useScale=False):
-        bytes = struct.pack("B", self.flags)
-        file.write(bytes)
+             useLoc=False, useRot=False, useScale=False, spans=None):
+        file.write(self.pack(frame_t, precision_t, useLoc, useRot, useScale,
+                             spans))
+
+    def pack(self, frame_t, precision_t,
+             useLoc=False, useRot=False, useScale=False, spans=None):
+        """
+        Packs the bone's flags and key channels into a single buffer, each
+        channel is packed in bulk rather than one keyframe at a time. When
+        spans is given the time and size of each channel is added to its
+        phase
+        """
+        count_t = frame_t.struct
+        records = key_records(frame_t, precision_t)
+
+        buffer = [struct.pack("B", self.flags)]
+        if spans is not None:
+            offset = spans.offset + 1
 
         if useLoc:
-            bytes = struct.pack('%c' % frame_t.char, len(self.posKeys))
-            file.write(bytes)
-
-            for i, key in enumerate(self.posKeys):
-                bytes = struct.pack('=%c3%c' %
-                                    (frame_t.char, precision_t.char),
-                                    key.frame,
-                                    key.data[0], key.data[1], key.data[2])
-                file.write(bytes)
-
+            buffer.append(count_t.pack(len(self.posKeys)))
+            buffer.append(_pack_keys(self.posKeys, records.vec3,
+                                     records.vec3_dtype, 3))
+            if spans is not None:
+                offset += len(buffer[-2]) + len(buffer[-1])
+                spans.add('loc_keys', offset)
         if useRot:
-            bytes = struct.pack('%c' % frame_t.char, len(self.rotKeys))
-            file.write(bytes)
-
-            for i, key in enumerate(self.rotKeys):
-                bytes = struct.pack('=%c4%c' %
-                                    (frame_t.char, precision_t.char),
-                                    key.frame,
-                                    key.data[0], key.data[1],
-                                    key.data[2], key.data[3])
-                file.write(bytes)
-
+            buffer.append(count_t.pack(len(self.rotKeys)))
+            buffer.append(_pack_keys(self.rotKeys, records.quat,
+                                     records.quat_dtype, 4))
+            if spans is not None:
+                offset += len(buffer[-2]) + len(buffer[-1])
+                spans.add('rot_keys', offset)
         if useScale:
-            bytes = struct.pack('%c' % frame_t.char, len(self.scaleKeys))
-            file.write(bytes)
+            buffer.append(count_t.pack(len(self.scaleKeys)))
+            buffer.append(_pack_keys(self.scaleKeys, records.vec3,
+                                     records.vec3_dtype, 3))
+            if spans is not None:
+                offset += len(buffer[-2]) + len(buffer[-1])
+                spans.add('scale_keys', offset)
 
-            for i, key in enumerate(self.scaleKeys):
-                bytes = struct.pack('=%c3%c' %
-                                    (frame_t.char, precision_t.char),
-                                    key.frame,
-                                    key.data[0], key.data[1], key.data[2])
-                file.write(bytes)
+        return b''.join(buffer)
 
 
 class Note(object):
@@ -345,7 +1034,7 @@ class Note(object):
 
     def load(self, file, frame_t):
         bytes = file.read(frame_t.size)
-        data = struct.unpack('%c' % frame_t.char, bytes)
+        data = frame_t.struct.unpack(bytes)
 
         self.frame = data[0]
 
@@ -356,19 +1045,1337 @@ class Note(object):
             b = file.read(1)
         self.name = bytes.decode("utf-8")
 
+    def loadFromBuffer(self, buffer, offset, frame_t):
+        self.frame = frame_t.struct.unpack_from(buffer, offset)[0]
+        self.name, offset = _read_string(buffer, offset + frame_t.size)
+        return offset
+
     def save(self, file, frame_t):
-        bytes = struct.pack('%c' % frame_t.char, self.frame)
+        bytes = frame_t.struct.pack(self.frame)
         file.write(bytes)
 
         bytes = struct.pack('%ds' % (len(self.name) + 1), self.name.encode())
         file.write(bytes)
 
 
+class NoteIndex(object):
+    """
+    The notes of an animation kept sorted by frame, notes on the same frame
+    stay in the order they were added. Frames and names are stored in two
+    parallel lists, frames can be searched with bisect directly
+
+    It behaves like a list of Note objects, but the notes it hands out are
+    copies, editing one doesn't change the index. Slicing returns a list
+    of notes, and the list methods that would break the frame order keep
+    it instead, see insert and sort
+    """
+    __slots__ = ('frames', 'names', '_byName')
+
+    def __init__(self, notes=None):
+        self.frames = []
+        self.names = []
+        self._byName = None
+        if notes is not None:
+            self.extend(notes)
+
+    @classmethod
+    def from_pairs(cls, frames, names):
+        """
+        Builds an index from parallel lists of frames and names, sorting
+        them once
+        """
+        index = cls()
+        order = sorted(range(len(frames)), key=frames.__getitem__)
+        index.frames = [frames[i] for i in order]
+        index.names = [names[i] for i in order]
+        return index
+
+    @classmethod
+    def from_dict(cls, tracks):
+        """
+        Builds an index from a dict of name -> frame list, the way the Maya
+        plugin stores notetracks
+        """
+        frames = []
+        names = []
+        for name, trackFrames in tracks.items():
+            frames.extend(trackFrames)
+            names.extend([name] * len(trackFrames))
+        return cls.from_pairs(frames, names)
+
+    def to_dict(self):
+        """
+        Returns a dict of name -> sorted frame list
+        """
+        return dict([(name, list(frames))
+                     for name, frames in self._by_name().items()])
+
+    def _by_name(self):
+        if self._byName is None:
+            byName = {}
+            for frame, name in zip(self.frames, self.names):
+                byName.setdefault(name, []).append(frame)
+            self._byName = byName
+        return self._byName
+
+    def add(self, frame, name):
+        """
+        Inserts a note after any others on the same frame
+        """
+        index = bisect.bisect_right(self.frames, frame)
+        self.frames.insert(index, frame)
+        self.names.insert(index, name)
+        self._byName = None
+
+    def append(self, note):
+        self.add(note.frame, note.name)
+
+    def insert(self, index, note):
+        """
+        Adds note at its frame like append, index is ignored since the
+        notes are kept in frame order
+        """
+        self.add(note.frame, note.name)
+
+    def remove(self, note):
+        """
+        Removes the first note with the frame and name of note, raises
+        ValueError when there is none
+        """
+        lo = bisect.bisect_left(self.frames, note.frame)
+        hi = bisect.bisect_right(self.frames, note.frame)
+        for index in range(lo, hi):
+            if self.names[index] == note.name:
+                del self.frames[index]
+                del self.names[index]
+                self._byName = None
+                return
+        raise ValueError("No note '%s' on frame %d" % (note.name, note.frame))
+
+    def sort(self, key=None, reverse=False):
+        """
+        The notes always stay sorted by frame, key only orders the notes
+        that share a frame. Sorting in reverse isn't supported
+        """
+        if reverse:
+            raise ValueError("A NoteIndex is always sorted by ascending "
+                             "frame")
+        if key is None:
+            return
+        notes = sorted(self, key=lambda note: (note.frame, key(note)))
+        self.frames = [note.frame for note in notes]
+        self.names = [note.name for note in notes]
+        self._byName = None
+
+    def extend(self, notes):
+        """
+        Adds Note objects or (frame, name) pairs, sorting once
+        """
+        frames = list(self.frames)
+        names = list(self.names)
+        for note in notes:
+            if isinstance(note, Note):
+                frames.append(note.frame)
+                names.append(note.name)
+            else:
+                frames.append(note[0])
+                names.append(note[1])
+        other = NoteIndex.from_pairs(frames, names)
+        self.frames = other.frames
+        self.names = other.names
+        self._byName = None
+
+    def merge(self, other, offset=0):
+        """
+        Adds every note of another NoteIndex, moved by offset frames
+        """
+        self.extend([(frame + offset, name)
+                     for frame, name in zip(other.frames, other.names)])
+
+    def dedupe(self):
+        """
+        Removes notes with the same frame and name as an earlier one,
+        returns the number removed
+        """
+        seen = set()
+        frames = []
+        names = []
+        for frame, name in zip(self.frames, self.names):
+            if (frame, name) not in seen:
+                seen.add((frame, name))
+                frames.append(frame)
+                names.append(name)
+
+        removed = len(self.frames) - len(frames)
+        self.frames = frames
+        self.names = names
+        self._byName = None
+        return removed
+
+    def range(self, start, end):
+        """
+        Returns the (frame, name) pairs with start <= frame < end, in order
+        """
+        lo = bisect.bisect_left(self.frames, start)
+        hi = bisect.bisect_left(self.frames, end)
+        return list(zip(self.frames[lo:hi], self.names[lo:hi]))
+
+    def frames_of(self, name):
+        """
+        Returns the sorted frames of every note called name
+        """
+        return list(self._by_name().get(name, ()))
+
+    def track_names(self):
+        """
+        Returns the distinct note names
+        """
+        return list(self._by_name().keys())
+
+    def max_frame(self):
+        """
+        Returns the highest note frame, or -1 when there are no notes
+        """
+        return self.frames[-1] if self.frames else -1
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        for frame, name in zip(self.frames, self.names):
+            note = Note()
+            note.frame = frame
+            note.name = name
+            yield note
+
+    def __iadd__(self, notes):
+        self.extend(notes)
+        return self
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            notes = []
+            for frame, name in zip(self.frames[index], self.names[index]):
+                note = Note()
+                note.frame = frame
+                note.name = name
+                notes.append(note)
+            return notes
+        note = Note()
+        note.frame = self.frames[index]
+        note.name = self.names[index]
+        return note
+
+
+class CustomBlock(object):
+    """
+    The payload of a file's custom data block, stored after every other
+    block as a uint32 size followed by that many bytes
+
+    A loaded block only records the offset and size of its payload in the
+    buffer the file was parsed from, data views it in place the first time
+    it is used. A block to write wraps any bytes-like object, or streams
+    from a readable file-like source with from_stream
+    """
+    __slots__ = ('offset', 'size', '_buffer', '_stream', '_start')
+
+    def __init__(self, data=b''):
+        self._buffer = _as_buffer(data)
+        self.offset = 0
+        self.size = len(self._buffer)
+        self._stream = None
+        self._start = None
+
+    @classmethod
+    def from_buffer(cls, buffer, offset, size):
+        """
+        Returns a block for the size bytes at offset in buffer, nothing is
+        read or copied
+        """
+        block = cls()
+        block._buffer = buffer
+        block.offset = offset
+        block.size = size
+        return block
+
+    @classmethod
+    def from_stream(cls, stream, size=None):
+        """
+        Returns a block whose payload is size bytes read from stream when
+        the block is written, starting at the stream's current position.
+        Without a size the rest of the stream is used, which needs a
+        seekable stream. Seekable streams are rewound before every write
+        """
+        block = cls()
+        block._buffer = None
+        block._stream = stream
+        if stream.seekable():
+            block._start = stream.tell()
+        if size is None:
+            if block._start is None:
+                raise ValueError("The size of a custom block streamed from "
+                                 "an unseekable source has to be given")
+            size = stream.seek(0, 2) - block._start
+            stream.seek(block._start)
+        block.size = size
+        return block
+
+    @property
+    def data(self):
+        """
+        A memoryview of the payload, a streamed block is read into memory
+        the first time this is used
+        """
+        if self._buffer is None:
+            if self._start is not None:
+                self._stream.seek(self._start)
+            data = self._stream.read(self.size)
+            if len(data) != self.size:
+                raise ValueError("Custom block stream ended %d bytes early" %
+                                 (self.size - len(data)))
+            self._buffer = data
+            self._stream = None
+            self.offset = 0
+        return memoryview(self._buffer)[self.offset:self.offset + self.size]
+
+    def __len__(self):
+        return self.size
+
+    def save(self, file):
+        """
+        Writes the size and payload to file, a streamed payload is copied
+        over in chunks without ever being held in memory whole
+        """
+        file.write(struct.pack('=I', self.size))
+        if self._buffer is not None:
+            with self.data as view:
+                file.write(view)
+            return
+
+        if self._start is not None:
+            self._stream.seek(self._start)
+        remaining = self.size
+        while remaining:
+            chunk = self._stream.read(min(remaining, 1 << 20))
+            if not chunk:
+                raise ValueError("Custom block stream ended %d bytes early" %
+                                 remaining)
+            file.write(chunk)
+            remaining -= len(chunk)
+
+
+def _slerp_weights(cos_theta, t):
+    """
+    The (N,) weights of both ends of a slerp by the factors in t, given the
+    non negative cosines of the angles between the ends
+    """
+    theta = numpy.arccos(cos_theta)
+    sin_theta = numpy.sin(theta)
+    # Nearly parallel quaternions fall back to a linear blend
+    linear = sin_theta < 1e-6
+    sin_theta[linear] = 1.0
+
+    w0 = numpy.where(linear, 1.0 - t, numpy.sin((1.0 - t) * theta) / sin_theta)
+    w1 = numpy.where(linear, t, numpy.sin(t * theta) / sin_theta)
+    return w0, w1
+
+
+def _slerp(q0, q1, t):
+    """
+    Slerp between two arrays of (N, 4) quaternions by the (N,) factors in t
+    """
+    dot = numpy.einsum('ij,ij->i', q0, q1)
+    q1 = numpy.where((dot < 0)[:, None], -q1, q1)
+    w0, w1 = _slerp_weights(numpy.minimum(numpy.abs(dot), 1.0), t)
+    return w0[:, None] * q0 + w1[:, None] * q1
+
+
+def _normalize(quats):
+    length = numpy.sqrt(numpy.einsum('ij,ij->i', quats, quats))
+    length[length == 0] = 1.0
+    return quats / length[:, None]
+
+
+def _key_error(values, reference, rotation):
+    """
+    Per key error between two (N, W) arrays, the squared distance for
+    vectors, or 1 - |cos(angle / 2)| for normalized quaternions
+    """
+    if rotation:
+        return numpy.maximum(
+            1.0 - numpy.abs(numpy.einsum('ij,ij->i', values, reference)), 0.0)
+    delta = values - reference
+    return numpy.einsum('ij,ij->i', delta, delta)
+
+
+def _decimate(frames, data, link, keep, tolerance, rotation):
+    """
+    Finds the keys to keep so linear interpolation (slerp for rotations)
+    between them stays within tolerance of every original key, link marks
+    every key followed by the next key of its channel and the first key of
+    every segment found is set in keep
+
+    Works bottom up on segments aligned to powers of two over all channels
+    at once, each pass doubles their span and merges two neighbours when
+    both passed and every key between their outer ends stays within
+    tolerance of the chord.  The keys of a merged half stray from the chord
+    by at most their error on the half plus the error of the key joining
+    the halves, so most merges are settled from that one key and the rest
+    evaluate their keys
+    """
+    positions = frames.astype(numpy.float64)
+
+    alive = link
+    error = numpy.zeros(len(alive))
+    half = 1
+    while True:
+        count = len(alive) // 2
+        span = slice(0, 2 * count, 2), slice(1, 2 * count, 2)
+        # Two neighbours that both passed always share a channel
+        merged = alive[span[0]] & alive[span[1]]
+
+        if merged.any():
+            # Bound the error of the merged keys from the key joining the
+            # halves, every pair is evaluated at once through strided views
+            stop = 2 * half * count
+            joint = _chord_error(
+                positions, data, slice(half, stop, 2 * half),
+                slice(0, stop, 2 * half), slice(2 * half, stop + 1, 2 * half),
+                rotation)
+            worst = (numpy.sqrt(numpy.maximum(error[span[0]],
+                                              error[span[1]])) +
+                     numpy.sqrt(joint)) ** 2
+
+            # Evaluate every key of the merges the bound cannot settle, a
+            # joint key out of tolerance already settles them as failed
+            check = numpy.flatnonzero(merged & (worst > tolerance) &
+                                      (joint <= tolerance))
+            if len(check):
+                start = check[:, None] * (2 * half)
+                index = start + numpy.arange(1, 2 * half)
+                worst[check] = _chord_error(
+                    positions, data, index.ravel(),
+                    numpy.repeat(start, 2 * half - 1),
+                    numpy.repeat(start + 2 * half, 2 * half - 1),
+                    rotation).reshape(index.shape).max(axis=1)
+            merged &= worst <= tolerance
+
+        # Segments that did not merge are final
+        stay = alive.copy()
+        stay[span[0]] &= ~merged
+        stay[span[1]] &= ~merged
+        keep[numpy.flatnonzero(stay) * half] = True
+
+        if not merged.any():
+            return keep
+        alive, error = merged, worst
+        half *= 2
+
+
+def _chord_error(positions, data, index, lo, hi, rotation):
+    """
+    Error of the keys in index against linear interpolation (slerp for
+    rotations) between the keys lo and hi bounding each of them, given as
+    index arrays or matching strided slices
+    """
+    span = positions[hi] - positions[lo]
+    span[span == 0] = 1.0
+    t = (positions[index] - positions[lo]) / span
+    start, end, key = data[lo], data[hi], data[index]
+    if not rotation:
+        delta = (end - start) * t[:, None] + start - key
+        return numpy.einsum('ij,ij->i', delta, delta)
+
+    # The slerped quaternion is only ever dotted with the key, so the dot
+    # is blended from the dots of both ends instead of slerping
+    dot = numpy.einsum('ij,ij->i', start, end)
+    near = numpy.einsum('ij,ij->i', start, key)
+    far = numpy.einsum('ij,ij->i', end, key)
+    far = numpy.where(dot < 0, -far, far)
+    cos_theta = numpy.minimum(numpy.abs(dot), 1.0)
+
+    # Halfway keys, all of them on evenly spaced frames, weigh both ends by
+    # 1 / (2 cos(theta / 2)) which needs no trig
+    blend = (near + far) / numpy.sqrt(2.0 + 2.0 * cos_theta)
+    other = numpy.flatnonzero(t != 0.5)
+    if len(other):
+        w0, w1 = _slerp_weights(cos_theta[other], t[other])
+        blend[other] = w0 * near[other] + w1 * far[other]
+    return numpy.maximum(1.0 - numpy.abs(blend), 0.0)
+
+
+def _gather_channels(bones, attribute, width, least):
+    """
+    Collects the channels of one kind holding at least least keys, returns
+    the (bone, keys) pairs, their key counts, and the frames and float64
+    values of every channel concatenated. KeyFrame lists are converted
+    together in one pass rather than channel by channel
+    """
+    channels = []
+    for bone in bones:
+        keys = getattr(bone, attribute)
+        if len(keys) >= least:
+            channels.append((bone, keys))
+
+    if not channels:
+        return channels, None, None, None
+
+    counts = numpy.array([len(keys) for _, keys in channels])
+    lists = [keys for _, keys in channels if not isinstance(keys, KeyArray)]
+    if lists:
+        converted = KeyArray.fromKeyFrames(list(
+            itertools.chain.from_iterable(lists)), width, numpy.float64)
+        if len(lists) == len(channels):
+            return channels, counts, converted.frames, converted.data
+
+    pieces = []
+    offset = 0
+    for _, keys in channels:
+        if isinstance(keys, KeyArray):
+            pieces.append(keys)
+        else:
+            pieces.append(converted[offset:offset + len(keys)])
+            offset += len(keys)
+
+    frames = numpy.concatenate([piece.frames for piece in pieces])
+    data = numpy.concatenate([piece.data for piece in pieces],
+                             dtype=numpy.float64)
+    return channels, counts, frames, data
+
+
+def _last_key(bones):
+    """
+    Returns the frame of the latest last key of any channel, and that key
+    as (bone, attribute, key), or (-1, None) when there are no keys. Keys
+    are expected to be in frame order, so only the last of each is read
+    """
+    last_frame = -1
+    last_key = None
+    for bone in bones:
+        for attribute in ('posKeys', 'rotKeys', 'scaleKeys'):
+            keys = getattr(bone, attribute)
+            if len(keys) and keys[-1].frame > last_frame:
+                last_frame = keys[-1].frame
+                last_key = (bone, attribute, keys[-1])
+    return last_frame, last_key
+
+
+def _reduce_channels(bones, attribute, width, tolerance, rotation):
+    """
+    Reduces one channel across every bone in a single batch, channels are
+    concatenated so each decimation pass runs once over all of them
+    """
+    channels, counts, frames, data = _gather_channels(
+        bones, attribute, width, 2)
+    if not channels:
+        return 0
+
+    starts = numpy.concatenate(([0], numpy.cumsum(counts)[:-1]))
+    ends = starts + counts - 1
+
+    if rotation:
+        data = _normalize(data)
+
+    # Channels that never leave tolerance of their first key collapse to it
+    constant = numpy.maximum.reduceat(_key_error(
+        data, numpy.repeat(data[starts], counts, axis=0), rotation),
+        starts) <= tolerance
+
+    keep = numpy.zeros(len(frames), bool)
+    keep[starts] = True
+    keep[ends[~constant]] = True
+    link = numpy.repeat(~constant, counts)
+    link[ends] = False
+    keep = _decimate(frames, data, link[:-1], keep, tolerance, rotation)
+
+    removed = 0
+    for index, (bone, keys) in enumerate(channels):
+        mask = keep[starts[index]:ends[index] + 1]
+        if mask.all():
+            continue
+        removed += len(mask) - int(mask.sum())
+        if isinstance(keys, KeyArray):
+            setattr(bone, attribute, keys[numpy.flatnonzero(mask)])
+        else:
+            setattr(bone, attribute,
+                    [keys[i] for i in numpy.flatnonzero(mask).tolist()])
+
+    return removed
+
+
+def _resample_channels(bones, attribute, width, ratio, rotation):
+    """
+    Re-times one channel across every bone in a single batch, each channel
+    gets a key on every target frame between its first and last key moved
+    to the new rate, sampled from the concatenation of every channel with
+    one search
+    """
+    channels, counts, frames, data = _gather_channels(
+        bones, attribute, width, 1)
+    if not channels:
+        return
+
+    starts = numpy.concatenate(([0], numpy.cumsum(counts)[:-1]))
+    ends = starts + counts - 1
+
+    frames = frames.astype(numpy.float64)
+    if rotation:
+        data = _normalize(data)
+
+    # Target frames covered by each channel
+    first = numpy.rint(frames[starts] * ratio).astype(numpy.int64)
+    last = numpy.rint(frames[ends] * ratio).astype(numpy.int64)
+    sizes = last - first + 1
+    offsets = numpy.concatenate(([0], numpy.cumsum(sizes)[:-1]))
+    channel = numpy.repeat(numpy.arange(len(channels)), sizes)
+    targets = (numpy.repeat(first, sizes) +
+               numpy.arange(int(sizes.sum())) - numpy.repeat(offsets, sizes))
+
+    # Spread the channels apart on the frame axis, so one sorted search
+    # finds the key span of every target across all channels
+    stride = frames.max() + 2.0
+    keyed = frames + numpy.repeat(numpy.arange(len(channels)), counts) * stride
+    source = targets / ratio
+
+    lower = numpy.searchsorted(keyed, source + channel * stride,
+                               side='right') - 1
+    lower = numpy.clip(lower, starts[channel], ends[channel])
+    upper = numpy.minimum(lower + 1, ends[channel])
+
+    span = frames[upper] - frames[lower]
+    t = numpy.where(span > 0, (source - frames[lower]) /
+                    numpy.where(span > 0, span, 1.0), 0.0)
+    t = numpy.clip(t, 0.0, 1.0)
+
+    if rotation:
+        values = _slerp(data[lower], data[upper], t)
+    else:
+        values = data[lower] + (data[upper] - data[lower]) * t[:, None]
+
+    targets = targets.astype(numpy.uint32)
+    for index, (bone, keys) in enumerate(channels):
+        part = slice(offsets[index], offsets[index] + sizes[index])
+        if isinstance(keys, KeyArray):
+            result = KeyArray(targets[part],
+                              values[part].astype(keys.data.dtype))
+        else:
+            result = KeyArray(targets[part], values[part]).to_keyframes()
+        setattr(bone, attribute, result)
+
+
+def _lerp_key(a, b, t):
+    return tuple([x + (y - x) * t for x, y in zip(a, b)])
+
+
+def _slerp_key(a, b, t):
+    dot = sum([x * y for x, y in zip(a, b)])
+    if dot < 0:
+        b = [-y for y in b]
+        dot = -dot
+
+    theta = math.acos(min(dot, 1.0))
+    sin_theta = math.sin(theta)
+    if sin_theta < 1e-6:
+        return _lerp_key(a, b, t)
+
+    w0 = math.sin((1.0 - t) * theta) / sin_theta
+    w1 = math.sin(t * theta) / sin_theta
+    return tuple([x * w0 + y * w1 for x, y in zip(a, b)])
+
+
+def _sample_array(key_frames, data, frames, rotation):
+    """
+    Samples one channel at every frame in frames, frames outside the keyed
+    range hold the first or last key
+    """
+    last = len(key_frames) - 1
+    lower = numpy.clip(
+        numpy.searchsorted(key_frames, frames, side='right') - 1, 0, last)
+    upper = numpy.minimum(lower + 1, last)
+
+    span = key_frames[upper] - key_frames[lower]
+    t = numpy.where(span > 0, (frames - key_frames[lower]) /
+                    numpy.where(span > 0, span, 1.0), 0.0)
+    t = numpy.clip(t, 0.0, 1.0)
+
+    if rotation:
+        return _slerp(data[lower], data[upper], t)
+    return data[lower] + (data[upper] - data[lower]) * t[:, None]
+
+
+class _Channel(object):
+    """
+    The keys of one bone channel, with a cursor on the last span sampled
+    """
+    __slots__ = ('frames', 'values', 'cursor', 'rotation', '_arrays')
+
+    def __init__(self, keys, rotation):
+        if isinstance(keys, KeyArray):
+            self.frames = keys.frames.tolist()
+            self.values = [tuple(value) for value in keys.data.tolist()]
+        else:
+            self.frames = [key.frame for key in keys]
+            self.values = [tuple(key.data) for key in keys]
+        self.cursor = 0
+        self.rotation = rotation
+        self._arrays = None
+
+    def sample(self, frame):
+        frames = self.frames
+        if not frames:
+            return None
+
+        last = len(frames) - 1
+        cursor = self.cursor
+        # Playback stays in the current span or steps to the next one, only
+        # jumps fall back to a binary search
+        if not (frames[cursor] <= frame and
+                (cursor == last or frame < frames[cursor + 1])):
+            if (cursor + 2 <= last and frames[cursor + 1] <= frame and
+                    frame < frames[cursor + 2]):
+                cursor += 1
+            else:
+                cursor = max(bisect.bisect_right(frames, frame) - 1, 0)
+            self.cursor = cursor
+
+        if cursor == last or frame <= frames[cursor]:
+            return self.values[cursor]
+
+        t = float(frame - frames[cursor]) / (frames[cursor + 1] -
+                                             frames[cursor])
+        if self.rotation:
+            return _slerp_key(self.values[cursor],
+                              self.values[cursor + 1], t)
+        return _lerp_key(self.values[cursor], self.values[cursor + 1], t)
+
+    def sample_range(self, frames):
+        if self._arrays is None:
+            self._arrays = (numpy.array(self.frames, numpy.float64),
+                            numpy.array(self.values, numpy.float64))
+        key_frames, data = self._arrays
+        return _sample_array(key_frames, data, frames, self.rotation)
+
+
+BoneSample = collections.namedtuple('BoneSample', ('pos', 'rot', 'scale'))
+
+
+class Sampler(object):
+    """
+    Evaluates an animation at fractional frames, linearly interpolating
+    positions and scales and slerping rotations between keys. The keys are
+    copied when the sampler is created, later edits to the animation are
+    not seen
+
+    Each channel keeps a cursor on the span it last sampled, so sampling
+    frames in order costs O(1) per bone instead of a search
+    """
+    __slots__ = ('names', '_channels', '_sources')
+
+    def __init__(self, anim):
+        self.names = []
+        self._channels = []
+        # The bone and its edit count the channels were copied at
+        self._sources = []
+        self._refresh(anim)
+
+    def _refresh(self, anim):
+        """
+        Copies the keys of the bones that were added, replaced, or had a
+        channel assigned or appended to since the last refresh, the others
+        keep their copies and cursors. Edits made in place to a KeyFrame
+        list or its keys aren't seen
+        """
+        bones = anim.bones
+        channels = []
+        sources = []
+        for index, bone in enumerate(bones):
+            if index < len(self._sources):
+                old_bone, old_edits = self._sources[index]
+                if old_bone is bone and old_edits == bone._edits:
+                    channels.append(self._channels[index])
+                    sources.append(self._sources[index])
+                    continue
+            # Reading the keys can decode a lazy bone, which counts as edits
+            channels.append((_Channel(bone.posKeys, False),
+                             _Channel(bone.rotKeys, True),
+                             _Channel(bone.scaleKeys, False)))
+            sources.append((bone, bone._edits))
+
+        self.names = [bone.name for bone in bones]
+        self._channels = channels
+        self._sources = sources
+
+    def sample(self, frame):
+        """
+        Returns a BoneSample per bone, in bone order, holding the pos, rot
+        and scale tuples at frame, or None for channels without keys
+        """
+        return [BoneSample(pos.sample(frame), rot.sample(frame),
+                           scale.sample(frame))
+                for pos, rot, scale in self._channels]
+
+    def sample_range(self, frames):
+        """
+        Samples every bone at each frame in frames, returns the positions,
+        rotations and scales as (F, B, 3), (F, B, 4) and (F, B, 3) arrays,
+        channels without keys are left as NaN
+        """
+        _require_numpy()
+
+        frames = numpy.asarray(frames, numpy.float64).ravel()
+        shape = (len(frames), len(self._channels))
+        positions = numpy.full(shape + (3,), numpy.nan)
+        rotations = numpy.full(shape + (4,), numpy.nan)
+        scales = numpy.full(shape + (3,), numpy.nan)
+
+        for index, channels in enumerate(self._channels):
+            for channel, result in zip(channels,
+                                       (positions, rotations, scales)):
+                if channel.frames:
+                    result[:, index] = channel.sample_range(frames)
+
+        return positions, rotations, scales
+
+
+def _frame_count(anim):
+    """
+    The length of an animation in frames, the larger of its header's
+    frame count and the one its keys and notes work out to
+    """
+    frames = [bone.max_frame() for bone in anim.bones]
+    frames.append(anim.notes.max_frame())
+    return max(anim.header.frameCount, max(frames) + 1)
+
+
+def _channel_arrays(keys, width):
+    """
+    Returns a channel's frames and values as int64 and float64 arrays
+    """
+    keys = KeyArray.fromKeyFrames(keys, width, numpy.float64)
+    return (keys.frames.astype(numpy.int64),
+            numpy.asarray(keys.data, numpy.float64))
+
+
+def _place_channel(pieces, frames, data, start, end, rotation):
+    """
+    Appends a channel, already offset to its place in the assembly, to the
+    list of (frames, data) pieces of a track. Frames start through end are
+    cross faded from the keys already in pieces into the new channel, the
+    earlier keys from start on are replaced
+    """
+    if not pieces or end < start:
+        pieces.append((frames, data))
+        return
+
+    # Pull back every piece that could hold keys from start on, plus the
+    # one before it so the fade can interpolate into start
+    popped = [pieces.pop()]
+    while pieces and popped[-1][0][0] >= start:
+        popped.append(pieces.pop())
+    popped.reverse()
+    prevFrames = numpy.concatenate([piece[0] for piece in popped])
+    prevData = numpy.concatenate([piece[1] for piece in popped])
+
+    fade = numpy.arange(start, end + 1)
+    weight = (fade - start + 1) / float(end - start + 2)
+    old = _sample_array(prevFrames, prevData, fade, rotation)
+    new = _sample_array(frames, data, fade, rotation)
+    if rotation:
+        blended = _slerp(old, new, weight)
+    else:
+        blended = old + (new - old) * weight[:, None]
+
+    # A channel can run out of keys before start or after end, empty
+    # pieces are left out so the next pull back always sees a first frame
+    before = prevFrames < start
+    after = frames > end
+    pieces.extend([piece for piece in ((prevFrames[before], prevData[before]),
+                                       (fade, blended),
+                                       (frames[after], data[after]))
+                   if len(piece[0])])
+
+
+def concatenate(anims, blend=0):
+    """
+    Joins animations end to end into a new Anim, each clip starting on the
+    frame after the previous one ends. Bones are matched by name and the
+    result holds the union of every clip's bones, in order of first use,
+    and every clip's notes moved along with it
+
+    When blend is above zero consecutive clips overlap by that many frames,
+    over which positions and scales are linearly cross faded and rotations
+    slerped from one clip into the next, with a key on every frame of the
+    overlap. Channels are returned as KeyArrays
+    """
+    _require_numpy()
+
+    anims = list(anims)
+    if not anims:
+        raise ValueError("At least one animation is required")
+    if blend < 0:
+        raise ValueError("blend can't be negative")
+
+    result = Anim()
+    first = anims[0].header
+    result.header.animType = first.animType
+    result.header.animFlags = first.animFlags
+    result.header.framerate = first.framerate
+
+    tracks = collections.OrderedDict()
+    modifiers = {}
+    channels = (('posKeys', 3, False), ('rotKeys', 4, True),
+                ('scaleKeys', 3, False))
+
+    start = 0
+    for index, anim in enumerate(anims):
+        length = _frame_count(anim)
+        if index and blend >= length:
+            raise ValueError("blend of %d frames is longer than clip %d" %
+                             (blend, index))
+        if (anim.header.dataPropertyFlags &
+                SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH):
+            result.header.dataPropertyFlags |= \
+                SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH
+
+        fadeEnd = start + blend - 1 if index else start - 1
+        for bone in anim.bones:
+            pieces = tracks.get(bone.name)
+            if pieces is None:
+                pieces = tracks[bone.name] = ([], [], [])
+            if bone.useModifier:
+                modifiers.setdefault(bone.name, bone.modifier)
+
+            for track, (attribute, width, rotation) in zip(pieces, channels):
+                keys = getattr(bone, attribute)
+                if not len(keys):
+                    continue
+                frames, data = _channel_arrays(keys, width)
+                _place_channel(track, frames + start, data,
+                               start, fadeEnd, rotation)
+
+        result.notes.merge(anim.notes, start)
+
+        start += length - blend
+
+    dtype = 'f'
+    if (result.header.dataPropertyFlags &
+            SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH):
+        dtype = 'd'
+
+    for name, pieces in tracks.items():
+        bone = Bone()
+        bone.name = name
+        if name in modifiers:
+            bone.useModifier = True
+            bone.modifier = modifiers[name]
+            result.boneAnimModifiers.append(bone)
+
+        for track, (attribute, width, rotation) in zip(pieces, channels):
+            track = [piece for piece in track if len(piece[0])]
+            if not track:
+                setattr(bone, attribute, KeyArray.empty(width, dtype))
+                continue
+            setattr(bone, attribute, KeyArray(
+                numpy.concatenate([piece[0] for piece in track]).astype(
+                    numpy.uint32),
+                numpy.concatenate([piece[1] for piece in track]).astype(
+                    dtype)))
+
+        result.bones.append(bone)
+
+    result.update_metadata()
+    result.header.frameCount = max(result.header.frameCount, start + blend)
+    return result
+
+
+def _trim(anim, start, end):
+    """
+    Returns a new Anim holding frames start up to, but not including, end
+    moved to start at frame 0. Every channel gets a key sampled on the first
+    and last frame kept, so the motion at the cuts is unchanged
+    """
+    result = Anim()
+    result.header.animType = anim.header.animType
+    result.header.animFlags = anim.header.animFlags
+    result.header.dataPropertyFlags = anim.header.dataPropertyFlags
+    result.header.framerate = anim.header.framerate
+
+    for bone in anim.bones:
+        copy = Bone()
+        copy.name = bone.name
+        copy.useModifier = bone.useModifier
+        copy.modifier = bone.modifier
+        if copy.useModifier:
+            result.boneAnimModifiers.append(copy)
+
+        for attribute, width, rotation in (('posKeys', 3, False),
+                                           ('rotKeys', 4, True),
+                                           ('scaleKeys', 3, False)):
+            keys = getattr(bone, attribute)
+            if not len(keys):
+                setattr(copy, attribute, [])
+                continue
+            frames, data = _channel_arrays(keys, width)
+            kept = numpy.union1d(
+                frames[(frames >= start) & (frames < end)], [start, end - 1])
+            setattr(copy, attribute, KeyArray(
+                (kept - start).astype(numpy.uint32),
+                _sample_array(frames, data, kept, rotation)))
+
+        result.bones.append(copy)
+
+    result.notes.extend([(frame - start, name)
+                         for frame, name in anim.notes.range(start, end)])
+
+    result.header.frameCount = end - start
+    return result
+
+
+def splice(anim, clip, frame, blend=0):
+    """
+    Inserts clip into anim at frame, returning a new Anim where the frames
+    of anim from frame on follow after the clip. When blend is above zero
+    the clip is cross faded in and out over that many frames on each side,
+    see concatenate
+    """
+    _require_numpy()
+
+    length = _frame_count(anim)
+    if not 0 <= frame <= length:
+        raise ValueError("Frame %d is outside the %d frames of the anim" %
+                         (frame, length))
+
+    parts = [clip]
+    if frame > 0:
+        parts.insert(0, _trim(anim, 0, frame))
+    if frame < length:
+        parts.append(_trim(anim, frame, length))
+    return concatenate(parts, blend)
+
+
+def _strip_namespace(name):
+    return name.rpartition(':')[2]
+
+
+# Bumped whenever a seanim or semodel bone is renamed, so name indexes know
+# to rebuild without checking the bones on every lookup
+_RENAMES = [0]
+
+
+class _NameIndex(object):
+    """
+    A name -> index map over a list of bones, with a second map keyed by
+    the namespace stripped names that is only built once first needed.
+    Both are rebuilt when the list is replaced or resized or any bone is
+    renamed, so hits and misses alike cost a dict lookup. A hit that lands
+    on a bone of another name, after bones were moved around in place,
+    rebuilds the maps too. semodel shares this class
+    """
+    __slots__ = ('stamp', 'names', 'stripped')
+
+    def __init__(self):
+        self.stamp = None
+        self.names = None
+        self.stripped = None
+
+    def _build(self, bones):
+        names = {}
+        for index, bone in enumerate(bones):
+            names.setdefault(bone.name, index)
+        self.names = names
+        self.stripped = None
+        self.stamp = (id(bones), len(bones), _RENAMES[0])
+
+    def _build_stripped(self, bones):
+        # Names shared by several namespaces map to None, like the plugin
+        # skipping joints it finds more than once
+        stripped = {}
+        for index, bone in enumerate(bones):
+            name = _strip_namespace(bone.name)
+            stripped[name] = None if name in stripped else index
+        self.stripped = stripped
+
+    def find(self, bones, name, any_namespace=False):
+        if self.stamp != (id(bones), len(bones), _RENAMES[0]):
+            self._build(bones)
+
+        index = self._lookup(bones, name, False)
+        if index >= 0 or not any_namespace:
+            return index
+        return self._lookup(bones, _strip_namespace(name), True)
+
+    def _lookup(self, bones, name, stripped):
+        """
+        Looks name up in one of the maps, returns the index or -1
+        """
+        for _ in range(2):
+            if stripped and self.stripped is None:
+                self._build_stripped(bones)
+            index = (self.stripped if stripped else self.names).get(name)
+            if index is None:
+                return -1
+
+            found = bones[index].name
+            if stripped:
+                found = _strip_namespace(found)
+            if found == name:
+                return index
+            # The bone was moved or swapped for another in place
+            self._build(bones)
+        return -1
+
+
+def _quat_multiply(a, b):
+    """
+    Multiplies two arrays of (N, 4) XYZW quaternions the way Maya's
+    MQuaternion does, a * b rotates by a and then by b
+    """
+    ax, ay, az, aw = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+    bx, by, bz, bw = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+    return numpy.stack((bw * ax + bx * aw + by * az - bz * ay,
+                        bw * ay + by * aw + bz * ax - bx * az,
+                        bw * az + bz * aw + bx * ay - by * ax,
+                        bw * aw - bx * ax - by * ay - bz * az), axis=1)
+
+
+def _resolve_bone_types(anim, model):
+    """
+    Returns the SEANIM_TYPE of each bone in anim, the way the Maya importer
+    picks it, a bone takes the modifier of its outermost ancestor in the
+    model that has one, otherwise the header's type. Each model bone is
+    resolved once, however deep the hierarchy
+    """
+    modifiers = {}
+    for bone in anim.bones:
+        if bone.useModifier:
+            modifiers.setdefault(_strip_namespace(bone.name), bone.modifier)
+
+    def passed_down(index):
+        # The type a model bone hands to its children
+        if inherited[index] is not None:
+            return inherited[index]
+        return modifiers.get(_strip_namespace(model.bones[index].name))
+
+    parents = [bone.boneParent for bone in model.bones]
+    # The type inherited from above each model bone, False until resolved
+    inherited = [False] * len(parents)
+    for bone in range(len(parents)):
+        # Walk up to the nearest resolved ancestor, then fill the chain in
+        # on the way back down
+        chain = []
+        index = bone
+        while index >= 0 and inherited[index] is False:
+            chain.append(index)
+            index = parents[index]
+            if len(chain) > len(parents):
+                raise ValueError("The model's bone hierarchy has a cycle")
+
+        above = None if index < 0 else passed_down(index)
+        for index in reversed(chain):
+            inherited[index] = above
+            above = passed_down(index)
+
+    types = []
+    for bone in anim.bones:
+        index = model.bone_index(bone.name, any_namespace=True)
+        animType = None if index < 0 else inherited[index]
+        types.append(anim.header.animType if animType is None else animType)
+    return types
+
+
+AnimSummary = collections.namedtuple('AnimSummary', (
+    'animType', 'animFlags',
+    'dataPresenceFlags', 'dataPropertyFlags',
+    'framerate', 'frameCount',
+    'boneCount', 'boneAnimModifierCount', 'noteCount',
+    'boneNames', 'notes'
+))
+
+
+def probe(path):
+    """
+    Reads only the header, bone names and notes of the seanim at path, key
+    blocks are skipped using the sizes computed from their counts
+
+    Returns an AnimSummary, where boneNames is a tuple of names and notes
+    is a tuple of (frame, name) pairs
+    """
+    buffer = _map_file(path)
+
+    offset = Info().loadFromBuffer(buffer)
+    header = Header()
+    offset = header.loadFromBuffer(buffer, offset)
+
+    frame_t = Frame_t(header)
+    bone_t = Bone_t(header)
+    precision_t = Precision_t(header)
+
+    dataPresenceFlags = header.dataPresenceFlags
+
+    boneNames = []
+    if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_BONE:
+        useLoc = dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_BONE_LOC
+        useRot = dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_BONE_ROT
+        useScale = dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_BONE_SCALE
+
+        for i in range(header.boneCount):
+            name, offset = _read_string(buffer, offset)
+            boneNames.append(name)
+
+        offset += header.boneAnimModifierCount * (bone_t.size + 1)
+
+        # Notes come after the key blocks, so walk the counts to find them
+        if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE:
+            for i in range(header.boneCount):
+                offset = _scan_bone_data(buffer, offset, frame_t, precision_t,
+                                         useLoc, useRot, useScale)[4]
+
+    notes = []
+    if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE:
+        for i in range(header.noteCount):
+            frame = frame_t.struct.unpack_from(buffer, offset)[0]
+            name, offset = _read_string(buffer, offset + frame_t.size)
+            notes.append((frame, name))
+
+    return AnimSummary(header.animType, header.animFlags,
+                       header.dataPresenceFlags, header.dataPropertyFlags,
+                       header.framerate, header.frameCount,
+                       header.boneCount, header.boneAnimModifierCount,
+                       header.noteCount, tuple(boneNames), tuple(notes))
+
+
+def _truncated(buffer, offset, size, what):
+    return ValueError("Truncated %s at offset %d, needs %d bytes but only "
+                      "%d remain" % (what, offset, size,
+                                     max(len(buffer) - offset, 0)))
+
+
+def _skip_string(buffer, offset, what, index):
+    """
+    Returns the offset just past the null terminated string at offset,
+    raises ValueError when it isn't terminated or isn't valid UTF-8
+    """
+    end = _find_null(buffer, offset) if offset < len(buffer) else -1
+    if end < 0:
+        raise ValueError("Unterminated name of %s %d at offset %d" %
+                         (what, index, offset))
+    try:
+        bytes(buffer[offset:end]).decode("utf-8")
+    except UnicodeDecodeError as error:
+        raise ValueError("Name of %s %d at offset %d is not valid UTF-8, %s"
+                         % (what, index, offset, error.reason))
+    return end + 1
+
+
+def validate(path):
+    """
+    Checks the structure of the seanim at path without decoding it, only
+    the header, counts and modifiers are read and every block is skipped
+    by its computed size, no bones, keys or notes are built. Bone and note
+    names must be valid UTF-8
+
+    Raises ValueError describing the first problem found
+    """
+    buffer = _map_file(path)
+    size = len(buffer)
+
+    if size < 10:
+        raise _truncated(buffer, 0, 10, "file info")
+    magic, version = struct.unpack_from('=6sh', buffer, 0)
+    if magic != b'SEAnim':
+        raise ValueError("Not a seanim file, bad magic %r" % magic)
+    if version != 1:
+        raise ValueError("Unsupported seanim version %d" % version)
+
+    headerSize = struct.unpack_from('h', buffer, 8)[0]
+    if headerSize < 28:
+        raise ValueError("Header size %d is smaller than 28" % headerSize)
+    if 8 + headerSize > size:
+        raise _truncated(buffer, 8, headerSize, "header")
+
+    header = Header()
+    offset = header.loadFromBuffer(buffer, 8)
+    if header.animType > SEANIM_TYPE.SEANIM_TYPE_DELTA:
+        raise ValueError("Unknown anim type %d" % header.animType)
+
+    frame_t = Frame_t(header)
+    bone_t = Bone_t(header)
+    precision_t = Precision_t(header)
+
+    dataPresenceFlags = header.dataPresenceFlags
+
+    if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_BONE:
+        for i in range(header.boneCount):
+            offset = _skip_string(buffer, offset, "bone", i)
+
+        modifier_size = bone_t.size + 1
+        if offset + header.boneAnimModifierCount * modifier_size > size:
+            raise _truncated(buffer, offset,
+                             header.boneAnimModifierCount * modifier_size,
+                             "bone modifiers")
+        unpack_modifier = bone_t.modifier.unpack_from
+        for i in range(header.boneAnimModifierCount):
+            index, animType = unpack_modifier(buffer, offset)
+            if index >= header.boneCount:
+                raise ValueError("Modifier %d at offset %d names bone %d of "
+                                 "%d" % (i, offset, index, header.boneCount))
+            if animType > SEANIM_TYPE.SEANIM_TYPE_DELTA:
+                raise ValueError("Modifier %d at offset %d has unknown anim "
+                                 "type %d" % (i, offset, animType))
+            offset += modifier_size
+
+        key_sizes = []
+        if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_BONE_LOC:
+            key_sizes.append(frame_t.size + 3 * precision_t.size)
+        if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_BONE_ROT:
+            key_sizes.append(frame_t.size + 4 * precision_t.size)
+        if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_BONE_SCALE:
+            key_sizes.append(frame_t.size + 3 * precision_t.size)
+
+        # Each bone is a flags byte then a count and keys per channel
+        unpack_count = frame_t.struct.unpack_from
+        for i in range(header.boneCount):
+            offset += 1
+            for key_size in key_sizes:
+                if offset + frame_t.size > size:
+                    raise _truncated(buffer, offset, frame_t.size,
+                                     "key count of bone %d" % i)
+                count = unpack_count(buffer, offset)[0]
+                offset += frame_t.size + count * key_size
+                if offset > size:
+                    raise ValueError("Bone %d declares %d keys of %d bytes, "
+                                     "past the end of the file" %
+                                     (i, count, key_size))
+            if offset > size:
+                raise _truncated(buffer, offset - 1, 1, "flags of bone %d" % i)
+
+    if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE:
+        for i in range(header.noteCount):
+            if offset + frame_t.size > size:
+                raise _truncated(buffer, offset, frame_t.size,
+                                 "frame of note %d" % i)
+            offset = _skip_string(buffer, offset + frame_t.size, "note", i)
+
+    if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_CUSTOM:
+        if offset + 4 > size:
+            raise _truncated(buffer, offset, 4, "custom block size")
+        customSize = struct.unpack_from('=I', buffer, offset)[0]
+        if offset + 4 + customSize > size:
+            raise _truncated(buffer, offset + 4, customSize, "custom block")
+        offset += 4 + customSize
+
+    if offset != size:
+        raise ValueError("%d unexpected bytes after offset %d" %
+                         (size - offset, offset))
+
+
 class Anim(object):
     __slots__ = ('__info', 'info', 'header', 'bones',
-                 'boneAnimModifiers', 'notes')
+                 'boneAnimModifiers', '_notes', 'custom', '_boneIndex',
+                 '_sampler')
 
-    def __init__(self, path=None):
+    def __init__(self, path=None, use_arrays=False, lazy=False,
+                 instrument=None):
         self.__info = Info()
         self.header = Header()
 
@@ -376,11 +2383,64 @@ class Anim(object):
         self.boneAnimModifiers = []
         self.notes = []
 
+        # The CustomBlock written after the notes, if any
+        self.custom = None
+
+        self._boneIndex = _NameIndex()
+
+        # The Sampler behind sample and sample_range, built on first use
+        self._sampler = None
+
         if path is not None:
-            self.load(path)
+            self.load(path, use_arrays, lazy, instrument)
+
+    @property
+    def notes(self):
+        """
+        The animation's NoteIndex, a list of Note objects or (frame, name)
+        pairs assigned here is converted to one
+        """
+        return self._notes
+
+    @notes.setter
+    def notes(self, notes):
+        if not isinstance(notes, NoteIndex):
+            notes = NoteIndex(notes)
+        self._notes = notes
+
+    def bone_index(self, name, any_namespace=False):
+        """
+        Returns the index of the first bone named name, or -1. When
+        any_namespace is set and there is no exact match, a bone whose name
+        matches once namespaces are stripped from both is used, as long as
+        only one bone matches
+
+        Lookups go through name maps that are built on first use and
+        rebuilt by themselves once bones are added, removed or renamed, or
+        the list is replaced. Reordering bones is noticed on the next hit.
+        A bone named before the maps were built that is then put in the
+        list in place of another isn't, call invalidate_bone_index after
+        """
+        return self._boneIndex.find(self.bones, name, any_namespace)
+
+    def get_bone(self, name, any_namespace=False):
+        """
+        Returns the bone for name, or None, see bone_index
+        """
+        index = self._boneIndex.find(self.bones, name, any_namespace)
+        if index < 0:
+            return None
+        return self.bones[index]
+
+    def invalidate_bone_index(self):
+        """
+        Drops the name map used by bone_index and get_bone
+        """
+        self._boneIndex = _NameIndex()
 
     # Update the header flags based on the presence of certain keyframe /
-    # notetrack data
+    # notetrack data, each bone's max frame comes from its running value
+    # unless its keys were modified directly
     def update_metadata(self, high_precision=False, looping=False):
         anim_locKeyCount = 0
         anim_rotKeyCount = 0
@@ -388,6 +2448,8 @@ class Anim(object):
 
         header = self.header
         header.boneCount = len(self.bones)
+        header.boneAnimModifierCount = sum(
+            1 for bone in self.bones if bone.useModifier)
 
         dataPresenceFlags = header.dataPresenceFlags
         dataPropertyFlags = header.dataPropertyFlags
@@ -403,14 +2465,7 @@ class Anim(object):
             anim_rotKeyCount += bone.rotKeyCount
             anim_scaleKeyCount += bone.scaleKeyCount
 
-            for key in bone.posKeys:
-                max_frame_index = max(max_frame_index, key.frame)
-
-            for key in bone.rotKeys:
-                max_frame_index = max(max_frame_index, key.frame)
-
-            for key in bone.scaleKeys:
-                max_frame_index = max(max_frame_index, key.frame)
+            max_frame_index = max(max_frame_index, bone.max_frame())
 
         if anim_locKeyCount:
             dataPresenceFlags |= SEANIM_PRESENCE_FLAGS.SEANIM_BONE_LOC
@@ -419,14 +2474,18 @@ class Anim(object):
         if anim_scaleKeyCount:
             dataPresenceFlags |= SEANIM_PRESENCE_FLAGS.SEANIM_BONE_SCALE
 
-        for note in self.notes:
-            max_frame_index = max(max_frame_index, note.frame)
+        max_frame_index = max(max_frame_index, self.notes.max_frame())
 
         header.noteCount = len(self.notes)
 
         if header.noteCount:
             dataPresenceFlags |= SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE
 
+        if self.custom is not None:
+            dataPresenceFlags |= SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_CUSTOM
+        else:
+            dataPresenceFlags &= ~SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_CUSTOM
+
         if high_precision:
             dataPropertyFlags |= SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH
 
@@ -441,21 +2500,113 @@ class Anim(object):
         # the max frame number (from keys / notes / etc.) and add 1 to it
         header.frameCount = max_frame_index + 1
 
-    def load(self, path):
+    def load(self, path, use_arrays=False, lazy=False, instrument=None):
+        """
+        Loads the animation from path, when use_arrays is set every bone
+        channel is decoded into a numpy backed KeyArray instead of a list
+        of KeyFrame objects
+
+        When lazy is set the file is memory mapped and only the bone names,
+        modifiers, key counts and notes are read up front, each bone's keys
+        are decoded the first time one of its channels is accessed. A
+        custom block is never decoded, custom views it in the loaded
+        buffer, so with lazy set it isn't read from disk until used. save
+        decodes the pending bones and copies the custom block out of the
+        mapping first, so a lazily loaded file can be saved over
+
+        When instrument is given it is called as instrument(phase, seconds,
+        size) for the 'read', 'header', 'bone_names', 'modifiers',
+        'loc_keys', 'rot_keys', 'scale_keys' (or 'key_scan' when lazy),
+        'notes' and 'custom' phases, then once for 'total' with the file
+        size
+        """
+        if use_arrays:
+            _require_numpy()
+
         if LOG_READ_TIME:
-            time_start = time.time()
             print("Loading: '%s'" % path)
+            if instrument is None:
+                instrument = _print_span
+
+        spans = None
+        if instrument is not None:
+            spans = _Spans(instrument)
 
+        # Read the whole file up front, everything below decodes out of
+        # this buffer with unpack_from instead of issuing small reads, lazy
+        # loads map the file instead so untouched key blocks are never read
         try:
-            file = open(path, "rb")
-        except IOError:
+            if lazy:
+                buffer = _map_file(path)
+            else:
+                with open(path, "rb") as file:
+                    buffer = file.read()
+        except (IOError, OSError):
             print("Could not open file for reading:\n %s" % path)
             return
 
-        self.info = Info(file)
-        self.header = Header(file)
+        if spans is not None:
+            spans.mark('read', 0, len(buffer))
+
+        self._parse(buffer, use_arrays, lazy, spans)
+
+    def loadFromBuffer(self, buffer, use_arrays=False, lazy=False,
+                       instrument=None):
+        """
+        Loads the animation from an in memory buffer, anything supporting
+        the buffer protocol works and it is read in place without being
+        copied. When lazy is set the buffer is kept and bone keys are
+        decoded out of it on first access. Takes the same instrument as
+        load, less the 'read' phase
+        """
+        if use_arrays:
+            _require_numpy()
+
+        spans = None
+        if instrument is not None:
+            spans = _Spans(instrument)
+
+        self._parse(_as_buffer(buffer), use_arrays, lazy, spans)
+
+    @classmethod
+    def from_bytes(cls, data, use_arrays=False, lazy=False, instrument=None):
+        """
+        Returns a new Anim parsed from bytes or bytearray data
+        """
+        anim = cls()
+        anim.loadFromBuffer(data, use_arrays, lazy, instrument)
+        return anim
+
+    @classmethod
+    def from_buffer(cls, buffer, use_arrays=False, lazy=False,
+                    instrument=None):
+        """
+        Returns a new Anim parsed in place from a memoryview, mmap or any
+        other object supporting the buffer protocol
+        """
+        anim = cls()
+        anim.loadFromBuffer(buffer, use_arrays, lazy, instrument)
+        return anim
+
+    @classmethod
+    def from_stream(cls, stream, use_arrays=False, lazy=False,
+                    instrument=None):
+        """
+        Returns a new Anim parsed from the rest of a readable binary
+        stream, such as an open file or io.BytesIO
+        """
+        return cls.from_bytes(stream.read(), use_arrays, lazy, instrument)
+
+    def _parse(self, buffer, use_arrays=False, lazy=False, spans=None):
+        self.info = Info()
+        offset = self.info.loadFromBuffer(buffer)
+        self.header = Header()
+        offset = self.header.loadFromBuffer(buffer, offset)
         self.boneAnimModifiers = []
 
+        if spans is not None:
+            spans.mark('header', offset)
+
         # Init the frame_t, bone_t and precision_t info
         frame_t = Frame_t(self.header)
         bone_t = Bone_t(self.header)
@@ -490,14 +2641,19 @@ class Anim(object):
             for i in range(self.header.boneCount):
                 if LOG_ANIM_BONES:
                     print("Loading Name for Bone[%d]" % i)
-                self.bones.append(Bone(file))
+                bone = Bone()
+                offset = bone.loadFromBuffer(buffer, offset)
+                self.bones.append(bone)
 
+            if spans is not None:
+                spans.mark('bone_names', offset)
+
+            modifier_t = bone_t.modifier
             for i in range(self.header.boneAnimModifierCount):
-                bytes = file.read(bone_t.size + 1)
-                data = struct.unpack("%cB" % bone_t.char, bytes)
-                index = data[0]
+                index, modifier = modifier_t.unpack_from(buffer, offset)
+                offset += modifier_t.size
                 self.bones[index].useModifier = True
-                self.bones[index].modifier = data[1]
+                self.bones[index].modifier = modifier
 
                 self.boneAnimModifiers.append(self.bones[index])
 
@@ -505,12 +2661,24 @@ class Anim(object):
                     print("Loaded Modifier %d for '%s" %
                           (index, self.bones[index].name))
 
+            if spans is not None:
+                spans.mark('modifiers', offset)
+
             for i in range(self.header.boneCount):
+                if lazy:
+                    offset = self.bones[i].scanFromBuffer(
+                        buffer, offset, frame_t, precision_t,
+                        useLoc, useRot, useScale, use_arrays)
+                    if spans is not None:
+                        spans.add('key_scan', offset)
+                    continue
+
                 if LOG_ANIM_BONES:
                     print("Loading Data For Bone[%d] '%s'" % (
                         i, self.bones[i].name))
-                self.bones[i].loadData(
-                    file, frame_t, precision_t, useLoc, useRot, useScale)
+                offset = self.bones[i].loadDataFromBuffer(
+                    buffer, offset, frame_t, precision_t,
+                    useLoc, useRot, useScale, use_arrays, spans)
                 if LOG_ANIM_BONES_KEYS:
                     for key in self.bones[i].posKeys:
                         print("%s LOC %d %s" %
@@ -522,27 +2690,298 @@ class Anim(object):
                         print("%s SCALE %d %s" %
                               (self.bones[i].name, key.frame, key.data))
 
-        self.notes = []
+        frames = []
+        names = []
         if (self.header.dataPresenceFlags &
                 SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE):
+            unpack_frame = frame_t.struct.unpack_from
             for i in range(self.header.noteCount):
-                note = Note(file, frame_t)
-                self.notes.append(note)
+                frame = unpack_frame(buffer, offset)[0]
+                name, offset = _read_string(buffer, offset + frame_t.size)
+                frames.append(frame)
+                names.append(name)
                 if LOG_ANIM_NOTES:
                     print("Loaded Note[%d]:" % i)
-                    print("  Frame %d: %s" % (note.frame, note.name))
+                    print("  Frame %d: %s" % (frame, name))
+        self.notes = NoteIndex.from_pairs(frames, names)
 
-        file.close()
+        if spans is not None:
+            spans.flush()
+            spans.mark('notes', offset)
 
-        if LOG_READ_TIME:
-            time_end = time.time()
-            time_elapsed = time_end - time_start
-            print("Done! - Completed in %ss" % time_elapsed)
+        # The custom payload is left where it is, only its extent is kept
+        self.custom = None
+        if (self.header.dataPresenceFlags &
+                SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_CUSTOM):
+            size = struct.unpack_from('=I', buffer, offset)[0]
+            offset += 4
+            if offset + size > len(buffer):
+                raise ValueError("Truncated custom block at offset %d" %
+                                 offset)
+            self.custom = CustomBlock.from_buffer(buffer, offset, size)
+            offset += size
+            if spans is not None:
+                spans.mark('custom', offset)
+
+        if spans is not None:
+            spans.total(len(buffer))
+
+        return offset
+
+    def reduce(self, pos_tol=0.001, rot_tol_deg=0.01, scale_tol=0.0001):
+        """
+        Removes keys that linear interpolation of positions and scales, and
+        slerp of rotations, can rebuild within the given tolerances. Position
+        and scale tolerances are distances, the rotation tolerance is an
+        angle in degrees. Channels that stay within tolerance of their first
+        key collapse to that key. Keys are expected to be in frame order
+
+        Positions, rotations and scales of all bones are each decimated
+        together, so the cost grows with the key count rather than the bone
+        count. Returns the number of keys removed
+        """
+        _require_numpy()
+
+        # Remember a key on the last frame, so collapsing channels can't
+        # shorten the animation
+        last_frame, last_key = _last_key(self.bones)
+
+        removed = _reduce_channels(self.bones, 'posKeys', 3,
+                                   pos_tol * pos_tol, False)
+        removed += _reduce_channels(
+            self.bones, 'rotKeys', 4,
+            1.0 - math.cos(math.radians(rot_tol_deg) / 2.0), True)
+        removed += _reduce_channels(self.bones, 'scaleKeys', 3,
+                                    scale_tol * scale_tol, False)
+
+        if last_key is not None and _last_key(self.bones)[0] < last_frame:
+            bone, attribute, key = last_key
+            getattr(bone, 'extend_%s_keys' % attribute[:-4])([key])
+            removed -= 1
+
+        return removed
+
+    def resample(self, framerate):
+        """
+        Re-times the animation to a new framerate, every channel gets a key
+        on each frame of the new rate between its first and last key, with
+        positions and scales linearly interpolated and rotations slerped
+        from the original keys. Notes are moved to the nearest new frame and
+        the header framerate and frame count are updated
+
+        The keys around every new frame are found with a single sorted
+        search over the channels of a kind
+        """
+        _require_numpy()
+
+        if framerate <= 0:
+            raise ValueError("framerate must be above zero")
+        if self.header.framerate <= 0:
+            raise ValueError("The animation has no framerate to convert from")
+
+        ratio = float(framerate) / self.header.framerate
+        length = _frame_count(self)
+
+        _resample_channels(self.bones, 'posKeys', 3, ratio, False)
+        _resample_channels(self.bones, 'rotKeys', 4, ratio, True)
+        _resample_channels(self.bones, 'scaleKeys', 3, ratio, False)
+
+        self.notes = NoteIndex.from_pairs(
+            [int(round(frame * ratio)) for frame in self.notes.frames],
+            self.notes.names)
+
+        self.header.framerate = framerate
+        self.header.frameCount = int(round((length - 1) * ratio)) + 1
+
+    def canonicalize_rotations(self):
+        """
+        Normalizes every rotation key and flips quaternion signs so each
+        channel starts with w >= 0 and consecutive keys have a non negative
+        dot product, which leaves the rotations themselves unchanged
+
+        Runs as one vectorized pass over the rotation keys of every bone,
+        returns the number of keys whose sign was flipped
+        """
+        _require_numpy()
+
+        channels = [(bone, bone.rotKeys) for bone in self.bones
+                    if len(bone.rotKeys)]
+        if not channels:
+            return 0
+
+        arrays = [KeyArray.fromKeyFrames(keys, 4, numpy.float64)
+                  for _, keys in channels]
+        counts = numpy.array([len(array) for array in arrays])
+        starts = numpy.concatenate(([0], numpy.cumsum(counts)[:-1]))
+
+        data = _normalize(numpy.concatenate(
+            [numpy.asarray(array.data, numpy.float64) for array in arrays]))
+
+        # A key flips relative to the one before it when their dot product
+        # is negative, the sign it ends up with is the parity of the flips
+        # since the start of its channel
+        flips = numpy.zeros(len(data), numpy.int64)
+        flips[1:] = numpy.einsum('ij,ij->i', data[:-1], data[1:]) < 0
+        flips[starts] = data[starts, 3] < 0
+        total = numpy.cumsum(flips)
+        total -= numpy.repeat(total[starts] - flips[starts], counts)
+        negate = (total % 2).astype(bool)
+        data[negate] = -data[negate]
+
+        for index, (bone, keys) in enumerate(channels):
+            part = data[starts[index]:starts[index] + counts[index]]
+            if isinstance(keys, KeyArray):
+                bone.rotKeys = KeyArray(keys.frames,
+                                        part.astype(keys.data.dtype))
+            else:
+                bone.rotKeys = KeyArray(arrays[index].frames,
+                                        part).to_keyframes()
+
+        return int(negate.sum())
+
+    def convert_type(self, animType, model):
+        """
+        Converts the keys to animType, a SEANIM_TYPE, using the rest pose of
+        a semodel.Model with the same skeleton. Each bone's current type is
+        resolved from the header and the modifiers the way the Maya importer
+        does, modifiers are removed once every bone has been converted
+
+        As in the importer, positions of every type but absolute are offsets
+        from the rest position, and additive rotations are applied on top of
+        the rest rotation. Bones missing from the model keep their keys
+
+        The rest pose offsets are gathered per bone first and applied to
+        the positions and rotations of every bone at once
+        """
+        _require_numpy()
+
+        ABSOLUTE = SEANIM_TYPE.SEANIM_TYPE_ABSOLUTE
+        ADDITIVE = SEANIM_TYPE.SEANIM_TYPE_ADDITIVE
+
+        types = _resolve_bone_types(self, model)
+
+        restPosition = numpy.zeros((len(self.bones), 3))
+        restRotation = numpy.zeros((len(self.bones), 4))
+        restRotation[:, 3] = 1.0
+        for index, bone in enumerate(self.bones):
+            rest = model.get_bone(bone.name, any_namespace=True)
+            if rest is not None:
+                restPosition[index] = rest.localPosition
+                restRotation[index] = rest.localRotation
+        restRotation = _normalize(restRotation)
+
+        # How much of the rest position each bone's keys move by
+        shift = numpy.array([float(current != ABSOLUTE) -
+                             float(animType != ABSOLUTE)
+                             for current in types])
+
+        for attribute, width in (('posKeys', 3), ('rotKeys', 4)):
+            channels = [(index, bone, getattr(bone, attribute))
+                        for index, bone in enumerate(self.bones)
+                        if len(getattr(bone, attribute))]
+            if not channels:
+                continue
+
+            arrays = [KeyArray.fromKeyFrames(keys, width, numpy.float64)
+                      for _, _, keys in channels]
+            counts = numpy.array([len(array) for array in arrays])
+            owner = numpy.repeat([index for index, _, _ in channels], counts)
+            data = numpy.concatenate(
+                [numpy.asarray(array.data, numpy.float64)
+                 for array in arrays])
+
+            if attribute == 'posKeys':
+                data += restPosition[owner] * shift[owner][:, None]
+            else:
+                additive = numpy.array([current == ADDITIVE
+                                        for current in types])[owner]
+                rest = restRotation[owner]
+                data[additive] = _quat_multiply(data[additive],
+                                                rest[additive])
+                if animType == ADDITIVE:
+                    inverse = rest * [-1.0, -1.0, -1.0, 1.0]
+                    data = _quat_multiply(data, inverse)
+
+            start = 0
+            for (index, bone, keys), array in zip(channels, arrays):
+                part = data[start:start + len(array)]
+                start += len(array)
+                if isinstance(keys, KeyArray):
+                    setattr(bone, attribute, KeyArray(
+                        keys.frames, part.astype(keys.data.dtype)))
+                else:
+                    setattr(bone, attribute, KeyArray(
+                        array.frames, part).to_keyframes())
 
-    def save(self, filepath="", high_precision=False, looping=False):
+        for bone in self.bones:
+            bone.useModifier = False
+            bone.modifier = 0
+        self.boneAnimModifiers = []
+        self.header.animType = animType
+
+    def sampler(self):
+        """
+        Returns a Sampler over the current keys, keep it around for playback
+        so its cursors carry over between frames
+        """
+        return Sampler(self)
+
+    def invalidate_sampler(self):
+        """
+        Drops the Sampler used by sample and sample_range
+        """
+        self._sampler = None
+
+    def _current_sampler(self):
+        if self._sampler is None:
+            self._sampler = Sampler(self)
+        else:
+            self._sampler._refresh(self)
+        return self._sampler
+
+    def sample(self, frame):
+        """
+        Samples every bone at a fractional frame, see Sampler.sample
+
+        Calls share a Sampler kept on the animation, so sampling frames in
+        order costs O(1) per bone. A bone's keys are only copied again once
+        one of its channels is assigned or goes through the add / extend
+        helpers. Edits made in place to a KeyFrame list or its keys aren't
+        seen until invalidate_sampler is called
+        """
+        return self._current_sampler().sample(frame)
+
+    def sample_range(self, frames):
+        """
+        Samples every bone at many frames at once, see Sampler.sample_range
+        and sample
+        """
+        return self._current_sampler().sample_range(frames)
+
+    def to_keyframes(self):
+        """
+        Converts every array backed bone channel back to KeyFrame lists
+        """
+        for bone in self.bones:
+            bone.to_keyframes()
+
+    def save(self, filepath="", high_precision=False, looping=False,
+             instrument=None):
+        """
+        Saves the animation to filepath, when instrument is given it is
+        called as instrument(phase, seconds, size) for the 'header',
+        'bone_names', 'modifiers', 'loc_keys', 'rot_keys', 'scale_keys',
+        'notes' and 'custom' phases, then once for 'total' with the file
+        size
+        """
         if LOG_WRITE_TIME:
-            time_start = time.time()
             print("Saving: '%s'" % filepath)
+            if instrument is None:
+                instrument = _print_span
+
+        # filepath may be the file a lazy load mapped, which is truncated
+        # below, so nothing can be left reading from a mapping
+        self._detach_mapping()
 
         try:
             file = open(filepath, "wb")
@@ -550,16 +2989,60 @@ class Anim(object):
             print("Could not open file for writing:\n %s" % filepath)
             return
 
+        with file:
+            self.save_to_stream(file, high_precision, looping, instrument)
+
+    def _detach_mapping(self):
+        """
+        Decodes every bone whose keys are still pending and copies a custom
+        block that views a memory mapped file, so the animation no longer
+        reads from any mapping
+        """
+        for bone in self.bones:
+            if not bone.is_loaded():
+                bone._load_deferred()
+
+        custom = self.custom
+        if custom is not None:
+            buffer = custom._buffer
+            if isinstance(buffer, memoryview):
+                buffer = buffer.obj
+            if isinstance(buffer, mmap.mmap):
+                self.custom = CustomBlock(custom.data.tobytes())
+
+    def to_bytes(self, high_precision=False, looping=False):
+        """
+        Returns the animation as the bytes of a .seanim file
+        """
+        stream = io.BytesIO()
+        self.save_to_stream(stream, high_precision, looping)
+        return stream.getvalue()
+
+    def save_to_stream(self, file, high_precision=False, looping=False,
+                       instrument=None):
+        """
+        Writes the animation to a writable binary stream, which is left
+        open. Instrumenting a save needs a stream that supports tell
+        """
+        spans = None
+        if instrument is not None:
+            spans = _Spans(instrument)
+            spans.offset = start = file.tell()
+
         # Update the header flags, based on the presence of different keyframe
         # types
         self.update_metadata(high_precision, looping)
 
         self.__info.save(file)
         self.header.save(file)
-        for bone in self.bones:
-            bytes = struct.pack(
-                '%ds' % (len(bone.name) + 1), bone.name.encode())
-            file.write(bytes)
+        if spans is not None:
+            spans.mark('header', file.tell())
+
+        file.write(b''.join([struct.pack('%ds' % (len(bone.name) + 1),
+                                         bone.name.encode())
+                             for bone in self.bones]))
+        if spans is not None:
+            spans.mark('bone_names', file.tell())
 
         dataPresenceFlags = self.header.dataPresenceFlags
 
@@ -571,22 +3054,410 @@ class Anim(object):
         bone_t = Bone_t(self.header)
         precision_t = Precision_t(self.header)
 
-        for index, bone in enumerate(self.bones):
-            if bone.useModifier:
-                bytes = struct.pack('%cB' % bone_t.char, index, bone.modifier)
-                file.write(bytes)
+        modifier_t = bone_t.modifier
+        file.write(b''.join([modifier_t.pack(index, bone.modifier)
+                             for index, bone in enumerate(self.bones)
+                             if bone.useModifier]))
+        if spans is not None:
+            spans.mark('modifiers', file.tell())
 
         for bone in self.bones:
             bone.save(file, frame_t, bone_t, precision_t,
-                      useLoc, useRot, useScale)
+                      useLoc, useRot, useScale, spans)
 
         if dataPresenceFlags & SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE:
-            for note in self.notes:
-                note.save(file, frame_t)
+            frame_s = frame_t.struct
+            file.write(b''.join([frame_s.pack(frame) +
+                                 name.encode() + b'\x00'
+                                 for frame, name in zip(self.notes.frames,
+                                                        self.notes.names)]))
 
-        file.close()
+        if spans is not None:
+            spans.flush()
+            spans.mark('notes', file.tell())
 
-        if LOG_WRITE_TIME:
-            time_end = time.time()
-            time_elapsed = time_end - time_start
-            print("Done! - Completed in %ss" % time_elapsed)
+        if self.custom is not None:
+            self.custom.save(file)
+            if spans is not None:
+                spans.mark('custom', file.tell())
+
+        if spans is not None:
+            spans.total(file.tell() - start)
+
+
+class AnimWriter(object):
+    """
+    Writes a seanim file one bone at a time, so only the bone currently
+    being written needs to be held in memory
+
+    The bone names, the channels present and an upper bound for the frame
+    count have to be known up front, since they decide the layout of every
+    key block. When closed the header is patched with the real frame count
+    and the notes written, should the real count need narrower frame
+    indices than the bound the key blocks and notes are re-encoded in
+    place. Usage:
+
+        with AnimWriter(path, names, frameCount) as writer:
+            for bone in bones:
+                writer.write_bone(bone)
+            writer.write_note(note)
+            writer.write_custom(CustomBlock.from_stream(payload))
+    """
+
+    def __init__(self, path, boneNames, frameCount,
+                 framerate=30, animType=SEANIM_TYPE.SEANIM_TYPE_RELATIVE,
+                 modifiers=None, high_precision=False, looping=False,
+                 useLoc=True, useRot=True, useScale=True):
+        if frameCount <= 0:
+            raise ValueError("frameCount must be at least 1")
+
+        self.boneNames = list(boneNames)
+        self.modifiers = modifiers or {}
+
+        header = self.header = Header()
+        header.animType = animType
+        header.framerate = framerate
+        header.frameCount = frameCount
+        header.boneCount = len(self.boneNames)
+        header.boneAnimModifierCount = sum(
+            1 for name in self.boneNames if name in self.modifiers)
+
+        if useLoc:
+            header.dataPresenceFlags |= SEANIM_PRESENCE_FLAGS.SEANIM_BONE_LOC
+        if useRot:
+            header.dataPresenceFlags |= SEANIM_PRESENCE_FLAGS.SEANIM_BONE_ROT
+        if useScale:
+            header.dataPresenceFlags |= SEANIM_PRESENCE_FLAGS.SEANIM_BONE_SCALE
+        if high_precision:
+            header.dataPropertyFlags |= \
+                SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH
+        if looping:
+            header.animFlags |= SEANIM_FLAGS.SEANIM_LOOPED
+
+        self.useLoc = useLoc
+        self.useRot = useRot
+        self.useScale = useScale
+
+        self.frame_t = Frame_t(header)
+        self.bone_t = Bone_t(header)
+        self.precision_t = Precision_t(header)
+
+        self.bonesWritten = 0
+        self.maxFrame = 0
+        self.customWritten = False
+
+        self.file = open(path, "w+b")
+
+        # Header is written with the frame count capacity for now, the
+        # real values are patched in when closing
+        Info().save(self.file)
+        self.header_offset = self.file.tell()
+        header.save(self.file)
+
+        for name in self.boneNames:
+            self.file.write(name.encode("utf-8") + b'\x00')
+
+        for index, name in enumerate(self.boneNames):
+            if name in self.modifiers:
+                self.file.write(self.bone_t.modifier.pack(
+                    index, self.modifiers[name]))
+        self.body_offset = self.file.tell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+        return False
+
+    def write_bone(self, bone):
+        """
+        Writes the next bone's keys, bones must be written in the same
+        order as the names given to the writer
+        """
+        if self.bonesWritten >= len(self.boneNames):
+            raise ValueError("All %d bones have already been written" %
+                             len(self.boneNames))
+        if bone.name != self.boneNames[self.bonesWritten]:
+            raise ValueError("Expected bone '%s', got '%s'" %
+                             (self.boneNames[self.bonesWritten], bone.name))
+
+        maxFrame = max(self.maxFrame, bone.max_frame())
+        if maxFrame >= self.header.frameCount:
+            raise ValueError("Frame %d exceeds the frame count of %d" %
+                             (maxFrame, self.header.frameCount))
+
+        bone.save(self.file, self.frame_t, self.bone_t, self.precision_t,
+                  self.useLoc, self.useRot, self.useScale)
+
+        self.maxFrame = maxFrame
+        self.bonesWritten += 1
+
+    def write_note(self, note):
+        """
+        Writes a note, every bone has to be written before the notes
+        """
+        if self.bonesWritten != len(self.boneNames):
+            raise ValueError("Notes can only be written after all bones")
+        if self.customWritten:
+            raise ValueError("Notes can't be written after the custom block")
+        if note.frame >= self.header.frameCount:
+            raise ValueError("Frame %d exceeds the frame count of %d" %
+                             (note.frame, self.header.frameCount))
+
+        self.file.write(self.frame_t.struct.pack(note.frame))
+        self.file.write(note.name.encode("utf-8") + b'\x00')
+
+        self.maxFrame = max(self.maxFrame, note.frame)
+        self.header.noteCount += 1
+
+    def write_custom(self, block):
+        """
+        Writes a CustomBlock, it has to come after every bone and note and
+        only one can be written. Streamed blocks are copied over in chunks
+        """
+        if self.bonesWritten != len(self.boneNames):
+            raise ValueError("The custom block can only be written after "
+                             "all bones")
+        if self.customWritten:
+            raise ValueError("The custom block has already been written")
+
+        block.save(self.file)
+        self.customWritten = True
+
+    def close(self):
+        """
+        Patches the header with the real frame count, note and custom block
+        presence, then closes the file
+        """
+        if self.file.closed:
+            return
+        if self.bonesWritten != len(self.boneNames):
+            self.file.close()
+            raise ValueError("Only %d of %d bones were written" %
+                             (self.bonesWritten, len(self.boneNames)))
+
+        header = self.header
+        if header.noteCount:
+            header.dataPresenceFlags |= \
+                SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE
+        if self.customWritten:
+            header.dataPresenceFlags |= \
+                SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_CUSTOM
+
+        # The frame count decides the width of every frame index, when the
+        # real count needs a narrower one than the bound everything written
+        # with it is re-encoded
+        header.frameCount = self.maxFrame + 1
+        frame_t = Frame_t(header)
+        if frame_t.size != self.frame_t.size:
+            self._repack(frame_t)
+
+        self.file.seek(self.header_offset)
+        header.save(self.file)
+        self.file.close()
+
+    def _repack(self, frame_t):
+        """
+        Re-encodes the key blocks and notes with the narrower frame_t one
+        bone at a time, in place since every block only shrinks, the custom
+        block is moved down after them
+        """
+        self.file.flush()
+        with mmap.mmap(self.file.fileno(), 0) as view:
+            read = write = self.body_offset
+            for _ in self.boneNames:
+                bone = Bone()
+                read = bone.loadDataFromBuffer(
+                    view, read, self.frame_t, self.precision_t, self.useLoc,
+                    self.useRot, self.useScale, numpy is not None)
+                data = bone.pack(frame_t, self.precision_t, self.useLoc,
+                                 self.useRot, self.useScale)
+                view[write:write + len(data)] = data
+                write += len(data)
+
+            for _ in range(self.header.noteCount):
+                note = Note()
+                read = note.loadFromBuffer(view, read, self.frame_t)
+                data = (frame_t.struct.pack(note.frame) +
+                        note.name.encode("utf-8") + b'\x00')
+                view[write:write + len(data)] = data
+                write += len(data)
+
+            if self.customWritten:
+                view.move(write, read, len(view) - read)
+                write += len(view) - read
+
+        self.file.truncate(write)
+        self.frame_t = frame_t
+
+
+def _ordered_results(executor, func, items, window):
+    """
+    Submits func for each item, keeping at most window calls in flight,
+    and yields the results in item order as each one finishes
+    """
+    pending = collections.deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _read_anim(path, use_arrays=False, lazy=False):
+    if lazy:
+        return Anim.from_buffer(_map_file(path), use_arrays, True)
+    with open(path, "rb") as file:
+        return Anim.from_bytes(file.read(), use_arrays)
+
+
+FlatAnim = collections.namedtuple('FlatAnim', (
+    'header', 'boneNames', 'boneFlags', 'modifiers', 'channels', 'notes',
+    'custom'
+))
+
+
+def flatten(anim):
+    """
+    Flattens an animation into a FlatAnim made of a few plain lists and
+    numpy arrays, cheap to pickle or store. Every channel kind is
+    concatenated over all bones, channels holds a (counts, frames, data)
+    tuple for the pos, rot and scale keys, or None when there are no bones
+
+    header holds the Header values in slot order, modifiers holds (bone
+    index, modifier) pairs, notes (frame, name) pairs and custom a
+    memoryview of the custom block's payload or None
+    """
+    _require_numpy()
+
+    dtype = 'f'
+    if (anim.header.dataPropertyFlags &
+            SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH):
+        dtype = 'd'
+
+    bones = anim.bones
+    channels = []
+    for attribute, width in (('posKeys', 3), ('rotKeys', 4),
+                             ('scaleKeys', 3)):
+        keys = [KeyArray.fromKeyFrames(getattr(bone, attribute), width, dtype)
+                for bone in bones]
+        if not keys:
+            channels.append(None)
+            continue
+        channels.append((numpy.array([len(key) for key in keys]),
+                         numpy.concatenate([key.frames for key in keys]),
+                         numpy.concatenate([key.data for key in keys])))
+
+    return FlatAnim(
+        tuple([getattr(anim.header, name) for name in Header.__slots__]),
+        [bone.name for bone in bones], [bone.flags for bone in bones],
+        [(index, bone.modifier) for index, bone in enumerate(bones)
+         if bone.useModifier],
+        tuple(channels), list(zip(anim.notes.frames, anim.notes.names)),
+        anim.custom.data if anim.custom is not None else None)
+
+
+def unflatten(flat, use_arrays=False):
+    """
+    Rebuilds the Anim flattened by flatten, array channels are views into
+    the FlatAnim's arrays rather than copies
+    """
+    header, names, flags, modifiers, channels, notes, custom = flat
+
+    anim = Anim()
+    anim.info = Info()
+    for name, value in zip(Header.__slots__, header):
+        setattr(anim.header, name, value)
+
+    for name, boneFlags in zip(names, flags):
+        bone = Bone()
+        bone.name = name
+        bone.flags = boneFlags
+        anim.bones.append(bone)
+
+    for index, modifier in modifiers:
+        anim.bones[index].useModifier = True
+        anim.bones[index].modifier = modifier
+        anim.boneAnimModifiers.append(anim.bones[index])
+
+    for attribute, channel in zip(('posKeys', 'rotKeys', 'scaleKeys'),
+                                  channels):
+        if channel is None:
+            continue
+        counts, frames, data = channel
+        splits = numpy.cumsum(counts)[:-1]
+        for bone, keyFrames, keyData in zip(anim.bones,
+                                            numpy.split(frames, splits),
+                                            numpy.split(data, splits)):
+            keys = KeyArray(keyFrames, keyData)
+            setattr(bone, attribute, keys if use_arrays else
+                    keys.to_keyframes())
+
+    for bone in anim.bones:
+        bone.locKeyCount = len(bone.posKeys)
+        bone.rotKeyCount = len(bone.rotKeys)
+        bone.scaleKeyCount = len(bone.scaleKeys)
+
+    anim.notes = NoteIndex.from_pairs([frame for frame, _ in notes],
+                                      [name for _, name in notes])
+
+    if custom is not None:
+        anim.custom = CustomBlock(custom)
+
+    return anim
+
+
+def _load_flat(path):
+    """
+    Loads the seanim at path in a worker process and flattens it for the
+    trip back, so only a few buffers get pickled instead of an object per
+    bone and key
+    """
+    flat = flatten(_read_anim(path, True))
+    # memoryviews can't be pickled, the payload has to be copied once here
+    if flat.custom is not None:
+        flat = flat._replace(custom=flat.custom.tobytes())
+    return flat
+
+
+def load_many(paths, workers=None, use_arrays=False, lazy=False,
+              processes=False):
+    """
+    Loads many seanim files in parallel, returns an iterator over the
+    Anims in the same order as paths, each one is yielded as soon as it
+    and every file before it are loaded. Errors are raised when the
+    failing file is reached
+
+    By default files are read and parsed on a thread pool of workers
+    threads, overlapping file I/O with parsing. When processes is set a
+    process pool is used instead, each worker ships its anim back as a
+    handful of flat numpy arrays which requires numpy, lazy is ignored
+    """
+    if use_arrays or processes:
+        _require_numpy()
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    window = 2 * workers
+
+    if processes:
+        executor = concurrent.futures.ProcessPoolExecutor(workers)
+        results = _ordered_results(executor, _load_flat, paths, window)
+        with executor:
+            for flat in results:
+                yield unflatten(flat, use_arrays)
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        for anim in _ordered_results(
+                executor, lambda path: _read_anim(path, use_arrays, lazy),
+                paths, window):
+            yield anim
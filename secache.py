@@ -0,0 +1,444 @@
+"""
+An opt-in on-disk cache of parsed .seanim and .semodel files
+
+    cache = secache.AnimCache("path/to/cache", max_bytes=2 << 30)
+    anim = cache.load("path/to/clip.seanim")
+
+    models = secache.ModelCache("path/to/cache", max_bytes=2 << 30)
+    model = models.load("path/to/body.semodel")
+
+Files are keyed by their path, size and modification time, and entries by
+a hash of their contents, so a copy of a file already cached is a hit too.
+An anim entry holds the flattened key arrays as .npy files, a warm load
+memory maps them and builds the Anim around views into the mapping instead
+of parsing. Array channels of a cached Anim are read only
+
+A model entry holds the vertex streams and face indices of every mesh as
+.npy files, with the bones and materials kept alongside them. A warm load
+maps them and hands back meshes backed by a semodel VertexArray and
+FaceArray, which are read only too. Either kind keeps a custom block as
+one more mapped array
+
+Both caches can share a directory, each keeps its own index of files but
+the entries are evicted together, least recently used first, once the
+directory is larger than max_bytes. Requires numpy
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+import seanim
+import semodel
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# <pep8 compliant>
+
+# Bump when the entry layout changes, older entries are then never matched
+CACHE_VERSION = 2
+
+_CHANNELS = ('pos', 'rot', 'scale')
+_ARRAYS = ('counts', 'frames', 'data')
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _write_json(path, value):
+    """
+    Writes value as JSON to path through a temporary file, so readers never
+    see a partial file
+    """
+    directory = os.path.dirname(path)
+    handle, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w") as file:
+            json.dump(value, file)
+        os.replace(temp, path)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def _save_custom(directory, custom):
+    """
+    Stores a custom block payload, returns its size or None without one
+    """
+    if custom is None:
+        return None
+    # Empty files can't be mapped, so an empty payload isn't stored
+    if len(custom):
+        numpy.save(os.path.join(directory, "custom.npy"),
+                   numpy.frombuffer(custom, numpy.uint8))
+    return len(custom)
+
+
+def _load_custom(directory, size):
+    """
+    Maps the custom block payload stored by _save_custom
+    """
+    if size is None:
+        return None
+    if size == 0:
+        return b''
+    return numpy.load(os.path.join(directory, "custom.npy"), mmap_mode='r')
+
+
+class _Cache(object):
+    """
+    The index, lookup and eviction shared by AnimCache and ModelCache,
+    subclasses parse, read and write their own kind of entry
+    """
+
+    # The file the cache keeps its index of files in
+    _index_name = None
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        if numpy is None:
+            raise ImportError("numpy is required for the parse cache")
+
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        self._index_path = os.path.join(self.directory, self._index_name)
+        self._files = {}
+        if os.path.isfile(self._index_path):
+            with open(self._index_path) as file:
+                index = json.load(file)
+            if index.get("version") == CACHE_VERSION:
+                self._files = index["files"]
+
+    def _entry_path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def _load(self, path, *args):
+        """
+        Returns the entry for the file at path, from the cache when the
+        file is unchanged or its contents are already cached, otherwise it
+        is parsed with _add
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = [stat.st_size, stat.st_mtime_ns]
+
+        known = self._files.get(path)
+        if known is not None and known[:2] == key:
+            value = self._read_entry(known[2], *args)
+            if value is not None:
+                return value
+
+        with open(path, "rb") as file:
+            data = file.read()
+        digest = _digest(data)
+
+        self._files[path] = key + [digest]
+        _write_json(self._index_path, {"version": CACHE_VERSION,
+                                       "files": self._files})
+
+        value = self._read_entry(digest, *args)
+        if value is not None:
+            return value
+
+        value = self._add(digest, data, *args)
+        self.evict(keep=digest)
+        return value
+
+    def _open_entry(self, digest):
+        """
+        Returns the directory and metadata of the entry for digest, or None
+        when it isn't cached, and marks it as recently used for eviction
+        """
+        entry = self._entry_path(digest)
+        meta_path = os.path.join(entry, "meta.json")
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        os.utime(meta_path)
+        return entry, meta
+
+    def _save_entry(self, digest, write):
+        """
+        Builds the entry for digest next to where it goes with
+        write(directory), which returns the metadata, and moves it in whole
+        """
+        entry = self._entry_path(digest)
+        temp = tempfile.mkdtemp(dir=self.directory, suffix=".tmp")
+        try:
+            meta = write(temp)
+            with open(os.path.join(temp, "meta.json"), "w") as file:
+                json.dump(meta, file)
+
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            os.rename(temp, entry)
+        finally:
+            if os.path.isdir(temp):
+                shutil.rmtree(temp, ignore_errors=True)
+
+    def entries(self):
+        """
+        Returns (last used, size in bytes, digest) for every cached entry,
+        least recently used first
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = self._entry_path(name)
+            meta_path = os.path.join(entry, "meta.json")
+            if name.endswith(".tmp") or not os.path.isfile(meta_path):
+                continue
+            size = sum([os.path.getsize(os.path.join(entry, file))
+                        for file in os.listdir(entry)])
+            entries.append((os.path.getmtime(meta_path), size, name))
+        entries.sort()
+        return entries
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used entries until the cache fits in
+        max_bytes, the entry for keep is never removed. Returns the number
+        of bytes freed
+        """
+        entries = self.entries()
+        total = sum([size for _, size, _ in entries])
+        freed = 0
+        for _, size, digest in entries:
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            shutil.rmtree(self._entry_path(digest), ignore_errors=True)
+            total -= size
+            freed += size
+        return freed
+
+    def clear(self):
+        """
+        Removes every entry and forgets every file
+        """
+        for _, _, digest in self.entries():
+            shutil.rmtree(self._entry_path(digest), ignore_errors=True)
+        self._files = {}
+        _write_json(self._index_path, {"version": CACHE_VERSION,
+                                       "files": self._files})
+
+
+class AnimCache(_Cache):
+    """
+    A directory of flattened seanim files, see the module documentation
+    """
+
+    _index_name = "index.json"
+
+    def load(self, path, use_arrays=True):
+        """
+        Returns the Anim for the seanim at path, from the cache when the
+        file is unchanged or its contents are already cached, otherwise it
+        is parsed and added. When use_arrays is not set the channels are
+        converted to KeyFrame lists
+        """
+        return self._load(path, use_arrays)
+
+    def _add(self, digest, data, use_arrays):
+        anim = seanim.Anim.from_bytes(data, use_arrays=True)
+        self._write_entry(digest, seanim.flatten(anim))
+
+        if not use_arrays:
+            anim.to_keyframes()
+        return anim
+
+    def _read_entry(self, digest, use_arrays):
+        opened = self._open_entry(digest)
+        if opened is None:
+            return None
+        entry, meta = opened
+
+        channels = []
+        for name in _CHANNELS:
+            if not meta["channels"][name]:
+                channels.append(None)
+                continue
+            channels.append(tuple([numpy.load(
+                os.path.join(entry, "%s_%s.npy" % (name, array)),
+                mmap_mode='r') for array in _ARRAYS]))
+
+        flat = seanim.FlatAnim(tuple(meta["header"]), meta["boneNames"],
+                               meta["boneFlags"],
+                               [tuple(pair) for pair in meta["modifiers"]],
+                               tuple(channels),
+                               [tuple(pair) for pair in meta["notes"]],
+                               _load_custom(entry, meta["custom"]))
+        return seanim.unflatten(flat, use_arrays)
+
+    def _write_entry(self, digest, flat):
+        def write(directory):
+            present = {}
+            for name, channel in zip(_CHANNELS, flat.channels):
+                present[name] = channel is not None
+                if channel is None:
+                    continue
+                for array, values in zip(_ARRAYS, channel):
+                    numpy.save(os.path.join(directory, "%s_%s.npy" %
+                                            (name, array)), values)
+
+            return {"header": list(flat.header),
+                    "boneNames": flat.boneNames,
+                    "boneFlags": flat.boneFlags,
+                    "modifiers": flat.modifiers,
+                    "channels": present,
+                    "notes": flat.notes,
+                    "custom": _save_custom(directory, flat.custom)}
+
+        self._save_entry(digest, write)
+
+
+class ModelCache(_Cache):
+    """
+    A directory of semodel files stored as arrays, see the module
+    documentation
+    """
+
+    _index_name = "models.json"
+
+    def load(self, path, use_arrays=True):
+        """
+        Returns the Model for the semodel at path, from the cache when the
+        file is unchanged or its contents are already cached, otherwise it
+        is parsed and added. Meshes are array backed, when use_arrays is
+        not set they are converted to Vertex and Face lists, which costs
+        more than parsing the file would
+        """
+        return self._load(path, use_arrays)
+
+    def _add(self, digest, data, use_arrays):
+        model = semodel.Model.from_bytes(data)
+        self._write_entry(digest, model)
+        if use_arrays:
+            # Hand back the mapped arrays, like a warm load would
+            cached = self._read_entry(digest, use_arrays)
+            if cached is not None:
+                return cached
+        return model
+
+    def _read_entry(self, digest, use_arrays):
+        opened = self._open_entry(digest)
+        if opened is None:
+            return None
+        entry, meta = opened
+
+        def array(index, name):
+            return numpy.load(os.path.join(entry, "mesh%d_%s.npy" %
+                                           (index, name)), mmap_mode='r')
+
+        model = semodel.Model()
+        model.info = semodel.Info()
+        for name, value in zip(semodel.Header.__slots__, meta["header"]):
+            setattr(model.header, name, value)
+
+        for (name, flags, parent, globalPosition, globalRotation,
+             localPosition, localRotation, scale) in meta["bones"]:
+            bone = semodel.Bone()
+            bone.name = name
+            bone.flags = flags
+            bone.boneParent = parent
+            bone.globalPosition = tuple(globalPosition)
+            bone.globalRotation = tuple(globalRotation)
+            bone.localPosition = tuple(localPosition)
+            bone.localRotation = tuple(localRotation)
+            bone.scale = tuple(scale)
+            model.bones.append(bone)
+
+        for index, (flags, uvSetCount, maxSkinInfluence, useNormals,
+                    useColors, references) in enumerate(meta["meshes"]):
+            mesh = semodel.Mesh()
+            mesh.flags = flags
+            mesh.matReferenceCount = uvSetCount
+            mesh.maxSkinInfluence = maxSkinInfluence
+            mesh.materialReferences = references
+            mesh.vertices = semodel.VertexArray(
+                array(index, "positions"), array(index, "uvs"),
+                array(index, "normals") if useNormals else None,
+                array(index, "colors") if useColors else None,
+                array(index, "weight_bones"), array(index, "weight_values"))
+            mesh.faces = semodel.FaceArray(array(index, "faces"))
+            mesh.vertexCount = len(mesh.vertices)
+            mesh.faceCount = len(mesh.faces)
+            model.meshes.append(mesh)
+
+        for name, isSimpleMaterial, maps in meta["materials"]:
+            material = semodel.Material()
+            material.name = name
+            material.isSimpleMaterial = isSimpleMaterial
+            (material.inputData.diffuseMap, material.inputData.normalMap,
+             material.inputData.specularMap) = maps
+            model.materials.append(material)
+
+        custom = _load_custom(entry, meta["custom"])
+        if custom is not None:
+            model.custom = semodel.CustomBlock(custom)
+
+        if not use_arrays:
+            model.to_vertices()
+        return model
+
+    def _write_entry(self, digest, model):
+        meshFlags = model.header.meshPresenceFlags
+        useNormals = bool(
+            meshFlags &
+            semodel.SEMODEL_MESHPRESENCE_FLAGS.SEMODEL_PRESENCE_NORMALS)
+        useColors = bool(
+            meshFlags &
+            semodel.SEMODEL_MESHPRESENCE_FLAGS.SEMODEL_PRESENCE_COLOR)
+
+        def write(directory):
+            def save(index, name, values):
+                numpy.save(os.path.join(directory, "mesh%d_%s.npy" %
+                                        (index, name)), values)
+
+            meshes = []
+            for index, mesh in enumerate(model.meshes):
+                vertices = semodel.VertexArray.fromVertices(
+                    mesh.vertices, mesh.matReferenceCount,
+                    mesh.maxSkinInfluence, useNormals, useColors)
+                save(index, "positions", vertices.positions)
+                save(index, "uvs", vertices.uvLayers)
+                if useNormals:
+                    save(index, "normals", vertices.normals)
+                if useColors:
+                    save(index, "colors", vertices.colors)
+                save(index, "weight_bones", vertices.weightBones)
+                save(index, "weight_values", vertices.weightValues)
+                save(index, "faces",
+                     semodel.FaceArray.fromFaces(mesh.faces).indices)
+
+                meshes.append([mesh.flags, mesh.matReferenceCount,
+                               mesh.maxSkinInfluence, useNormals, useColors,
+                               list(mesh.materialReferences)])
+
+            custom = model.custom.data if model.custom is not None else None
+            return {"header": [getattr(model.header, name)
+                               for name in semodel.Header.__slots__],
+                    "bones": [[bone.name, bone.flags, bone.boneParent,
+                               bone.globalPosition, bone.globalRotation,
+                               bone.localPosition, bone.localRotation,
+                               bone.scale] for bone in model.bones],
+                    "meshes": meshes,
+                    "materials": [[material.name, material.isSimpleMaterial,
+                                   [material.inputData.diffuseMap,
+                                    material.inputData.normalMap,
+                                    material.inputData.specularMap]]
+                                  for material in model.materials],
+                    "custom": _save_custom(directory, custom)}
+
+        self._save_entry(digest, write)
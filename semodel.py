@@ -1,11 +1,20 @@
-import time
+import io
+import os
 import struct
+import collections
+import concurrent.futures
+
+# The bone name index, the buffer readers, the custom block and the
+# loading helpers are shared with seanim, which is always installed next
+# to this module
+from seanim import (CustomBlock, _NameIndex, _RENAMES, _Spans, _as_buffer,
+                    _map_file, _ordered_results, _print_span, _read_string,
+                    _skip_string, _struct, _truncated)
 
 try:
-    if xrange is None:
-        xrange = range
-except NameError:
-    xrange = range
+    import numpy
+except ImportError:
+    numpy = None
 
 # <pep8 compliant>
 
@@ -73,6 +82,14 @@ class Info(object):
         assert magic == self.magic
         assert version == self.version
 
+    def loadFromBuffer(self, buffer, offset=0):
+        data = struct.unpack_from('=7sh', buffer, offset)
+
+        assert data[0] == self.magic
+        assert data[1] == self.version
+
+        return offset + 9
+
     def save(self, file):
         bytes = self.magic
         bytes += struct.pack('h', self.version)
@@ -118,6 +135,21 @@ class Header(object):
         # reserved = data[7]
         # reserved = data[8]
 
+    def loadFromBuffer(self, buffer, offset=0):
+        headerSize = struct.unpack_from('h', buffer, offset)[0]
+        # = prefix tell is to ignore C struct packing rules
+        data = struct.unpack_from('=3BIII3B', buffer, offset + 2)
+
+        self.dataPresenceFlags = data[0]
+        self.bonePresenceFlags = data[1]
+        self.meshPresenceFlags = data[2]
+
+        self.boneCount = data[3]
+        self.meshCount = data[4]
+        self.matCount = data[5]
+
+        return offset + headerSize
+
     def save(self, file):
         bytes = struct.pack('=3BIII3B',
                             self.dataPresenceFlags, self.bonePresenceFlags,
@@ -133,9 +165,11 @@ class Header(object):
 class Bone_t(object):
     """
     The Bone_t class is only ever used to get the size
-    and format character used by weight indices in the semodel
+    and format character used by weight indices in the semodel,
+    struct is the compiled record for a bone index and weight the one
+    for a (bone index, weight value) pair
     """
-    __slots__ = ('size', 'char')
+    __slots__ = ('size', 'char', 'struct', 'weight')
 
     def __init__(self, header):
         if header.boneCount <= 0xFF:
@@ -148,13 +182,18 @@ class Bone_t(object):
             self.size = 4
             self.char = 'I'
 
+        self.struct = _struct('=' + self.char)
+        self.weight = _struct('=%cf' % self.char)
+
 
 class Face_t(object):
     """
     The Face_t class is only ever used to get the size
-    and format character used by face indices in the semodel
+    and format character used by face indices in the semodel,
+    struct is the compiled record for a single index and face the one
+    for a triangle of three indices
     """
-    __slots__ = ('size', 'char')
+    __slots__ = ('size', 'char', 'struct', 'face')
 
     def __init__(self, mesh):
         if mesh.vertexCount <= 0xFF:
@@ -167,6 +206,23 @@ class Face_t(object):
             self.size = 4
             self.char = 'I'
 
+        self.struct = _struct('=' + self.char)
+        self.face = _struct('=3' + self.char)
+
+
+def _vertex_size(bone_t, uvSetCount=0, maxSkinInfluence=0,
+                 useNormals=False, useColors=False):
+    """
+    The size in bytes of one vertex across the position, uv, normal,
+    color and weight streams
+    """
+    size = 12 + 8 * uvSetCount
+    if useNormals:
+        size += 12
+    if useColors:
+        size += 4
+    return size + (4 + bone_t.size) * maxSkinInfluence
+
 
 class SimpleMaterialData(object):
     __slots__ = ('diffuseMap', 'normalMap', 'specularMap')
@@ -202,6 +258,12 @@ class SimpleMaterialData(object):
             b = file.read(1)
         self.specularMap = bytes.decode("utf-8")
 
+    def loadFromBuffer(self, buffer, offset):
+        self.diffuseMap, offset = _read_string(buffer, offset)
+        self.normalMap, offset = _read_string(buffer, offset)
+        self.specularMap, offset = _read_string(buffer, offset)
+        return offset
+
     def save(self, file):
         # Diffuse map image
         bytes = struct.pack('%ds' % (len(self.diffuseMap) + 1),
@@ -243,6 +305,16 @@ class Material(object):
         if (self.isSimpleMaterial):
             self.inputData = SimpleMaterialData(file)
 
+    def loadFromBuffer(self, buffer, offset):
+        self.name, offset = _read_string(buffer, offset)
+        self.isSimpleMaterial = struct.unpack_from("?", buffer, offset)[0]
+        offset += 1
+
+        if (self.isSimpleMaterial):
+            self.inputData = SimpleMaterialData()
+            offset = self.inputData.loadFromBuffer(buffer, offset)
+        return offset
+
     def save(self, file):
         bytes = struct.pack('%dsB' % (len(self.name) + 1),
                             self.name.encode(), self.isSimpleMaterial)
@@ -253,7 +325,7 @@ class Material(object):
 
 
 class Bone(object):
-    __slots__ = ('name', 'flags',
+    __slots__ = ('_name', 'flags',
                  'boneParent', 'globalPosition', 'globalRotation',
                  'localPosition', 'localRotation',
                  'scale')
@@ -274,6 +346,15 @@ class Bone(object):
         if file is not None:
             self.load(file)
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        _RENAMES[0] += 1
+
     def load(self, file):
         bytes = b''
         b = file.read(1)
@@ -310,6 +391,33 @@ class Bone(object):
             data = struct.unpack("=3f", bytes)
             self.scale = (data[0], data[1], data[2])
 
+    def loadFromBuffer(self, buffer, offset):
+        self.name, offset = _read_string(buffer, offset)
+        return offset
+
+    def loadDataFromBuffer(self, buffer, offset,
+                           useGlobal=False, useLocal=False, useScale=False):
+        self.flags, self.boneParent = struct.unpack_from("=Bi", buffer, offset)
+        offset += 5
+
+        if useGlobal:
+            data = struct.unpack_from("=7f", buffer, offset)
+            self.globalPosition = data[0:3]
+            self.globalRotation = data[3:7]
+            offset += 28
+
+        if useLocal:
+            data = struct.unpack_from("=7f", buffer, offset)
+            self.localPosition = data[0:3]
+            self.localRotation = data[3:7]
+            offset += 28
+
+        if useScale:
+            self.scale = struct.unpack_from("=3f", buffer, offset)
+            offset += 12
+
+        return offset
+
     def save(self, file,
              useGlobal=False, useLocal=False, useScale=False):
         bytes = struct.pack("=Bi", self.flags, self.boneParent)
@@ -350,34 +458,52 @@ class Vertex(object):
     def loadData(file, vertexCount, bone_t,
                  uvSetCount=0, maxSkinInfluence=0,
                  useNormals=False, useColors=False):
+        bytes = file.read(vertexCount * _vertex_size(
+            bone_t, uvSetCount, maxSkinInfluence, useNormals, useColors))
+        return Vertex.loadDataFromBuffer(bytes, 0, vertexCount, bone_t,
+                                         uvSetCount, maxSkinInfluence,
+                                         useNormals, useColors)[0]
+
+    @staticmethod
+    def loadDataFromBuffer(buffer, offset, vertexCount, bone_t,
+                           uvSetCount=0, maxSkinInfluence=0,
+                           useNormals=False, useColors=False):
+        """
+        Decodes the vertex streams of a mesh from buffer, returns the
+        vertices and the offset just past the streams
+        """
         # Preallocate verticies
         vertex_buffer = [None] * vertexCount
 
         # Positions first
-        bytes = file.read(12 * vertexCount)
-        data_pos = struct.unpack("=%df" % (3 * vertexCount), bytes)
+        data_pos = struct.unpack_from("=%df" % (3 * vertexCount),
+                                      buffer, offset)
+        offset += 12 * vertexCount
 
         # UVLayers
-        bytes = file.read((8 * uvSetCount) * vertexCount)
-        data_uvs = struct.unpack(
-            "=%df" % ((2 * uvSetCount) * vertexCount), bytes)
+        data_uvs = struct.unpack_from(
+            "=%df" % ((2 * uvSetCount) * vertexCount), buffer, offset)
+        offset += (8 * uvSetCount) * vertexCount
 
         # Normals
         if useNormals:
-            bytes = file.read(12 * vertexCount)
-            data_norms = struct.unpack("=%df" % (3 * vertexCount), bytes)
+            data_norms = struct.unpack_from("=%df" % (3 * vertexCount),
+                                            buffer, offset)
+            offset += 12 * vertexCount
 
         # Colors
         if useColors:
-            bytes = file.read(4 * vertexCount)
-            data_colors = struct.unpack("=%dB" % (4 * vertexCount), bytes)
+            data_colors = struct.unpack_from("=%dB" % (4 * vertexCount),
+                                             buffer, offset)
+            offset += 4 * vertexCount
 
-        # Weights
-        bytes = file.read(((4 + bone_t.size) * maxSkinInfluence) * vertexCount)
-        data_weights = struct.unpack(
-            "=" + ((("%cf" % bone_t.char) * maxSkinInfluence) * vertexCount), bytes)
+        # Weights, as (bone index, weight value) pairs
+        end = offset + ((4 + bone_t.size) * maxSkinInfluence) * vertexCount
+        data_weights = list(bone_t.weight.iter_unpack(
+            memoryview(buffer)[offset:end]))
+        offset = end
 
-        for vert_idx in xrange(vertexCount):
+        for vert_idx in range(vertexCount):
             # Initialize vertex, assign position
             vertex_buffer[vert_idx] = Vertex(
                 uvSetCount=uvSetCount, maxSkinInfluence=maxSkinInfluence)
@@ -388,7 +514,7 @@ class Vertex(object):
                 uv_layers = data_uvs[vert_idx *
                                      (2 * uvSetCount):(vert_idx *
                                                        (2 * uvSetCount)) + 2 * uvSetCount]
-                for uvi in xrange(uvSetCount):
+                for uvi in range(uvSetCount):
                     vertex_buffer[vert_idx].uvLayers[uvi] = uv_layers[uvi *
                                                                       2:(uvi * 2) + 2]
 
@@ -401,14 +527,11 @@ class Vertex(object):
                     color[0] / 255, color[1] / 255, color[2] / 255, color[3] / 255)
 
             if maxSkinInfluence > 0:
-                weights = data_weights[vert_idx *
-                                       (2 * maxSkinInfluence):(vert_idx *
-                                                               (2 * maxSkinInfluence)) + (2 * maxSkinInfluence)]
-                for weight in xrange(maxSkinInfluence):
-                    vertex_buffer[vert_idx].weights[weight] = weights[weight *
-                                                                      2:(weight * 2) + 2]
+                start = vert_idx * maxSkinInfluence
+                vertex_buffer[vert_idx].weights = data_weights[
+                    start:start + maxSkinInfluence]
 
-        return vertex_buffer
+        return vertex_buffer, offset
 
     def savePosition(self, file):
         bytes = struct.pack(
@@ -416,7 +539,7 @@ class Vertex(object):
         file.write(bytes)
 
     def saveUVLayers(self, file, matReferenceCount):
-        for _idx in xrange(matReferenceCount):
+        for _idx in range(matReferenceCount):
             if _idx < len(self.uvLayers):
                 bytes = struct.pack(
                     "=2f", self.uvLayers[_idx][0], self.uvLayers[_idx][1])
@@ -437,14 +560,13 @@ class Vertex(object):
         file.write(bytes)
 
     def saveWeights(self, file, maxSkinInfluence, bone_t):
-        for _idx in xrange(maxSkinInfluence):
+        for _idx in range(maxSkinInfluence):
             if _idx < len(self.weights):
-                bytes = struct.pack(
-                    "=%cf" % bone_t.char, self.weights[_idx][0], self.weights[_idx][1])
+                bytes = bone_t.weight.pack(
+                    self.weights[_idx][0], self.weights[_idx][1])
                 file.write(bytes)
             else:
-                bytes = struct.pack(
-                    "=%cf" % bone_t.char, 0, 0)
+                bytes = bone_t.weight.pack(0, 0)
                 file.write(bytes)
 
 
@@ -458,21 +580,222 @@ class Face(object):
     def loadData(file, faceCount, face_t):
         # Load variable length face buffer
         bytes = file.read((3 * face_t.size) * faceCount)
-        data = struct.unpack("=%d%c" % ((faceCount * 3), face_t.char), bytes)
 
         # Create and return face buffer
-        face_buffer = [None] * faceCount
-        for face_idx, face_data in enumerate((data[i:i + 3] for i in xrange(0, len(data), 3))):
-            face_buffer[face_idx] = Face(face_data)
+        return [Face(face_data)
+                for face_data in face_t.face.iter_unpack(bytes)]
 
-        return face_buffer
+    @staticmethod
+    def loadDataFromBuffer(buffer, offset, faceCount, face_t):
+        end = offset + (3 * face_t.size) * faceCount
+        return [Face(face_data) for face_data in face_t.face.iter_unpack(
+            memoryview(buffer)[offset:end])], end
 
     def save(self, file, face_t):
-        bytes = struct.pack("=3%c" % face_t.char,
-                            self.indices[0], self.indices[1], self.indices[2])
+        bytes = face_t.face.pack(
+            self.indices[0], self.indices[1], self.indices[2])
         file.write(bytes)
 
 
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("numpy is required for array backed meshes")
+
+
+class VertexArray(object):
+    """
+    The vertices of a mesh backed by numpy arrays, one row per vertex:
+    positions (N, 3), uvLayers (N, U, 2), normals (N, 3) or None, colors
+    (N, 4) uint8 or None, and weightBones and weightValues (N, W) for the
+    (bone index, weight value) pairs. Missing normals and colors read as
+    the Vertex defaults
+
+    It behaves like a read only list of Vertex objects, so existing code
+    iterating over a mesh keeps working, to_vertices converts it
+    """
+    __slots__ = ('positions', 'uvLayers', 'normals', 'colors',
+                 'weightBones', 'weightValues')
+
+    def __init__(self, positions, uvLayers, normals=None, colors=None,
+                 weightBones=None, weightValues=None):
+        self.positions = positions
+        self.uvLayers = uvLayers
+        self.normals = normals
+        self.colors = colors
+        if weightBones is None:
+            weightBones = numpy.zeros((len(positions), 0), numpy.uint32)
+            weightValues = numpy.zeros((len(positions), 0), 'f')
+        self.weightBones = weightBones
+        self.weightValues = weightValues
+
+    @staticmethod
+    def fromVertices(vertices, uvSetCount, maxSkinInfluence,
+                     useNormals=True, useColors=True):
+        """
+        Builds a VertexArray from a list of Vertex objects, with uvSetCount
+        layers and maxSkinInfluence weights per vertex, the normals and
+        colors are only kept when useNormals and useColors are set
+        """
+        _require_numpy()
+        count = len(vertices)
+
+        def gather(values, dtype, shape):
+            return numpy.array(values, dtype).reshape((count,) + shape)
+
+        normals = colors = None
+        if useNormals:
+            normals = gather([vertex.normal for vertex in vertices], 'f',
+                             (3,))
+        if useColors:
+            colors = numpy.rint(gather([vertex.color for vertex in vertices],
+                                       numpy.float64, (4,)) * 255.0)
+            colors = colors.astype(numpy.uint8)
+
+        weights = [vertex.weights for vertex in vertices]
+        return VertexArray(
+            gather([vertex.position for vertex in vertices], 'f', (3,)),
+            gather([vertex.uvLayers for vertex in vertices], 'f',
+                   (uvSetCount, 2)),
+            normals, colors,
+            gather([[bone for bone, _ in pairs] for pairs in weights],
+                   numpy.uint32, (maxSkinInfluence,)),
+            gather([[value for _, value in pairs] for pairs in weights],
+                   'f', (maxSkinInfluence,)))
+
+    def _vertices(self, rows):
+        """
+        Builds Vertex objects for the rows, a slice or index array
+        """
+        uvSetCount = self.uvLayers.shape[1]
+        maxSkinInfluence = self.weightBones.shape[1]
+
+        vertices = []
+        for position in self.positions[rows].tolist():
+            vertex = Vertex(uvSetCount, maxSkinInfluence)
+            vertex.position = tuple(position)
+            vertices.append(vertex)
+        if uvSetCount:
+            for vertex, layers in zip(vertices,
+                                      self.uvLayers[rows].tolist()):
+                vertex.uvLayers = [tuple(layer) for layer in layers]
+        if self.normals is not None:
+            for vertex, normal in zip(vertices, self.normals[rows].tolist()):
+                vertex.normal = tuple(normal)
+        if self.colors is not None:
+            colors = self.colors[rows] / 255.0
+            for vertex, color in zip(vertices, colors.tolist()):
+                vertex.color = tuple(color)
+        if maxSkinInfluence:
+            for vertex, bones, weights in zip(
+                    vertices, self.weightBones[rows].tolist(),
+                    self.weightValues[rows].tolist()):
+                vertex.weights = list(zip(bones, weights))
+        return vertices
+
+    def to_vertices(self):
+        """
+        Returns the vertices as a list of Vertex objects
+        """
+        return self._vertices(slice(None))
+
+    def uses(self):
+        """
+        Returns whether any vertex has uv layers, weights, a color other
+        than white and a normal other than zero, the mesh presence flags
+        Model.update_metadata sets
+        """
+        count = len(self)
+        return (bool(count and self.uvLayers.shape[1]),
+                bool(count and self.weightBones.shape[1]),
+                self.colors is not None and bool((self.colors != 255).any()),
+                self.normals is not None and bool(self.normals.any()))
+
+    def pack(self, uvSetCount, maxSkinInfluence, bone_t, useUVs=False,
+             useNormals=False, useColors=False, useWeights=False):
+        """
+        Returns the vertex streams the way Mesh.save writes them, uv layers
+        and weights are padded out to uvSetCount and maxSkinInfluence
+        """
+        count = len(self)
+        streams = [numpy.asarray(self.positions, '=f4').tobytes()]
+
+        if useUVs:
+            uvs = numpy.zeros((count, uvSetCount, 2), '=f4')
+            layers = min(uvSetCount, self.uvLayers.shape[1])
+            uvs[:, :layers] = self.uvLayers[:, :layers]
+            streams.append(uvs.tobytes())
+        if useNormals:
+            normals = self.normals
+            if normals is None:
+                normals = numpy.zeros((count, 3))
+            streams.append(numpy.asarray(normals, '=f4').tobytes())
+        if useColors:
+            colors = self.colors
+            if colors is None:
+                colors = numpy.full((count, 4), 255)
+            streams.append(numpy.asarray(colors, numpy.uint8).tobytes())
+        if useWeights:
+            weights = numpy.zeros((count, maxSkinInfluence), numpy.dtype(
+                [('bone', '=' + bone_t.char), ('value', '=f4')]))
+            influences = min(maxSkinInfluence, self.weightBones.shape[1])
+            weights['bone'][:, :influences] = \
+                self.weightBones[:, :influences]
+            weights['value'][:, :influences] = \
+                self.weightValues[:, :influences]
+            streams.append(weights.tobytes())
+
+        return b''.join(streams)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.to_vertices())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._vertices(index)
+        return self._vertices(slice(index, index + 1 or None))[0]
+
+
+class FaceArray(object):
+    """
+    The faces of a mesh backed by an (N, 3) numpy array of vertex indices,
+    it behaves like a read only list of Face objects
+    """
+    __slots__ = ('indices',)
+
+    def __init__(self, indices):
+        self.indices = indices
+
+    @staticmethod
+    def fromFaces(faces):
+        """
+        Builds a FaceArray from a list of Face objects
+        """
+        _require_numpy()
+        return FaceArray(numpy.array([face.indices for face in faces],
+                                     numpy.uint32).reshape(len(faces), 3))
+
+    def to_faces(self):
+        """
+        Returns the faces as a list of Face objects
+        """
+        return [Face(tuple(indices)) for indices in self.indices.tolist()]
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        return iter(self.to_faces())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Face(tuple(indices))
+                    for indices in self.indices[index].tolist()]
+        return Face(tuple(self.indices[index].tolist()))
+
+
 class Mesh(object):
     __slots__ = ('flags', 'vertexCount', 'faceCount',
                  'vertices', 'faces',
@@ -500,7 +823,7 @@ class Mesh(object):
 
     def load(self, file, bone_t,
              useUVs=False, useNormals=False,
-             useColors=False, useWeights=False):
+             useColors=False, useWeights=False, spans=None):
         bytes = file.read(11)
         data = struct.unpack("=3BII", bytes)
         self.flags = data[0]
@@ -526,71 +849,381 @@ class Mesh(object):
         self.vertices = Vertex.loadData(file, self.vertexCount, bone_t,
                                         self.matReferenceCount, self.maxSkinInfluence,
                                         useNormals, useColors)
+        if spans is not None:
+            spans.add('vertices', file.tell())
 
         # Load face buffer
         self.faces = Face.loadData(file, self.faceCount, face_t)
+        if spans is not None:
+            spans.add('faces', file.tell())
 
         # Load material reference buffer (signed int32_t's per count)
-        for mat_idx in xrange(self.matReferenceCount):
+        for mat_idx in range(self.matReferenceCount):
             self.materialReferences[mat_idx] = struct.unpack("i", file.read(4))[
                 0]
+        if spans is not None:
+            spans.add('material_references', file.tell())
+
+    def loadFromBuffer(self, buffer, offset, bone_t,
+                       useUVs=False, useNormals=False,
+                       useColors=False, useWeights=False, spans=None):
+        """
+        Decodes the mesh from buffer, returns the offset just past it
+        """
+        data = struct.unpack_from("=3BII", buffer, offset)
+        offset += 11
+        self.flags = data[0]
+
+        self.matReferenceCount = data[1] if useUVs else 0
+        self.maxSkinInfluence = data[2] if useWeights else 0
 
-    def save(self, file, bone_t, useUVs=False, useNormals=False, useColors=False, useWeights=False):
+        self.vertexCount = data[3]
+        self.faceCount = data[4]
+
+        face_t = Face_t(self)
+
+        self.vertices, offset = Vertex.loadDataFromBuffer(
+            buffer, offset, self.vertexCount, bone_t,
+            self.matReferenceCount, self.maxSkinInfluence,
+            useNormals, useColors)
+        if spans is not None:
+            spans.add('vertices', offset)
+
+        self.faces, offset = Face.loadDataFromBuffer(
+            buffer, offset, self.faceCount, face_t)
+        if spans is not None:
+            spans.add('faces', offset)
+
+        # Material reference buffer (signed int32_t's per count)
+        self.materialReferences = list(struct.unpack_from(
+            "=%di" % self.matReferenceCount, buffer, offset))
+        offset += 4 * self.matReferenceCount
+        if spans is not None:
+            spans.add('material_references', offset)
+
+        return offset
+
+    def save(self, file, bone_t, useUVs=False, useNormals=False,
+             useColors=False, useWeights=False, spans=None):
         # Update metadata first
         self.vertexCount = len(self.vertices)
         self.faceCount = len(self.faces)
 
         face_t = Face_t(self)
 
-        for vertex in self.vertices:
-            if len(vertex.uvLayers) > self.matReferenceCount:
-                self.matReferenceCount = len(vertex.uvLayers)
-            if len(vertex.weights) > self.maxSkinInfluence:
-                self.maxSkinInfluence = len(vertex.weights)
-
-        # Ensure we have enough references per layer, if not, default to no material
-        if len(self.materialReferences) < self.matReferenceCount:
-            for _idx in xrange(self.matReferenceCount - len(self.materialReferences)):
-                self.materialReferences.append(-1)
+        vertices = self.vertices
+        if isinstance(vertices, VertexArray):
+            self.matReferenceCount = max(self.matReferenceCount,
+                                         vertices.uvLayers.shape[1])
+            self.maxSkinInfluence = max(self.maxSkinInfluence,
+                                        vertices.weightBones.shape[1])
+        else:
+            for vertex in vertices:
+                if len(vertex.uvLayers) > self.matReferenceCount:
+                    self.matReferenceCount = len(vertex.uvLayers)
+                if len(vertex.weights) > self.maxSkinInfluence:
+                    self.maxSkinInfluence = len(vertex.weights)
+
+        # Ensure we have enough references per layer, if not, default to no
+        # material
+        missing = self.matReferenceCount - len(self.materialReferences)
+        if missing > 0:
+            self.materialReferences.extend([-1] * missing)
 
         bytes = struct.pack("=3BII", self.flags, self.matReferenceCount,
                             self.maxSkinInfluence, self.vertexCount, self.faceCount)
         file.write(bytes)
 
         # Produce vertex buffer by data type
-        for vertex in self.vertices:
-            vertex.savePosition(file)
+        if isinstance(vertices, VertexArray):
+            file.write(vertices.pack(self.matReferenceCount,
+                                     self.maxSkinInfluence, bone_t, useUVs,
+                                     useNormals, useColors, useWeights))
+        else:
+            for vertex in vertices:
+                vertex.savePosition(file)
 
-        if useUVs:
-            for vertex in self.vertices:
-                vertex.saveUVLayers(file, self.matReferenceCount)
+            if useUVs:
+                for vertex in vertices:
+                    vertex.saveUVLayers(file, self.matReferenceCount)
 
-        if useNormals:
-            for vertex in self.vertices:
-                vertex.saveNormal(file)
+            if useNormals:
+                for vertex in vertices:
+                    vertex.saveNormal(file)
 
-        if useColors:
-            for vertex in self.vertices:
-                vertex.saveColor(file)
+            if useColors:
+                for vertex in vertices:
+                    vertex.saveColor(file)
 
-        if useWeights:
-            for vertex in self.vertices:
-                vertex.saveWeights(file, self.maxSkinInfluence, bone_t)
+            if useWeights:
+                for vertex in vertices:
+                    vertex.saveWeights(file, self.maxSkinInfluence, bone_t)
+        if spans is not None:
+            spans.add('vertices', file.tell())
 
         # Produce the face buffer
-        for face in self.faces:
-            face.save(file, face_t)
+        if isinstance(self.faces, FaceArray):
+            file.write(numpy.asarray(self.faces.indices,
+                                     '=' + face_t.char).tobytes())
+        else:
+            for face in self.faces:
+                face.save(file, face_t)
+        if spans is not None:
+            spans.add('faces', file.tell())
 
         # Produce material indices
         for matIndex in self.materialReferences:
             bytes = struct.pack("i", matIndex)
             file.write(bytes)
+        if spans is not None:
+            spans.add('material_references', file.tell())
+
+    def to_vertices(self):
+        """
+        Converts array backed vertices and faces to lists of Vertex and
+        Face objects
+        """
+        if isinstance(self.vertices, VertexArray):
+            self.vertices = self.vertices.to_vertices()
+        if isinstance(self.faces, FaceArray):
+            self.faces = self.faces.to_faces()
+
+
+MeshSummary = collections.namedtuple('MeshSummary', (
+    'flags', 'matReferenceCount', 'maxSkinInfluence',
+    'vertexCount', 'faceCount'
+))
+
+ModelSummary = collections.namedtuple('ModelSummary', (
+    'dataPresenceFlags', 'bonePresenceFlags', 'meshPresenceFlags',
+    'boneCount', 'meshCount', 'matCount',
+    'vertexCount', 'faceCount',
+    'boneNames', 'meshes', 'materialNames'
+))
+
+
+def _bone_size(bonePresenceFlags):
+    """
+    Returns the size in bytes of one bone record for the given flags
+    """
+    flags = SEMODEL_BONEPRESENCE_FLAGS
+    boneSize = 5
+    if bonePresenceFlags & flags.SEMODEL_PRESENCE_GLOBAL_MATRIX:
+        boneSize += 28
+    if bonePresenceFlags & flags.SEMODEL_PRESENCE_LOCAL_MATRIX:
+        boneSize += 28
+    if bonePresenceFlags & flags.SEMODEL_PRESENCE_SCALES:
+        boneSize += 12
+    return boneSize
+
+
+def probe(path):
+    """
+    Reads only the header, bone names, mesh headers and material names of
+    the semodel at path, bone, vertex and face payloads are skipped using
+    the sizes computed from the header counts
+
+    Returns a ModelSummary, where meshes is a tuple of MeshSummary entries
+    and vertexCount / faceCount are totals over every mesh
+    """
+    buffer = _map_file(path)
+
+    offset = Info().loadFromBuffer(buffer)
+    header = Header()
+    offset = header.loadFromBuffer(buffer, offset)
+
+    bone_t = Bone_t(header)
+
+    dataPresenceFlags = header.dataPresenceFlags
+    bonePresenceFlags = header.bonePresenceFlags
+    meshPresenceFlags = header.meshPresenceFlags
+
+    boneNames = []
+    if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_BONE:
+        for i in range(header.boneCount):
+            name, offset = _read_string(buffer, offset)
+            boneNames.append(name)
+
+        boneSize = _bone_size(bonePresenceFlags)
+        offset += boneSize * header.boneCount
+
+    meshes = []
+    if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MESH:
+        flags = SEMODEL_MESHPRESENCE_FLAGS
+        useUVs = meshPresenceFlags & flags.SEMODEL_PRESENCE_UVSET
+        useNormals = meshPresenceFlags & flags.SEMODEL_PRESENCE_NORMALS
+        useColors = meshPresenceFlags & flags.SEMODEL_PRESENCE_COLOR
+        useWeights = meshPresenceFlags & flags.SEMODEL_PRESENCE_WEIGHTS
+
+        for i in range(header.meshCount):
+            data = struct.unpack_from('=3BII', buffer, offset)
+            mesh = MeshSummary(data[0],
+                               data[1] if useUVs else 0,
+                               data[2] if useWeights else 0,
+                               data[3], data[4])
+            offset += 11
+
+            offset += mesh.vertexCount * _vertex_size(
+                bone_t, mesh.matReferenceCount, mesh.maxSkinInfluence,
+                useNormals, useColors)
+            offset += 3 * Face_t(mesh).size * mesh.faceCount
+            offset += 4 * mesh.matReferenceCount
+
+            meshes.append(mesh)
+
+    materialNames = []
+    if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MATERIALS:
+        for i in range(header.matCount):
+            name, offset = _read_string(buffer, offset)
+            materialNames.append(name)
+
+            isSimpleMaterial = struct.unpack_from('?', buffer, offset)[0]
+            offset += 1
+            if isSimpleMaterial:
+                for image in range(3):
+                    offset = _read_string(buffer, offset)[1]
+
+    return ModelSummary(header.dataPresenceFlags, header.bonePresenceFlags,
+                        header.meshPresenceFlags, header.boneCount,
+                        header.meshCount, header.matCount,
+                        sum(mesh.vertexCount for mesh in meshes),
+                        sum(mesh.faceCount for mesh in meshes),
+                        tuple(boneNames), tuple(meshes),
+                        tuple(materialNames))
+
+
+def validate(path):
+    """
+    Checks the structure of the semodel at path without decoding it, only
+    the header and mesh counts are read and every block is skipped by its
+    computed size, no bones, vertices or faces are built. Bone parents,
+    face indices and material references are range checked in place and
+    bone, material and image names must be valid UTF-8
+
+    Raises ValueError describing the first problem found
+    """
+    buffer = _map_file(path)
+    size = len(buffer)
+
+    if size < 11:
+        raise _truncated(buffer, 0, 11, "file info")
+    magic, version = struct.unpack_from('=7sh', buffer, 0)
+    if magic != b'SEModel':
+        raise ValueError("Not a semodel file, bad magic %r" % magic)
+    if version != 1:
+        raise ValueError("Unsupported semodel version %d" % version)
+
+    headerSize = struct.unpack_from('h', buffer, 9)[0]
+    if headerSize < 20:
+        raise ValueError("Header size %d is smaller than 20" % headerSize)
+    if 9 + headerSize > size:
+        raise _truncated(buffer, 9, headerSize, "header")
+
+    header = Header()
+    offset = header.loadFromBuffer(buffer, 9)
+
+    bone_t = Bone_t(header)
+
+    dataPresenceFlags = header.dataPresenceFlags
+    bonePresenceFlags = header.bonePresenceFlags
+    meshPresenceFlags = header.meshPresenceFlags
+
+    if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_BONE:
+        for i in range(header.boneCount):
+            offset = _skip_string(buffer, offset, "bone", i)
+
+        boneSize = _bone_size(bonePresenceFlags)
+        if offset + boneSize * header.boneCount > size:
+            raise _truncated(buffer, offset, boneSize * header.boneCount,
+                             "bone data")
+
+        for i in range(header.boneCount):
+            boneParent = struct.unpack_from('=i', buffer, offset + 1)[0]
+            if not -1 <= boneParent < header.boneCount:
+                raise ValueError("Bone %d at offset %d has parent %d of %d" %
+                                 (i, offset, boneParent, header.boneCount))
+            offset += boneSize
+
+    if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MESH:
+        flags = SEMODEL_MESHPRESENCE_FLAGS
+        useUVs = meshPresenceFlags & flags.SEMODEL_PRESENCE_UVSET
+        useNormals = meshPresenceFlags & flags.SEMODEL_PRESENCE_NORMALS
+        useColors = meshPresenceFlags & flags.SEMODEL_PRESENCE_COLOR
+        useWeights = meshPresenceFlags & flags.SEMODEL_PRESENCE_WEIGHTS
+
+        for i in range(header.meshCount):
+            if offset + 11 > size:
+                raise _truncated(buffer, offset, 11, "header of mesh %d" % i)
+            mesh = MeshSummary(*struct.unpack_from('=3BII', buffer, offset))
+            offset += 11
+
+            matReferenceCount = mesh.matReferenceCount if useUVs else 0
+            maxSkinInfluence = mesh.maxSkinInfluence if useWeights else 0
+
+            vertexSize = mesh.vertexCount * _vertex_size(
+                bone_t, matReferenceCount, maxSkinInfluence,
+                useNormals, useColors)
+            if offset + vertexSize > size:
+                raise _truncated(buffer, offset, vertexSize,
+                                 "vertices of mesh %d" % i)
+            offset += vertexSize
+
+            face_t = Face_t(mesh)
+            faceSize = 3 * face_t.size * mesh.faceCount
+            if offset + faceSize > size:
+                raise _truncated(buffer, offset, faceSize,
+                                 "faces of mesh %d" % i)
+            if faceSize:
+                # Scan the indices in place through a typed view
+                with memoryview(buffer) as view:
+                    with view[offset:offset + faceSize] as faces:
+                        with faces.cast(face_t.char) as indices:
+                            highest = max(indices)
+                if highest >= mesh.vertexCount:
+                    raise ValueError("Mesh %d indexes vertex %d of %d" %
+                                     (i, highest, mesh.vertexCount))
+            offset += faceSize
+
+            if offset + 4 * matReferenceCount > size:
+                raise _truncated(buffer, offset, 4 * matReferenceCount,
+                                 "material references of mesh %d" % i)
+            for reference in range(matReferenceCount):
+                material = struct.unpack_from('=i', buffer, offset)[0]
+                if not -1 <= material < header.matCount:
+                    raise ValueError("Mesh %d references material %d of %d" %
+                                     (i, material, header.matCount))
+                offset += 4
+
+    if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MATERIALS:
+        for i in range(header.matCount):
+            offset = _skip_string(buffer, offset, "material", i)
+            if offset + 1 > size:
+                raise _truncated(buffer, offset, 1, "material %d" % i)
+            isSimpleMaterial = struct.unpack_from('?', buffer, offset)[0]
+            offset += 1
+            if isSimpleMaterial:
+                for image in range(3):
+                    offset = _skip_string(buffer, offset,
+                                          "image of material", i)
+
+    if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_CUSTOM:
+        if offset + 4 > size:
+            raise _truncated(buffer, offset, 4, "custom block size")
+        customSize = struct.unpack_from('=I', buffer, offset)[0]
+        if offset + 4 + customSize > size:
+            raise _truncated(buffer, offset + 4, customSize, "custom block")
+        offset += 4 + customSize
+
+    if offset != size:
+        raise ValueError("%d unexpected bytes after offset %d" %
+                         (size - offset, offset))
 
 
 class Model(object):
-    __slots__ = ('__info', 'info', 'header', 'bones', 'meshes', 'materials')
+    __slots__ = ('__info', 'info', 'header', 'bones', 'meshes', 'materials',
+                 'custom', '_boneIndex')
 
-    def __init__(self, path=None):
+    def __init__(self, path=None, instrument=None):
         self.__info = Info()
         self.header = Header()
 
@@ -598,8 +1231,50 @@ class Model(object):
         self.meshes = []
         self.materials = []
 
+        # The CustomBlock written after the materials, if any
+        self.custom = None
+
+        self._boneIndex = _NameIndex()
+
         if path is not None:
-            self.load(path)
+            self.load(path, instrument)
+
+    def bone_index(self, name, any_namespace=False):
+        """
+        Returns the index of the first bone named name, or -1. When
+        any_namespace is set and there is no exact match, a bone whose name
+        matches once namespaces are stripped from both is used, as long as
+        only one bone matches
+
+        Lookups go through name maps that are built on first use and
+        rebuilt by themselves once bones are added, removed or renamed, or
+        the list is replaced. Reordering bones is noticed on the next hit.
+        A bone named before the maps were built that is then put in the
+        list in place of another isn't, call invalidate_bone_index after
+        """
+        return self._boneIndex.find(self.bones, name, any_namespace)
+
+    def get_bone(self, name, any_namespace=False):
+        """
+        Returns the bone for name, or None, see bone_index
+        """
+        index = self._boneIndex.find(self.bones, name, any_namespace)
+        if index < 0:
+            return None
+        return self.bones[index]
+
+    def invalidate_bone_index(self):
+        """
+        Drops the name map used by bone_index and get_bone
+        """
+        self._boneIndex = _NameIndex()
+
+    def to_vertices(self):
+        """
+        Converts every array backed mesh to Vertex and Face lists
+        """
+        for mesh in self.meshes:
+            mesh.to_vertices()
 
     def update_metadata(self):
         header = self.header
@@ -617,6 +1292,11 @@ class Model(object):
             dataPresenceFlags |= SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MESH
         if header.matCount:
             dataPresenceFlags |= SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MATERIALS
+        if self.custom is not None:
+            dataPresenceFlags |= SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_CUSTOM
+        else:
+            dataPresenceFlags &= \
+                ~SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_CUSTOM
 
         # Check for non-default scale, local, global values
         useScales = False
@@ -649,6 +1329,14 @@ class Model(object):
         useWeights = False
 
         for mesh in self.meshes:
+            if isinstance(mesh.vertices, VertexArray):
+                uses = mesh.vertices.uses()
+                useUVSet = useUVSet or uses[0]
+                useWeights = useWeights or uses[1]
+                useColors = useColors or uses[2]
+                useNormals = useNormals or uses[3]
+                continue
+
             for vertex in mesh.vertices:
                 if len(vertex.uvLayers):
                     useUVSet = True
@@ -681,19 +1369,87 @@ class Model(object):
         header.bonePresenceFlags = bonePresenceFlags
         header.meshPresenceFlags = meshPresenceFlags
 
-    def load(self, path):
+    def load(self, path, instrument=None):
+        """
+        Loads the model from path, when instrument is given it is called as
+        instrument(phase, seconds, size) for the 'read', 'header',
+        'bone_names', 'bones', 'vertices', 'faces', 'material_references',
+        'materials' and 'custom' phases, then once for 'total' with the
+        file size
+
+        A custom block is never decoded, custom views it in the loaded
+        buffer. To leave it on disk until used, load a memory mapped file
+        with from_buffer
+        """
         if LOG_READ_TIME:
-            time_start = time.time()
             print("Loading: '%s'" % path)
+            if instrument is None:
+                instrument = _print_span
+
+        spans = None
+        if instrument is not None:
+            spans = _Spans(instrument)
 
+        # Read the whole file up front, everything below decodes out of
+        # this buffer with unpack_from instead of issuing small reads
         try:
-            file = open(path, "rb")
-        except IOError:
+            with open(path, "rb") as file:
+                buffer = file.read()
+        except (IOError, OSError):
             print("Could not open file for reading:\n %s" % path)
             return
 
-        self.info = Info(file)
-        self.header = Header(file)
+        if spans is not None:
+            spans.mark('read', 0, len(buffer))
+
+        self._parse(buffer, spans)
+
+    def loadFromBuffer(self, buffer, instrument=None):
+        """
+        Loads the model from an in memory buffer, anything supporting the
+        buffer protocol works and it is read in place without being copied.
+        Takes the same instrument as load, less the 'read' phase
+        """
+        spans = None
+        if instrument is not None:
+            spans = _Spans(instrument)
+
+        self._parse(_as_buffer(buffer), spans)
+
+    @classmethod
+    def from_bytes(cls, data, instrument=None):
+        """
+        Returns a new Model parsed from bytes or bytearray data
+        """
+        model = cls()
+        model.loadFromBuffer(data, instrument)
+        return model
+
+    @classmethod
+    def from_buffer(cls, buffer, instrument=None):
+        """
+        Returns a new Model parsed in place from a memoryview, mmap or any
+        other object supporting the buffer protocol
+        """
+        model = cls()
+        model.loadFromBuffer(buffer, instrument)
+        return model
+
+    @classmethod
+    def from_stream(cls, stream, instrument=None):
+        """
+        Returns a new Model parsed from the rest of a readable binary
+        stream, such as an open file or io.BytesIO
+        """
+        return cls.from_bytes(stream.read(), instrument)
+
+    def _parse(self, buffer, spans=None):
+        self.info = Info()
+        offset = self.info.loadFromBuffer(buffer)
+        self.header = Header()
+        offset = self.header.loadFromBuffer(buffer, offset)
+        if spans is not None:
+            spans.mark('header', offset)
 
         # Init the bone_t info
         bone_t = Bone_t(self.header)
@@ -709,13 +1465,18 @@ class Model(object):
             useScale = bonePresenceFlags & SEMODEL_BONEPRESENCE_FLAGS.SEMODEL_PRESENCE_SCALES
 
             # Load bone tag names
-            for i in xrange(self.header.boneCount):
-                self.bones[i] = Bone(file)
+            for i in range(self.header.boneCount):
+                self.bones[i] = Bone()
+                offset = self.bones[i].loadFromBuffer(buffer, offset)
+            if spans is not None:
+                spans.mark('bone_names', offset)
 
             # Load bone data
-            for i in xrange(self.header.boneCount):
-                self.bones[i].loadData(
-                    file, useGlobal, useLocal, useScale)
+            for i in range(self.header.boneCount):
+                offset = self.bones[i].loadDataFromBuffer(
+                    buffer, offset, useGlobal, useLocal, useScale)
+            if spans is not None:
+                spans.mark('bones', offset)
 
         self.meshes = [None] * self.header.meshCount
         if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MESH:
@@ -725,28 +1486,52 @@ class Model(object):
             useWeights = meshPresenceFlags & SEMODEL_MESHPRESENCE_FLAGS.SEMODEL_PRESENCE_WEIGHTS
 
             # Load submeshes
-            for i in xrange(self.header.meshCount):
-                self.meshes[i] = Mesh(
-                    file, bone_t, useUVs, useNormals, useColors, useWeights)
+            for i in range(self.header.meshCount):
+                self.meshes[i] = Mesh()
+                offset = self.meshes[i].loadFromBuffer(
+                    buffer, offset, bone_t, useUVs, useNormals,
+                    useColors, useWeights, spans)
+            if spans is not None:
+                spans.flush()
 
         # Load materials
         self.materials = [None] * self.header.matCount
         if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MATERIALS:
             # Load material entries
-            for i in xrange(self.header.matCount):
-                self.materials[i] = Material(file)
-
-        file.close()
-
-        if LOG_READ_TIME:
-            time_end = time.time()
-            time_elapsed = time_end - time_start
-            print("Done! - Completed in %ss" % time_elapsed)
-
-    def save(self, filepath=""):
+            for i in range(self.header.matCount):
+                self.materials[i] = Material()
+                offset = self.materials[i].loadFromBuffer(buffer, offset)
+
+        if spans is not None:
+            spans.mark('materials', offset)
+
+        # The custom payload is left where it is, only its extent is kept
+        self.custom = None
+        if dataPresenceFlags & SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_CUSTOM:
+            size = struct.unpack_from('=I', buffer, offset)[0]
+            offset += 4
+            if offset + size > len(buffer):
+                raise ValueError("Truncated custom block at offset %d" %
+                                 offset)
+            self.custom = CustomBlock.from_buffer(buffer, offset, size)
+            offset += size
+            if spans is not None:
+                spans.mark('custom', offset)
+
+        if spans is not None:
+            spans.total(len(buffer))
+
+        return offset
+
+    def save(self, filepath="", instrument=None):
+        """
+        Saves the model to filepath, when instrument is given it is called
+        as instrument(phase, seconds, size) for the same phases as load
+        """
         if LOG_WRITE_TIME:
-            time_start = time.time()
             print("Saving: '%s'" % filepath)
+            if instrument is None:
+                instrument = _print_span
 
         try:
             file = open(filepath, "wb")
@@ -754,16 +1539,41 @@ class Model(object):
             print("Could not open the file for writing:\n %s" % filepath)
             return
 
+        with file:
+            self.save_to_stream(file, instrument)
+
+    def to_bytes(self):
+        """
+        Returns the model as the bytes of a .semodel file
+        """
+        stream = io.BytesIO()
+        self.save_to_stream(stream)
+        return stream.getvalue()
+
+    def save_to_stream(self, file, instrument=None):
+        """
+        Writes the model to a writable binary stream, which is left open.
+        Instrumenting a save needs a stream that supports tell
+        """
+        spans = None
+        if instrument is not None:
+            spans = _Spans(instrument)
+            spans.offset = start = file.tell()
+
         # Update the header flags, based on the presence of different data types (Bones, Meshes, Materials)
         self.update_metadata()
 
         self.__info.save(file)
         self.header.save(file)
+        if spans is not None:
+            spans.mark('header', file.tell())
 
         for bone in self.bones:
             bytes = struct.pack(
                 '%ds' % (len(bone.name) + 1), bone.name.encode())
             file.write(bytes)
+        if spans is not None:
+            spans.mark('bone_names', file.tell())
 
         bonePresenceFlags = self.header.bonePresenceFlags
         meshPresenceFlags = self.header.meshPresenceFlags
@@ -781,16 +1591,45 @@ class Model(object):
 
         for bone in self.bones:
             bone.save(file, useGlobals, useLocals, useScales)
+        if spans is not None:
+            spans.mark('bones', file.tell())
 
         for mesh in self.meshes:
-            mesh.save(file, bone_t, useUVSet, useNormal, useColor, useWeights)
+            mesh.save(file, bone_t, useUVSet, useNormal, useColor, useWeights,
+                      spans)
+        if spans is not None:
+            spans.flush()
 
         for mat in self.materials:
             mat.save(file)
 
-        file.close()
+        if spans is not None:
+            spans.mark('materials', file.tell())
 
-        if LOG_WRITE_TIME:
-            time_end = time.time()
-            time_elapsed = time_end - time_start
-            print("Done! - Completed in %ss" % time_elapsed)
+        if self.custom is not None:
+            self.custom.save(file)
+            if spans is not None:
+                spans.mark('custom', file.tell())
+
+        if spans is not None:
+            spans.total(file.tell() - start)
+
+
+def _read_model(path):
+    with open(path, "rb") as file:
+        return Model.from_bytes(file.read())
+
+
+def load_many(paths, workers=None):
+    """
+    Loads many semodel files on a thread pool of workers threads,
+    overlapping file I/O with parsing. Returns an iterator over the Models
+    in the same order as paths, each one is yielded as soon as it and
+    every file before it are loaded. Errors are raised when the failing
+    file is reached
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        for model in _ordered_results(executor, _read_model, paths,
+                                      2 * workers):
+            yield model
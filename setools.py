@@ -0,0 +1,303 @@
+"""
+Command line tools for libraries of .seanim and .semodel files
+
+    python -m setools batch summary path/to/assets
+    python -m setools batch validate path/to/assets --workers 8
+    python -m setools batch check path/to/uploads
+    python -m setools batch resave path/to/assets --output path/to/out
+
+Batch work is split into chunks of files that run on a process pool, so
+each worker only ever holds the file it is working on. check only walks
+the file structure without decoding it, validate also loads every file
+and checks the result
+"""
+import os
+import sys
+import time
+import argparse
+import concurrent.futures
+
+import seanim
+import semodel
+
+# <pep8 compliant>
+
+BATCH_MODES = ('load', 'check', 'validate', 'resave', 'summary')
+
+
+def _load_anim(path):
+    anim = seanim.Anim()
+    anim.load(path)
+    return anim
+
+
+def _load_model(path):
+    model = semodel.Model()
+    model.load(path)
+    return model
+
+
+def _check(condition, message, *args):
+    if not condition:
+        raise ValueError(message % args)
+
+
+def _validate_anim(anim):
+    header = anim.header
+    flags = header.dataPresenceFlags
+
+    if flags & seanim.SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_BONE:
+        _check(len(anim.bones) == header.boneCount,
+               "Read %d bones, header has %d", len(anim.bones),
+               header.boneCount)
+        for bone in anim.bones:
+            _check(bone.max_frame() < header.frameCount,
+                   "Bone '%s' has keys past frame %d", bone.name,
+                   header.frameCount - 1)
+    if flags & seanim.SEANIM_PRESENCE_FLAGS.SEANIM_PRESENCE_NOTE:
+        _check(len(anim.notes) == header.noteCount,
+               "Read %d notes, header has %d", len(anim.notes),
+               header.noteCount)
+
+
+def _validate_model(model):
+    header = model.header
+    flags = header.dataPresenceFlags
+
+    if flags & semodel.SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_BONE:
+        for bone in model.bones:
+            _check(bone.boneParent < header.boneCount,
+                   "Bone '%s' has parent %d of %d bones", bone.name,
+                   bone.boneParent, header.boneCount)
+    if flags & semodel.SEMODEL_PRESENCE_FLAGS.SEMODEL_PRESENCE_MESH:
+        for index, mesh in enumerate(model.meshes):
+            for face in mesh.faces:
+                _check(max(face.indices) < mesh.vertexCount,
+                       "Mesh %d has a face index past %d vertices", index,
+                       mesh.vertexCount)
+            for vertex in mesh.vertices:
+                for bone, weight in vertex.weights:
+                    _check(bone < header.boneCount,
+                           "Mesh %d weights bone %d of %d bones", index,
+                           bone, header.boneCount)
+            for material in mesh.materialReferences:
+                _check(material < header.matCount,
+                       "Mesh %d references material %d of %d", index,
+                       material, header.matCount)
+
+
+def _save_anim(anim, path):
+    anim.save(path,
+              anim.header.dataPropertyFlags &
+              seanim.SEANIM_PROPERTY_FLAGS.SEANIM_PRECISION_HIGH,
+              anim.header.animFlags & seanim.SEANIM_FLAGS.SEANIM_LOOPED)
+
+
+def _save_model(model, path):
+    model.save(path)
+
+
+def _summarize_anim(path):
+    summary = seanim.probe(path)
+    return "anim, %d bones, %d frames at %g fps, %d notes" % (
+        summary.boneCount, summary.frameCount, summary.framerate,
+        summary.noteCount)
+
+
+def _summarize_model(path):
+    summary = semodel.probe(path)
+    return ("model, %d bones, %d meshes, %d vertices, %d faces, "
+            "%d materials" % (summary.boneCount, summary.meshCount,
+                              summary.vertexCount, summary.faceCount,
+                              summary.matCount))
+
+
+# The load, validate, save, summary and structure check functions for each
+# extension
+FORMATS = {
+    '.seanim': (_load_anim, _validate_anim, _save_anim, _summarize_anim,
+                seanim.validate),
+    '.semodel': (_load_model, _validate_model, _save_model, _summarize_model,
+                 semodel.validate),
+}
+
+
+def find_files(paths):
+    """
+    Yields (path, relative path) for every SE file in paths, directories
+    are searched recursively and the relative path is from the directory
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path, os.path.basename(path)
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in FORMATS:
+                    full = os.path.join(root, name)
+                    yield full, os.path.relpath(full, path)
+
+
+def process_file(mode, path, relpath, output=None):
+    """
+    Runs one batch mode over one file, returns a detail string or None,
+    errors are raised
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError("Unknown file type '%s'" % extension)
+    load, validate, save, summarize, check = FORMATS[extension]
+
+    if mode == 'summary':
+        return summarize(path)
+
+    # The loaders print and return when the file can't be opened
+    if not os.path.isfile(path):
+        raise IOError("No such file")
+
+    if mode in ('check', 'validate'):
+        check(path)
+        if mode == 'check':
+            return None
+
+    asset = load(path)
+    if mode == 'validate':
+        validate(asset)
+    elif mode == 'resave':
+        target = os.path.join(output, relpath) if output else path
+        directory = os.path.dirname(target)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # Write next to the target first, so a failed save never leaves a
+        # truncated asset behind
+        temp = target + ".tmp"
+        try:
+            save(asset, temp)
+            os.replace(temp, target)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+    return None
+
+
+def process_chunk(mode, files, output=None):
+    """
+    Runs one batch mode over a chunk of (path, relative path) pairs,
+    returns (path, size, error, detail) for each
+    """
+    results = []
+    for path, relpath in files:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+
+        try:
+            results.append((path, size, None,
+                            process_file(mode, path, relpath, output)))
+        except Exception as error:
+            results.append((path, size, "%s: %s" % (
+                type(error).__name__, error), None))
+    return results
+
+
+def _chunks(files, size):
+    chunk = []
+    for entry in files:
+        chunk.append(entry)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def batch(mode, paths, workers=None, chunk_size=16, output=None,
+          quiet=False, out=sys.stdout, err=sys.stderr):
+    """
+    Runs a batch mode over every SE file in paths, printing failures and
+    summaries as they finish and the totals at the end
+
+    Returns the number of files that failed
+    """
+    if mode not in BATCH_MODES:
+        raise ValueError("Unknown batch mode '%s'" % mode)
+
+    chunks = _chunks(find_files(paths), max(chunk_size, 1))
+    file_count = 0
+    failed = 0
+    total_size = 0
+
+    def report(results):
+        for path, size, error, detail in results:
+            if error is not None:
+                err.write("FAILED %s: %s\n" % (path, error))
+            elif detail is not None:
+                out.write("%s: %s\n" % (path, detail))
+            elif not quiet:
+                out.write("ok %s\n" % path)
+        return len(results), sum([1 for result in results
+                                  if result[2] is not None]), \
+            sum([result[1] for result in results])
+
+    time_start = time.time()
+    if workers is not None and workers <= 1:
+        for chunk in chunks:
+            counts = report(process_chunk(mode, chunk, output))
+            file_count += counts[0]
+            failed += counts[1]
+            total_size += counts[2]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(process_chunk, mode, chunk, output)
+                       for chunk in chunks]
+            for future in concurrent.futures.as_completed(futures):
+                counts = report(future.result())
+                file_count += counts[0]
+                failed += counts[1]
+                total_size += counts[2]
+    time_elapsed = max(time.time() - time_start, 1e-9)
+
+    megabytes = total_size / (1024.0 * 1024.0)
+    out.write("%d files, %d failed, %.2f MB in %.2fs "
+              "(%.1f files/s, %.2f MB/s)\n" % (
+                  file_count, failed, megabytes, time_elapsed,
+                  file_count / time_elapsed, megabytes / time_elapsed))
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="setools", description="Tools for .seanim and .semodel files")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    batch_parser = commands.add_parser(
+        "batch", help="Run a mode over files and directories in parallel")
+    batch_parser.add_argument("mode", choices=BATCH_MODES)
+    batch_parser.add_argument("paths", nargs="+",
+                              help="Files, or directories to search")
+    batch_parser.add_argument("--workers", type=int, default=None,
+                              help="Worker processes, 1 runs in process "
+                              "(default: CPU count)")
+    batch_parser.add_argument("--chunk-size", type=int, default=16,
+                              help="Files per work unit (default: 16)")
+    batch_parser.add_argument("--output",
+                              help="Directory for resaved files, "
+                              "otherwise files are resaved in place")
+    batch_parser.add_argument("--quiet", action="store_true",
+                              help="Only print failures and totals")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        failed = batch(args.mode, args.paths, args.workers, args.chunk_size,
+                       args.output, args.quiet)
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
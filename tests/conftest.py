@@ -0,0 +1,91 @@
+"""
+Shared anim and model factories, run the suite from the repo root with
+python -m pytest so seanim and semodel import from the working tree
+"""
+import pytest
+
+import seanim
+import semodel
+
+
+def build_anim(bone_count=1, frames=range(100), position=None,
+               rotations=False, arrays=False, names=None, notes=()):
+    """
+    Builds a 30 fps animation with a position key on each of frames for
+    every bone, at (frame, bone index, 0) unless position(frame, index)
+    says otherwise. rotations adds an identity rotation key on each frame
+    and arrays turns the channels into KeyArrays
+    """
+    if names is None:
+        names = ["bone_%d" % index for index in range(bone_count)]
+    if position is None:
+        def position(frame, index):
+            return (float(frame), float(index), 0.0)
+
+    anim = seanim.Anim()
+    anim.header.framerate = 30
+    for index, name in enumerate(names):
+        bone = seanim.Bone()
+        bone.name = name
+        bone.posKeys = [seanim.KeyFrame(frame, position(frame, index))
+                        for frame in frames]
+        if rotations:
+            bone.rotKeys = [seanim.KeyFrame(frame, (0.0, 0.0, 0.0, 1.0))
+                            for frame in frames]
+        if arrays:
+            bone.to_arrays()
+        anim.bones.append(bone)
+
+    for frame, name in notes:
+        anim.notes.add(frame, name)
+    return anim
+
+
+def build_model(names=("root", "arm"), meshes=((2, 2), (1, 0))):
+    """
+    Builds a model with a chain of bones, a mesh of 30 vertices for each
+    (uv layer count, influence count) in meshes, a 'skin' material and a
+    custom block
+    """
+    model = semodel.Model()
+    for index, name in enumerate(names):
+        bone = semodel.Bone()
+        bone.name = name
+        bone.boneParent = index - 1
+        bone.globalPosition = (0.0, float(index), 0.0)
+        bone.localRotation = (0.0, 0.0, 0.5, 0.75)
+        model.bones.append(bone)
+
+    for meshIndex, (uvSetCount, influences) in enumerate(meshes):
+        mesh = semodel.Mesh()
+        for index in range(30):
+            vertex = semodel.Vertex(uvSetCount, influences)
+            vertex.position = (index * 0.1, meshIndex + 0.5, -index * 0.3)
+            vertex.normal = (0.0, 1.0, 0.0)
+            vertex.color = (index % 2, 1, 0, 1)
+            vertex.uvLayers = [(index * 0.01, layer * 0.5)
+                               for layer in range(uvSetCount)]
+            vertex.weights = [(influence, 0.5)
+                              for influence in range(influences)]
+            mesh.vertices.append(vertex)
+        mesh.faces = [semodel.Face((index, index + 1, index + 2))
+                      for index in range(28)]
+        mesh.materialReferences = [0] * uvSetCount
+        model.meshes.append(mesh)
+
+    material = semodel.Material()
+    material.name = "skin"
+    material.inputData.diffuseMap = "skin_d.png"
+    model.materials.append(material)
+    model.custom = semodel.CustomBlock(b"extra")
+    return model
+
+
+@pytest.fixture
+def make_anim():
+    return build_anim
+
+
+@pytest.fixture
+def make_model():
+    return build_model
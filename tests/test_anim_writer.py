@@ -0,0 +1,52 @@
+"""
+Checks the frame count AnimWriter writes when closed
+"""
+import pytest
+
+import seanim
+
+
+def write(path, anim, capacity, custom=None):
+    """Streams anim through an AnimWriter sized for capacity frames"""
+    names = [bone.name for bone in anim.bones]
+    with seanim.AnimWriter(path, names, capacity) as writer:
+        for bone in anim.bones:
+            writer.write_bone(bone)
+        for note in anim.notes:
+            writer.write_note(note)
+        if custom is not None:
+            writer.write_custom(seanim.CustomBlock(custom))
+
+
+@pytest.mark.parametrize("frame_count, capacity", [
+    (100, 200), (100, 1000), (100, 100000), (300, 100000), (300, 1000)])
+def test_close_writes_exact_frame_count(tmp_path, make_anim, frame_count,
+                                        capacity):
+    path = str(tmp_path / "writer.seanim")
+    anim = make_anim(2, range(frame_count), rotations=True,
+                     notes=[(5, "start"), (90, "end")])
+    write(path, anim, capacity, custom=b"payload")
+
+    anim = seanim.Anim(path)
+    assert anim.header.frameCount == frame_count
+    assert [bone.name for bone in anim.bones] == ["bone_0", "bone_1"]
+    keys = anim.bones[1].posKeys
+    assert len(keys) == frame_count
+    assert keys[-1].frame == frame_count - 1
+    assert tuple(keys[-1].data) == (frame_count - 1.0, 1.0, 0.0)
+    assert [(note.frame, note.name) for note in anim.notes] == \
+        [(5, "start"), (90, "end")]
+    assert bytes(anim.custom.data) == b"payload"
+
+
+def test_close_repacks_without_numpy(tmp_path, make_anim, monkeypatch):
+    monkeypatch.setattr(seanim, "numpy", None)
+    path = str(tmp_path / "writer.seanim")
+    write(path, make_anim(2, range(50), rotations=True, notes=[(10, "hit")]),
+          70000)
+
+    monkeypatch.undo()
+    anim = seanim.Anim(path)
+    assert anim.header.frameCount == 50
+    assert anim.bones[0].rotKeys[49].frame == 49
+    assert anim.notes[0].name == "hit"
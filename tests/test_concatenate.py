@@ -0,0 +1,55 @@
+"""
+Regression checks for seanim.concatenate and splice
+"""
+import math
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+import seanim  # noqa: E402
+
+
+def position(frame, index):
+    """The first bone moves, the second stays put"""
+    return (math.sin(frame * 0.3) if index == 0 else 1.0, 0.0, 0.0)
+
+
+@pytest.fixture
+def build_clip(make_anim):
+    def build(frame_count=30, reduce=True):
+        anim = make_anim(frames=range(frame_count), position=position,
+                         rotations=True, names=("mover", "still"))
+        if reduce:
+            anim.reduce()
+        return anim
+    return build
+
+
+def test_blend_with_single_key_middle_clip(build_clip):
+    clips = [build_clip() for _ in range(3)]
+    assert len(clips[1].get_bone("still").posKeys) == 1
+
+    result = seanim.concatenate(clips, blend=5)
+
+    assert result.header.frameCount == 80
+    still = result.get_bone("still")
+    frames = list(still.posKeys.frames)
+    assert frames == sorted(frames)
+    assert numpy.allclose(still.posKeys.data[:, 0], 1.0)
+
+
+def test_blend_of_unreduced_clips_has_no_duplicate_frames(build_clip):
+    result = seanim.concatenate([build_clip(reduce=False)
+                                 for _ in range(4)], blend=3)
+    for bone in result.bones:
+        frames = bone.posKeys.frames
+        assert len(numpy.unique(frames)) == len(frames)
+        assert frames[-1] == result.header.frameCount - 1
+
+
+def test_splice_with_single_key_clip(build_clip):
+    anim = build_clip(reduce=False)
+    result = seanim.splice(anim, build_clip(), 10, blend=4)
+    # Two overlaps of 4 frames each
+    assert result.header.frameCount == 10 + 30 + 20 - 8
@@ -0,0 +1,30 @@
+"""
+Checks lazily loaded animations, whose keys stay in a mapped file
+"""
+import pytest
+
+import seanim
+
+
+@pytest.mark.parametrize("use_arrays", [False, True])
+def test_save_over_the_mapped_file(tmp_path, make_anim, use_arrays):
+    if use_arrays:
+        pytest.importorskip("numpy")
+    path = str(tmp_path / "clip.seanim")
+    anim = make_anim(bone_count=4, frames=range(50))
+    anim.custom = seanim.CustomBlock(b"payload" * 1000)
+    anim.save(path)
+
+    anim = seanim.Anim(path, use_arrays=use_arrays, lazy=True)
+    # Only touch the first bone, the rest are still in the mapping
+    anim.bones[0].posKeys
+    assert not anim.bones[1].is_loaded()
+
+    anim.bones[0].name = "renamed"
+    anim.save(path)
+
+    anim = seanim.Anim(path)
+    assert [bone.name for bone in anim.bones] == \
+        ["renamed", "bone_1", "bone_2", "bone_3"]
+    assert tuple(anim.bones[3].posKeys[49].data) == (49.0, 3.0, 0.0)
+    assert bytes(anim.custom.data) == b"payload" * 1000
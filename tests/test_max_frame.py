@@ -0,0 +1,79 @@
+"""
+Regression checks for Bone.max_frame and the frame count written on save
+"""
+import pytest
+
+import seanim
+
+
+def reload(anim):
+    return seanim.Anim.from_bytes(anim.to_bytes())
+
+
+def test_in_place_frame_edit_after_save(make_anim):
+    anim = reload(make_anim())
+    anim.to_bytes()
+
+    for key in anim.bones[0].posKeys:
+        key.frame += 400
+    anim = reload(anim)
+
+    assert anim.header.frameCount == 500
+    assert anim.bones[0].posKeys[-1].frame == 499
+
+
+def test_replaced_list_item_after_max_frame(make_anim):
+    anim = make_anim()
+    bone = anim.bones[0]
+    assert bone.max_frame() == 99
+
+    bone.posKeys[10] = seanim.KeyFrame(300, (0.0, 0.0, 0.0))
+    assert bone.max_frame() == 300
+    assert reload(anim).header.frameCount == 301
+
+
+def test_extend_helpers_keep_array_tracking():
+    numpy = pytest.importorskip("numpy")
+    bone = seanim.Bone()
+    bone.posKeys = seanim.KeyArray(numpy.arange(10, dtype=numpy.uint32),
+                                   numpy.zeros((10, 3), 'f'))
+    assert bone.max_frame() == 9
+
+    bone.add_pos_key(70000, (0.0, 0.0, 0.0))
+    assert bone.max_frame() == 70000
+
+    anim = seanim.Anim()
+    anim.bones.append(bone)
+    assert reload(anim).header.frameCount == 70001
+
+
+def test_mixed_appends_and_reads_on_arrays():
+    numpy = pytest.importorskip("numpy")
+    bone = seanim.Bone()
+    bone.posKeys = seanim.KeyArray.empty(3)
+    bone.rotKeys = seanim.KeyArray.empty(4)
+
+    for frame in range(10):
+        bone.add_pos_key(frame, (float(frame), 0.0, 0.0))
+    assert len(bone.posKeys) == 10
+    assert bone.posKeys[9].data == (9.0, 0.0, 0.0)
+
+    bone.extend_pos_keys(seanim.KeyArray(
+        numpy.array([20, 21], numpy.uint32), numpy.ones((2, 3), 'f')))
+    bone.add_pos_key(30, (3.0, 0.0, 0.0))
+    bone.add_rot_key(40, (0.0, 0.0, 0.0, 1.0))
+    assert bone.max_frame() == 40
+    assert isinstance(bone.posKeys, seanim.KeyArray)
+    assert bone.posKeys.frames.tolist() == list(range(10)) + [20, 21, 30]
+    assert bone.rotKeys.frames.tolist() == [40]
+
+    # Replacing a channel drops whatever was still queued on it
+    bone.add_pos_key(50, (0.0, 0.0, 0.0))
+    bone.posKeys = seanim.KeyArray.empty(3)
+    assert len(bone.posKeys) == 0
+    assert bone.max_frame() == 40
+
+    anim = seanim.Anim()
+    anim.bones.append(bone)
+    bone.add_scale_key(60, (1.0, 1.0, 1.0))
+    assert reload(anim).header.frameCount == 61
@@ -0,0 +1,99 @@
+"""
+Regression checks for the bone name index of Anim and Model
+"""
+import pytest
+
+import seanim
+import semodel
+
+
+@pytest.fixture(params=[seanim, semodel], ids=["anim", "model"])
+def module(request):
+    return request.param
+
+
+@pytest.fixture
+def make(module, make_anim, make_model):
+    """Builds an Anim or a Model, as module says, with the named bones"""
+    def build(names):
+        if module is seanim:
+            return make_anim(names=names, frames=())
+        return make_model(names=names, meshes=())
+    return build
+
+
+def test_rename_in_place(make):
+    owner = make(["a", "b", "c"])
+    assert owner.bone_index("a") == 0
+
+    owner.bones[0].name = "renamed"
+    assert owner.bone_index("renamed") == 0
+    assert owner.bone_index("a") == -1
+
+
+def test_replace_item(module, make):
+    owner = make(["a", "b", "c"])
+    assert owner.bone_index("b") == 1
+
+    bone = module.Bone()
+    bone.name = "z"
+    owner.bones[1] = bone
+    assert owner.bone_index("z") == 1
+    assert owner.get_bone("z") is bone
+    assert owner.bone_index("b") == -1
+
+
+def test_swap_keeps_same_length(make):
+    owner = make(["a", "b"])
+    assert owner.bone_index("a") == 0
+    owner.bones.reverse()
+    assert owner.bone_index("a") == 1
+    assert owner.bone_index("b") == 0
+
+
+def test_any_namespace_after_rename(make):
+    owner = make(["ns:root", "other:root", "ns:arm"])
+    assert owner.bone_index("root", any_namespace=True) == -1
+
+    owner.bones[1].name = "other:spine"
+    assert owner.bone_index("x:root", any_namespace=True) == 0
+    owner.bones[2].name = "ns:hand"
+    assert owner.bone_index("hand", any_namespace=True) == 2
+
+
+def test_first_duplicate_wins(make):
+    owner = make(["a", "a"])
+    assert owner.bone_index("a") == 0
+
+
+class CountingList(list):
+    """A bone list that counts how often it is walked"""
+    walks = 0
+
+    def __iter__(self):
+        CountingList.walks += 1
+        return list.__iter__(self)
+
+
+def test_misses_use_the_maps(make):
+    owner = make(["ns:root", "ns:arm", "other:leg"])
+    owner.bones = CountingList(owner.bones)
+    assert owner.bone_index("ns:arm") == 1
+
+    walks = CountingList.walks
+    for name in ["missing", "leg", "x:missing"] * 10:
+        assert owner.bone_index(name) == -1
+    assert owner.bone_index("x:leg", any_namespace=True) == 2
+    assert owner.bone_index("x:missing", any_namespace=True) == -1
+    # Only the namespace stripped map was built, once
+    assert CountingList.walks == walks + 1
+
+
+def test_invalidate_after_moving_a_named_bone_in(make):
+    owner = make(["a", "b"])
+    other = make(["c"])
+    assert owner.bone_index("a") == 0
+
+    owner.bones[1] = other.bones[0]
+    owner.invalidate_bone_index()
+    assert owner.bone_index("c") == 1
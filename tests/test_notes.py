@@ -0,0 +1,62 @@
+"""
+Checks that NoteIndex still works like the list of notes it replaced
+"""
+import pytest
+
+import seanim
+
+
+def note(frame, name):
+    result = seanim.Note()
+    result.frame = frame
+    result.name = name
+    return result
+
+
+def pairs(notes):
+    return [(item.frame, item.name) for item in notes]
+
+
+def build_index():
+    return seanim.NoteIndex([(30, "end"), (0, "start"), (10, "step"),
+                             (10, "hit")])
+
+
+def test_slices_are_lists_of_notes():
+    notes = build_index()
+    assert pairs(notes[0:1]) == [(0, "start")]
+    assert pairs(notes[1:3]) == [(10, "step"), (10, "hit")]
+    assert pairs(notes[::-1])[0] == (30, "end")
+    assert notes[5:] == []
+    assert notes[-1].name == "end"
+
+
+def test_list_methods_keep_frame_order():
+    notes = build_index()
+    notes.insert(0, note(20, "mid"))
+    assert pairs(notes)[3] == (20, "mid")
+
+    notes.remove(note(10, "hit"))
+    assert pairs(notes) == [(0, "start"), (10, "step"), (20, "mid"),
+                            (30, "end")]
+    with pytest.raises(ValueError):
+        notes.remove(note(10, "hit"))
+
+    notes += [note(5, "a"), (5, "b")]
+    assert pairs(notes)[1:3] == [(5, "a"), (5, "b")]
+    assert isinstance(notes, seanim.NoteIndex)
+
+    notes.add(5, "0")
+    notes.sort(key=lambda item: item.name)
+    assert pairs(notes)[1:4] == [(5, "0"), (5, "a"), (5, "b")]
+    with pytest.raises(ValueError):
+        notes.sort(reverse=True)
+
+
+def test_anim_notes_round_trip_after_edits():
+    anim = seanim.Anim()
+    anim.notes = [note(8, "b"), note(2, "a")]
+    anim.notes.remove(note(8, "b"))
+    anim.notes += [(4, "c")]
+    anim = seanim.Anim.from_bytes(anim.to_bytes())
+    assert pairs(anim.notes[:]) == [(2, "a"), (4, "c")]
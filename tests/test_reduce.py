@@ -0,0 +1,196 @@
+"""
+Checks that Anim.reduce keeps every original key within tolerance, and
+that resample and convert_type match independent per key math
+"""
+import math
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+import seanim  # noqa: E402
+
+
+def random_rotations(rng, count):
+    """A wandering rotation with random sign flips along the way"""
+    axis = rng.normal(size=(count, 3)).cumsum(axis=0)
+    axis /= numpy.linalg.norm(axis, axis=1)[:, None]
+    angle = rng.normal(0.0, 0.02, count).cumsum()
+    quats = numpy.concatenate((axis * numpy.sin(angle / 2.0)[:, None],
+                               numpy.cos(angle / 2.0)[:, None]), axis=1)
+    quats[rng.random(count) < 0.1] *= -1.0
+    return quats
+
+
+def build_anim(seed=0, arrays=True):
+    rng = numpy.random.default_rng(seed)
+    anim = seanim.Anim()
+    anim.header.framerate = 30
+    for index, count in enumerate((1, 2, 3, 17, 300, 1000, 1000)):
+        frames = numpy.arange(count, dtype=numpy.uint32)
+        if index % 2:
+            # Uneven spacing puts the joining keys off the segment middle
+            frames = numpy.cumsum(rng.integers(1, 4, count)).astype(
+                numpy.uint32)
+        t = frames.astype(numpy.float64)
+        bone = seanim.Bone()
+        bone.name = "bone_%d" % index
+        channels = {
+            'posKeys': numpy.stack((numpy.sin(t * 0.05) * 4.0, t * 0.01,
+                                    rng.normal(0.0, 0.0005, count)), axis=1),
+            'rotKeys': random_rotations(rng, count),
+            'scaleKeys': numpy.ones((count, 3)),
+        }
+        for attribute, data in channels.items():
+            keys = seanim.KeyArray(frames, data.astype('f'))
+            setattr(bone, attribute, keys if arrays else keys.to_keyframes())
+        anim.bones.append(bone)
+    return anim
+
+
+def sample(keys, frames, rotation):
+    """Independent lerp or slerp of a reduced channel at every frame"""
+    keys = seanim.KeyArray.fromKeyFrames(keys, 4 if rotation else 3,
+                                         numpy.float64)
+    data = keys.data.astype(numpy.float64)
+    if rotation:
+        data = data / numpy.linalg.norm(data, axis=1)[:, None]
+    result = []
+    for frame in frames:
+        upper = int(numpy.searchsorted(keys.frames, frame))
+        if upper == 0:
+            result.append(data[0])
+            continue
+        if upper == len(keys.frames):
+            result.append(data[-1])
+            continue
+        lower = upper - 1
+        t = ((frame - float(keys.frames[lower])) /
+             (float(keys.frames[upper]) - float(keys.frames[lower])))
+        a, b = data[lower], data[upper]
+        if not rotation:
+            result.append(a + (b - a) * t)
+            continue
+        if numpy.dot(a, b) < 0:
+            b = -b
+        theta = math.acos(min(abs(float(numpy.dot(a, b))), 1.0))
+        if theta < 1e-6:
+            result.append(a + (b - a) * t)
+        else:
+            result.append((math.sin((1.0 - t) * theta) * a +
+                           math.sin(t * theta) * b) / math.sin(theta))
+    return numpy.array(result)
+
+
+@pytest.mark.parametrize("arrays", [True, False])
+def test_reduce_stays_within_tolerance(arrays):
+    original = build_anim(arrays=arrays)
+    anim = build_anim(arrays=arrays)
+    removed = anim.reduce(pos_tol=0.001, rot_tol_deg=0.01)
+    assert removed > 0
+
+    rot_tol = 1.0 - math.cos(math.radians(0.01) / 2.0)
+    for before, after in zip(original.bones, anim.bones):
+        for attribute, rotation, tolerance in (
+                ('posKeys', False, 0.001 ** 2),
+                ('rotKeys', True, rot_tol),
+                ('scaleKeys', False, 0.0001 ** 2)):
+            source = seanim.KeyArray.fromKeyFrames(
+                getattr(before, attribute), 4 if rotation else 3,
+                numpy.float64)
+            rebuilt = sample(getattr(after, attribute), source.frames,
+                             rotation)
+            data = source.data.astype(numpy.float64)
+            if rotation:
+                data /= numpy.linalg.norm(data, axis=1)[:, None]
+                error = 1.0 - numpy.abs(numpy.einsum('ij,ij->i', rebuilt,
+                                                     data))
+            else:
+                error = ((rebuilt - data) ** 2).sum(axis=1)
+            assert error.max() <= tolerance + 1e-12, (before.name, attribute)
+
+
+def test_reduce_collapses_and_straightens():
+    anim = build_anim()
+    anim.reduce()
+    for bone in anim.bones[1:]:
+        assert len(bone.scaleKeys) == 1
+
+    # A straight line keeps only its ends
+    bone = seanim.Bone()
+    frames = numpy.arange(5000, dtype=numpy.uint32)
+    data = numpy.zeros((5000, 3), 'f')
+    data[:, 0] = frames * 0.5
+    bone.posKeys = seanim.KeyArray(frames, data)
+    anim = seanim.Anim()
+    anim.bones.append(bone)
+    anim.reduce()
+    assert len(bone.posKeys) <= 8
+    assert list(bone.posKeys.frames[[0, -1]]) == [0, 4999]
+
+
+@pytest.mark.parametrize("arrays", [True, False])
+def test_resample_channels_starting_late(arrays):
+    anim = seanim.Anim()
+    anim.header.framerate = 120
+    rng = numpy.random.default_rng(3)
+    for index, first in enumerate((7, 10, 333)):
+        frames = numpy.arange(first, first + 40 * (index + 1), 3,
+                              dtype=numpy.uint32)
+        bone = seanim.Bone()
+        bone.name = "bone_%d" % index
+        keys = seanim.KeyArray(frames, rng.normal(size=(len(frames), 3)))
+        bone.posKeys = keys if arrays else keys.to_keyframes()
+        rotations = seanim.KeyArray(frames,
+                                    random_rotations(rng, len(frames)))
+        bone.rotKeys = rotations if arrays else rotations.to_keyframes()
+        anim.bones.append(bone)
+    original = [(bone.posKeys, bone.rotKeys) for bone in anim.bones]
+
+    anim.resample(30)
+    assert anim.header.framerate == 30
+    for bone, (positions, rotations) in zip(anim.bones, original):
+        source = seanim.KeyArray.fromKeyFrames(positions, 3)
+        frames = seanim.KeyArray.fromKeyFrames(bone.posKeys, 3).frames
+        # Keys start on the new frame nearest the first original key
+        assert frames[0] == round(int(source.frames[0]) / 4.0)
+        assert frames[-1] == round(int(source.frames[-1]) / 4.0)
+        assert list(frames) == list(range(frames[0], frames[-1] + 1))
+
+        expected = sample(positions, frames * 4.0, False)
+        data = seanim.KeyArray.fromKeyFrames(bone.posKeys, 3).data
+        assert numpy.allclose(data, expected, atol=1e-5)
+
+        expected = sample(rotations, frames * 4.0, True)
+        data = seanim.KeyArray.fromKeyFrames(bone.rotKeys, 4).data
+        dots = numpy.abs(numpy.einsum('ij,ij->i', data, expected))
+        assert numpy.allclose(dots, 1.0, atol=1e-5)
+
+
+def test_convert_type_skips_bones_missing_from_the_model(make_anim,
+                                                         make_model):
+    model = make_model(meshes=())
+    for bone in model.bones:
+        bone.localPosition = (1.0, 2.0, 3.0)
+        bone.localRotation = (0.0, 0.0, 0.0, 1.0)
+
+    anim = make_anim(names=("root", "arm", "ghost"), frames=[0],
+                     position=lambda frame, index: (0.5, 0.0, 0.0))
+    anim.header.animType = seanim.SEANIM_TYPE.SEANIM_TYPE_RELATIVE
+    for bone, modifier in zip(anim.bones, (
+            seanim.SEANIM_TYPE.SEANIM_TYPE_ABSOLUTE, None,
+            seanim.SEANIM_TYPE.SEANIM_TYPE_ADDITIVE)):
+        if modifier is not None:
+            bone.useModifier = True
+            bone.modifier = modifier
+        bone.rotKeys = [seanim.KeyFrame(0, (0.0, 0.0, 0.6, 0.8))]
+
+    anim.convert_type(seanim.SEANIM_TYPE.SEANIM_TYPE_ABSOLUTE, model)
+    root, arm, ghost = anim.bones
+    # A modifier applies below its bone, so root keeps the header type
+    assert root.posKeys[0].data == pytest.approx((1.5, 2.0, 3.0))
+    assert arm.posKeys[0].data == pytest.approx((0.5, 0.0, 0.0))
+    # Bones missing from the model keep their keys, whatever their modifier
+    assert ghost.posKeys[0].data == pytest.approx((0.5, 0.0, 0.0))
+    assert ghost.rotKeys[0].data == pytest.approx((0.0, 0.0, 0.6, 0.8))
+    assert not any(bone.useModifier or bone.modifier for bone in anim.bones)
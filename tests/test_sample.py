@@ -0,0 +1,56 @@
+"""
+Checks that Anim.sample keeps up with edits made between calls
+"""
+import pytest
+
+import seanim
+
+
+# A key every 10 frames, at (frame, bone index, 0)
+FRAMES = range(0, 100, 10)
+
+
+@pytest.mark.parametrize("arrays", [False, True])
+def test_sample_only_copies_edited_bones(make_anim, arrays):
+    if arrays:
+        pytest.importorskip("numpy")
+    anim = make_anim(2, FRAMES, rotations=True, arrays=arrays)
+    assert anim.sample(15)[0].pos == (15.0, 0.0, 0.0)
+    channels = list(anim._sampler._channels)
+    assert anim.sample(16)[0].pos == (16.0, 0.0, 0.0)
+    assert anim._sampler._channels == channels
+
+    anim.bones[0].add_pos_key(100, (0.0, 0.0, 0.0))
+    assert anim.sample(95)[0].pos == (45.0, 0.0, 0.0)
+    assert anim._sampler._channels[0] is not channels[0]
+    assert anim._sampler._channels[1] is channels[1]
+
+    anim.bones[1].posKeys = [seanim.KeyFrame(0, (5.0, 0.0, 0.0))]
+    assert anim.sample(95)[1].pos == (5.0, 0.0, 0.0)
+
+    added = seanim.Bone()
+    added.name = "child"
+    anim.bones.append(added)
+    assert anim.sample(95)[2] == seanim.BoneSample(None, None, None)
+    assert anim._sampler.names == ["bone_0", "bone_1", "child"]
+
+
+def test_in_place_list_edits_need_invalidate(make_anim):
+    anim = make_anim(2, FRAMES, rotations=True)
+    assert anim.sample(15)[0].pos == (15.0, 0.0, 0.0)
+
+    anim.bones[0].posKeys[1].data = (0.0, 0.0, 0.0)
+    assert anim.sample(15)[0].pos == (15.0, 0.0, 0.0)
+    anim.invalidate_sampler()
+    assert anim.sample(15)[0].pos == (10.0, 0.0, 0.0)
+
+
+def test_sample_a_lazy_load(tmp_path, make_anim):
+    path = str(tmp_path / "clip.seanim")
+    make_anim(3, FRAMES, rotations=True).save(path)
+
+    anim = seanim.Anim(path, lazy=True)
+    assert anim.sample(15)[2].pos == (15.0, 2.0, 0.0)
+    channels = list(anim._sampler._channels)
+    assert anim.sample(25)[2].pos == (25.0, 2.0, 0.0)
+    assert anim._sampler._channels == channels
@@ -0,0 +1,160 @@
+"""
+Checks that files loaded back from the parse cache, or parsed from memory,
+match a fresh parse
+"""
+import io
+import time
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+import semodel  # noqa: E402
+import secache  # noqa: E402
+
+
+def same_model(a, b):
+    """Compares everything a model load fills in"""
+    assert [getattr(a.header, name) for name in semodel.Header.__slots__] == \
+        [getattr(b.header, name) for name in semodel.Header.__slots__]
+    for first, second in zip(a.bones, b.bones):
+        for name in semodel.Bone.__slots__:
+            assert getattr(first, name) == getattr(second, name)
+    assert len(a.meshes) == len(b.meshes)
+    for first, second in zip(a.meshes, b.meshes):
+        for name in ('flags', 'vertexCount', 'faceCount',
+                     'materialReferences', 'matReferenceCount',
+                     'maxSkinInfluence'):
+            assert getattr(first, name) == getattr(second, name)
+        for u, v in zip(first.vertices, second.vertices):
+            for name in semodel.Vertex.__slots__:
+                assert getattr(u, name) == getattr(v, name), name
+        assert [face.indices for face in first.faces] == \
+            [face.indices for face in second.faces]
+    for first, second in zip(a.materials, b.materials):
+        assert first.name == second.name
+        assert first.isSimpleMaterial == second.isSimpleMaterial
+        for name in semodel.SimpleMaterialData.__slots__:
+            assert getattr(first.inputData, name) == \
+                getattr(second.inputData, name)
+    assert bytes(a.custom.data) == bytes(b.custom.data)
+
+
+def test_model_cache_round_trip(tmp_path, make_model):
+    path = str(tmp_path / "body.semodel")
+    make_model().save(path)
+    expected = semodel.Model(path)
+
+    cache = secache.ModelCache(str(tmp_path / "cache"))
+    same_model(cache.load(path), expected)
+
+    warm = secache.ModelCache(str(tmp_path / "cache")).load(path)
+    same_model(warm, expected)
+    assert warm.meshes[0].vertices[3].color == (1.0, 1.0, 0.0, 1.0)
+    assert len(warm.meshes[0].vertices[3].weights) == 2
+    assert warm.get_bone("arm").boneParent == 0
+    assert bytes(warm.custom.data) == b"extra"
+    assert isinstance(warm.meshes[0].vertices, semodel.VertexArray)
+
+    # Array backed meshes save straight from the mapped arrays
+    with open(path, "rb") as file:
+        assert warm.to_bytes() == file.read()
+
+    lists = secache.ModelCache(str(tmp_path / "cache")).load(
+        path, use_arrays=False)
+    assert isinstance(lists.meshes[1].vertices, list)
+    same_model(lists, expected)
+
+
+def test_model_from_memory(tmp_path, make_model):
+    path = str(tmp_path / "body.semodel")
+    make_model().save(path)
+    expected = semodel.Model(path)
+    with open(path, "rb") as file:
+        data = file.read()
+
+    same_model(semodel.Model.from_bytes(data), expected)
+    same_model(semodel.Model.from_bytes(bytearray(data)), expected)
+    same_model(semodel.Model.from_buffer(memoryview(data)), expected)
+
+    # A stream is read from its current position to the end
+    stream = io.BytesIO(b"head" + data)
+    stream.seek(4)
+    same_model(semodel.Model.from_stream(stream), expected)
+
+    with pytest.raises(ValueError, match="Truncated custom block"):
+        semodel.Model.from_bytes(data[:-3])
+
+
+def test_model_to_memory(tmp_path, make_model):
+    path = str(tmp_path / "body.semodel")
+    model = make_model()
+    model.save(path)
+    with open(path, "rb") as file:
+        data = file.read()
+    assert model.to_bytes() == data
+
+    stream = io.BytesIO()
+    stream.write(b"head")
+    model.save_to_stream(stream)
+    assert not stream.closed
+    assert stream.getvalue() == b"head" + data
+
+
+def test_model_cache_hit_beats_a_parse(tmp_path):
+    count = 60000
+    rng = numpy.random.default_rng(0)
+    model = semodel.Model()
+    bone = semodel.Bone()
+    bone.name = "root"
+    bone.boneParent = -1
+    model.bones.append(bone)
+    mesh = semodel.Mesh()
+    mesh.vertices = semodel.VertexArray(
+        rng.random((count, 3), 'f'), rng.random((count, 1, 2), 'f'),
+        rng.random((count, 3), 'f'), None,
+        numpy.zeros((count, 1), numpy.uint32), numpy.ones((count, 1), 'f'))
+    mesh.faces = semodel.FaceArray(
+        rng.integers(0, count, (count, 3)).astype(numpy.uint32))
+    mesh.materialReferences = [0]
+    model.meshes.append(mesh)
+    path = str(tmp_path / "dense.semodel")
+    model.save(path)
+
+    start = time.perf_counter()
+    parsed = semodel.Model(path)
+    parse = time.perf_counter() - start
+
+    directory = str(tmp_path / "cache")
+    secache.ModelCache(directory).load(path)
+    start = time.perf_counter()
+    warm = secache.ModelCache(directory).load(path)
+    hit = time.perf_counter() - start
+
+    assert hit < parse
+    assert len(warm.meshes[0].vertices) == count
+    assert warm.meshes[0].vertices[-1].position == \
+        parsed.meshes[0].vertices[-1].position
+    assert warm.meshes[0].faces[7].indices == parsed.meshes[0].faces[7].indices
+
+
+def test_caches_share_a_directory(tmp_path, make_anim, make_model):
+    model_path = str(tmp_path / "body.semodel")
+    anim_path = str(tmp_path / "clip.seanim")
+    make_model().save(model_path)
+    make_anim(frames=range(20)).save(anim_path)
+
+    directory = str(tmp_path / "cache")
+    secache.ModelCache(directory).load(model_path)
+    secache.AnimCache(directory).load(anim_path)
+
+    anims = secache.AnimCache(directory)
+    models = secache.ModelCache(directory)
+    assert len(models.entries()) == 2
+    anim = anims.load(anim_path, use_arrays=False)
+    assert anim.bones[0].posKeys[19].data == (19.0, 0.0, 0.0)
+    assert models.load(model_path).materials[0].name == "skin"
+
+    models.max_bytes = 0
+    models.evict()
+    assert models.entries() == []
@@ -0,0 +1,70 @@
+"""
+Checks that seanim and semodel validate reject names that aren't UTF-8,
+and accept the widest index and frame widths
+"""
+import pytest
+
+import seanim
+import semodel
+
+
+def corrupt(path, name):
+    """Swaps the second byte of name for one that can't start UTF-8"""
+    with open(path, "rb") as file:
+        data = file.read()
+    assert data.count(name + b'\x00') == 1
+    broken = name[:1] + b'\xff' + name[2:]
+    with open(path, "wb") as file:
+        file.write(data.replace(name + b'\x00', broken + b'\x00'))
+
+
+@pytest.mark.parametrize("name", [b"bone_0", b"footstep"])
+def test_seanim_rejects_bad_names(tmp_path, make_anim, name):
+    path = str(tmp_path / "bad.seanim")
+    make_anim(frames=[0], notes=[(0, "footstep")]).save(path)
+    seanim.validate(path)
+
+    corrupt(path, name)
+    with pytest.raises(ValueError, match="not valid UTF-8"):
+        seanim.validate(path)
+
+
+@pytest.mark.parametrize("name", [b"root", b"skin", b"skin_d.png"])
+def test_semodel_rejects_bad_names(tmp_path, make_model, name):
+    path = str(tmp_path / "bad.semodel")
+    make_model(meshes=()).save(path)
+    semodel.validate(path)
+
+    corrupt(path, name)
+    with pytest.raises(ValueError, match="not valid UTF-8"):
+        semodel.validate(path)
+
+
+def test_seanim_unsigned_widths(tmp_path, make_anim):
+    # Frames and bone indices past 0x7FFF only fit the 2-byte widths when
+    # they are read back unsigned
+    anim = make_anim(bone_count=40000, frames=())
+    last = anim.bones[-1]
+    last.useModifier = True
+    last.modifier = seanim.SEANIM_TYPE.SEANIM_TYPE_ADDITIVE
+    last.posKeys.append(seanim.KeyFrame(0, (0.0, 0.0, 0.0)))
+    last.posKeys.append(seanim.KeyFrame(40000, (1.0, 0.0, 0.0)))
+    note = seanim.Note()
+    note.frame = 39000
+    note.name = "late"
+    anim.notes.append(note)
+    path = str(tmp_path / "wide.seanim")
+    anim.save(path)
+
+    seanim.validate(path)
+    summary = seanim.probe(path)
+    assert summary.frameCount == 40001
+    assert summary.boneAnimModifierCount == 1
+
+    anim = seanim.Anim(path)
+    assert anim.notes[0].frame == 39000
+    assert [key.frame for key in anim.bones[39999].posKeys] == [0, 40000]
+    assert anim.bones[39999].useModifier
+    assert anim.bones[39999].modifier == \
+        seanim.SEANIM_TYPE.SEANIM_TYPE_ADDITIVE
+    assert not anim.bones[32768].useModifier